@@ -1,6 +1,6 @@
 import streamlit as st
 import numpy as np
-from py3dbp import Packer, Bin, Item
+from py3dbp import Packer, Bin
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
@@ -11,19 +11,25 @@ import requests
 import time
 
 from src.utils.constants import STANDARD_BOXES, PackingMethod, method_descriptions
-from src.utils.visualization import create_3d_visualization, get_box_type_from_name, display_api_results
-from src.utils.file_handlers import load_boxes_from_file, save_packing_result
-from src.packers.weight_aware import WeightAwarePacker
-from src.packers.extreme_points import ExtremePointPacker
-from src.packers.laff import LAFFPacker
-from src.packers.corner_points import CornerPointPacker
-from src.packers.sfc import SFCPacker
+from src.utils.visualization import create_3d_visualization, get_box_type_from_name, display_api_results, VisibilityIndex
+from src.utils.layer_plans import LayerPlans
+from src.utils.file_handlers import load_boxes_with_validation, save_packing_result
+from src.utils.exporters import EXPORT_FORMATS, ExportSource, export_bytes, export_to_file
+from src.packers.factory import create_packer
+from src.packers.beam_search import BEAM_WIDTH
+from src.packers.item_types import BoxTypeTable
+from src.packers.units import CoordinateScale
 
 # Импорты системы валидации
 from src.validation.validators import DataValidator, ValidationConfig
 from src.utils.streamlit_error_display import StreamlitErrorDisplayManager
 from src.utils.app_state_manager import AppStateManager
 
+# Форматы сохранения результатов через потоковые экспортеры (кроме JSON с аналитикой)
+SAVE_FORMATS = {"CSV": "csv", "JSON Lines": "jsonl", "Parquet": "parquet", "Excel": "xlsx"}
+# Виды 3D-сцены: все коробки, только видимые, разнесенные слои, срез по высоте
+SCENE_VIEWS = {"Все коробки": "all", "Только видимые": "visible", "Разнесенные слои": "exploded", "Срез по высоте": "cutaway"}
+
 
 def main():
     st.title("3D Bin Packing - Упаковка на поддон")
@@ -123,6 +129,15 @@ def main():
 
         state_manager.update_algorithm_params(support_threshold, weight_check)
 
+    # Ширина луча для Beam Search
+    beam_width = BEAM_WIDTH
+    if packing_method == PackingMethod.BEAM_SEARCH.value:
+        beam_width = st.number_input(
+            "Ширина луча (число вариантов укладки, которые рассматриваются одновременно)",
+            min_value=1, max_value=64, value=BEAM_WIDTH, step=1,
+            help="Больше - плотнее укладка, но дольше расчет"
+        )
+
     # Загрузка данных
     st.header("Загрузка данных")
     upload_mode = st.radio(
@@ -137,37 +152,25 @@ def main():
 
     if upload_mode == "Загрузить свои коробки":
         uploaded_file = st.file_uploader(
-            "Загрузите файл с параметрами коробок (CSV или Excel)",
+            "Загрузите файл с параметрами коробок (CSV, Excel, Parquet или Arrow)",
             help="""
             Входные форматы файлов:
             - CSV: name,length,width,height,weight,quantity
-            - Excel: те же колонки что и в CSV
+            - Excel, Parquet, Arrow/Feather: те же колонки что и в CSV
+            Одинаковые строки (имя, размеры, вес) складываются в количество.
             """,
-            type=['csv', 'xlsx', 'xls']
+            type=['csv', 'xlsx', 'xls', 'parquet', 'arrow', 'feather']
         )
 
         if uploaded_file:
             try:
-                boxes_df = load_boxes_from_file(uploaded_file)
-                
-                # Конвертируем DataFrame в список словарей для валидации
-                boxes_data = boxes_df.to_dict('records')
+                # Загрузка и векторизованная проверка всех строк за один проход
+                boxes_df, boxes_validation = load_boxes_with_validation(uploaded_file, validator.config)
+                all_valid = boxes_validation.is_valid
                 
-                # Валидируем каждую коробку
-                all_valid = True
-                validated_boxes = []
-                
-                for i, box_data in enumerate(boxes_data):
-                    box_validation = validator.validate_box_data(box_data)
-                    
-                    if not box_validation.is_valid:
-                        st.error(f"Ошибки в коробке {i+1} ({box_data.get('name', 'Без имени')}):")
-                        error_display.display_validation_result(box_validation, f"Коробка {i+1}")
-                        all_valid = False
-                    else:
-                        validated_boxes.append(box_data)
-                        if box_validation.warnings:
-                            error_display.display_validation_result(box_validation, f"Коробка {i+1}")
+                if not all_valid or boxes_validation.warnings:
+                    error_display.display_validation_result(boxes_validation, "Коробки из файла")
+                validated_boxes = boxes_df.to_dict('records')
                 
                 if all_valid:
                     st.success(f"✅ Все {len(validated_boxes)} коробок прошли валидацию")
@@ -300,7 +303,8 @@ def main():
                     "boxes": boxes_data_for_api,
                     "method": packing_method,
                     "support_threshold": support_threshold if packing_method == PackingMethod.WEIGHT_AWARE.value else 0.8,
-                    "weight_check_enabled": weight_check if packing_method == PackingMethod.WEIGHT_AWARE.value else True
+                    "weight_check_enabled": weight_check if packing_method == PackingMethod.WEIGHT_AWARE.value else True,
+                    "beam_width": beam_width
                 }
                 
                 # Создание задачи
@@ -356,54 +360,59 @@ def main():
         else:
             # Локальный расчет
             # Создание packer'а с настройками
-            if packing_method == PackingMethod.WEIGHT_AWARE.value:
-                packer = WeightAwarePacker(
-                    support_threshold=state_manager.get_state_summary()['algorithm_params']['support_threshold'],
-                    weight_check_enabled=state_manager.get_state_summary()['algorithm_params']['weight_check']
-                )
-            elif packing_method == PackingMethod.EXTREME_POINTS.value:
-                packer = ExtremePointPacker()
-            elif packing_method == PackingMethod.LAFF.value:
-                packer = LAFFPacker()
-            elif packing_method == PackingMethod.CORNER_POINTS.value:
-                packer = CornerPointPacker()
-            elif packing_method == PackingMethod.SFC.value:
-                packer = SFCPacker()
+            packer = create_packer(
+                packing_method,
+                support_threshold=state_manager.get_state_summary()['algorithm_params']['support_threshold'],
+                weight_check_enabled=state_manager.get_state_summary()['algorithm_params']['weight_check'],
+                beam_width=beam_width
+            )
+
+            # Коробки заказа: (название, длина, ширина, высота, вес, количество)
+            if use_custom_boxes and boxes_df is not None:
+                order_boxes = [
+                    (row['name'], row['length'], row['width'], row['height'], row['weight'], int(row['quantity']))
+                    for _, row in boxes_df.iterrows()
+                ]
+            else:
+                order_boxes = [
+                    (box_name, *STANDARD_BOXES[box_name]['dimensions'], STANDARD_BOXES[box_name]['weight'], quantity)
+                    for box_name, quantity in box_quantities.items()
+                ]
+
+            # Размеры переводятся в целые внутренние единицы (10^-k см) и обратно после упаковки
+            scale = CoordinateScale.for_values(
+                [pallet_length, pallet_width, pallet_height] +
+                [value for box in order_boxes for value in box[1:4]]
+            )
+            packer.scale = scale
+            pallet_dimensions = tuple(
+                scale.to_internal(value, round_up=False) for value in (pallet_length, pallet_width, pallet_height)
+            )
 
             # Добавляем поддон
             packer.add_bin(
-                Bin('Поддон', pallet_length, pallet_width, pallet_height, pallet_weight)
+                Bin('Поддон', *pallet_dimensions, pallet_weight)
             )
 
-            # Добавляем коробки
+            # Добавляем коробки: одинаковые коробки ссылаются на общий тип
+            item_types = BoxTypeTable(pallet_dimensions)
             item_count = 0
-            if use_custom_boxes and boxes_df is not None:
-                for _, row in boxes_df.iterrows():
-                    for i in range(int(row['quantity'])):
-                        item_count += 1
-                        packer.add_item(
-                            Item(f'{row["name"]}_{i}',
-                                 row['length'],
-                                 row['width'],
-                                 row['height'],
-                                 row['weight'])
-                        )
-            else:
-                for box_name, quantity in box_quantities.items():
-                    box_info = STANDARD_BOXES[box_name]
-                    for i in range(quantity):
-                        item_count += 1
-                        packer.add_item(
-                            Item(f'{box_name}_{i}',
-                                 box_info['dimensions'][0],
-                                 box_info['dimensions'][1],
-                                 box_info['dimensions'][2],
-                                 box_info['weight'])
-                        )
+            for name, length, width, height, weight, quantity in order_boxes:
+                item_count += quantity
+                item_types.add_boxes(
+                    packer,
+                    name,
+                    scale.to_internal(length),
+                    scale.to_internal(width),
+                    scale.to_internal(height),
+                    weight,
+                    quantity
+                )
 
             # Выполняем упаковку
             with st.spinner("Выполняется упаковка..."):
                 packer.pack()
+            scale.restore(packer)
 
             # Сохраняем результаты в состоянии
             state_manager.save_packing_results(
@@ -477,8 +486,34 @@ def main():
                     )
 
         if packed_items > 0:
+            # Вид сцены: большие упаковки удобнее смотреть только по видимым коробкам
+            view = st.radio(
+                "Вид 3D-сцены",
+                list(SCENE_VIEWS),
+                horizontal=True,
+                help="Только видимые - внутренние коробки не рисуются; "
+                     "разнесенные слои - слои раздвинуты по высоте; "
+                     "срез по высоте - показаны коробки ниже выбранной отметки"
+            )
+            view_options = {}
+            if SCENE_VIEWS[view] != 'all':
+                explode = SCENE_VIEWS[view] == 'exploded'
+                # Индекс видимости хранится с результатами: срез пересчитывается инкрементально
+                indexes = results.setdefault('visibility', {})
+                if explode not in indexes:
+                    indexes[explode] = VisibilityIndex.from_items(packer.bins[0], packer.bins[0].items, explode)
+                view_options = {'mode': 'culled', 'visibility': indexes[explode]}
+                if explode:
+                    view_options['explode_gap'] = st.slider(
+                        "Расстояние между слоями", 0, int(packer.bins[0].depth), int(packer.bins[0].depth) // 10
+                    )
+                if SCENE_VIEWS[view] == 'cutaway':
+                    view_options['cutaway_z'] = st.slider(
+                        "Показать коробки ниже отметки", 1, int(packer.bins[0].depth), int(packer.bins[0].depth)
+                    )
+
             # Используем улучшенную визуализацию
-            fig = create_3d_visualization(packer)
+            fig = create_3d_visualization(packer, **view_options)
             
             # Отображаем график
             st.plotly_chart(fig, use_container_width=True)
@@ -492,6 +527,17 @@ def main():
                     filename = f'results/3d_visualization_{timestamp}.html'
                     fig.write_html(filename)
                     st.success(f"3D-визуализация сохранена в файл: {filename}")
+                # Модель для внешних просмотрщиков: экземпляры одного куба, файл намного меньше HTML
+                # (собирается один раз и хранится с результатами, а не на каждом перезапуске)
+                if 'glb' not in results:
+                    results['glb'] = export_bytes(ExportSource.from_packer(packer), 'glb')
+                st.download_button(
+                    "Скачать 3D-модель (GLB)",
+                    results['glb'],
+                    file_name=f"packing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.glb",
+                    mime=EXPORT_FORMATS['glb'][0],
+                    key="download_glb"
+                )
 
             with col2:
                 if st.button("Показать статистику использования", key="show_stats"):
@@ -531,6 +577,23 @@ def main():
 
                     st.plotly_chart(fig_bar, use_container_width=True)
 
+            # Планы слоев для инструкции погрузки (готовые SVG хранятся с результатами)
+            with st.expander("Планы слоев (вид сверху)"):
+                if 'layer_plans' not in results:
+                    results['layer_plans'] = LayerPlans.from_packer(packer)
+                layer_plans = results['layer_plans']
+                layer = 1
+                if len(layer_plans) > 1:
+                    layer = st.slider("Слой", 1, len(layer_plans), 1, key="layer_plan_select")
+                st.write(layer_plans.describe(layer - 1))
+                st.image(layer_plans.svg(layer - 1), use_container_width=True)
+                st.download_button(
+                    "Скачать планы всех слоев для печати (HTML)",
+                    layer_plans.to_html(),
+                    file_name=f"layer_plans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                    mime="text/html"
+                )
+
             # Создаем контейнер для сохранения
             save_container = st.container()
             with save_container:
@@ -539,12 +602,14 @@ def main():
                 with col1:
                     file_format = st.selectbox(
                         "Выберите формат сохранения",
-                        ["JSON", "CSV", "Excel"],
+                        ["JSON", *SAVE_FORMATS],
                         key="file_format_select",
                         help="""
                         Выходные форматы:
                         - JSON: полная информация о упаковке включая координаты
-                        - CSV: упрощенный формат с основными параметрами
+                        - CSV: упакованные и неупакованные коробки (столбец status)
+                        - JSON Lines: статистика и по строке на коробку
+                        - Parquet: таблица коробок, статистика в метаданных
                         - Excel: расширенный формат с отдельными листами для упакованных и неупакованных коробок
                         """
                     )
@@ -572,55 +637,13 @@ def main():
                         
                         if file_format == "JSON":
                             filename = save_packing_result(packer, space_utilization)
-                        elif file_format == "CSV":
-                            filename = f'results/packing_result_{timestamp}.csv'
-                            packed_data = [{
-                                'name': item.name,
-                                'width': item.width,
-                                'height': item.height,
-                                'depth': item.depth,
-                                'weight': item.weight,
-                                'position_x': item.position[0],
-                                'position_y': item.position[1],
-                                'position_z': item.position[2]
-                            } for item in packer.bins[0].items]
-                            df = pd.DataFrame(packed_data)
-                            df.to_csv(filename, index=False)
-                        else:  # Excel
-                            filename = f'results/packing_result_{timestamp}.xlsx'
-                            packed_data = [{
-                                'name': item.name,
-                                'width': item.width,
-                                'height': item.height,
-                                'depth': item.depth,
-                                'weight': item.weight,
-                                'position_x': item.position[0],
-                                'position_y': item.position[1],
-                                'position_z': item.position[2]
-                            } for item in packer.bins[0].items]
-                            
-                            unpacked_data = [{
-                                'name': item.name,
-                                'width': item.width,
-                                'height': item.height,
-                                'depth': item.depth,
-                                'weight': item.weight
-                            } for item in packer.unpacked_items]
-                            
-                            stats_data = [{
-                                'total_items': len(packer.items),
-                                'packed_items': packed_items,
-                                'unpacked_items': unpacked_items,
-                                'space_utilization': space_utilization,
-                                'calculation_time': packer.calculation_time,
-                                'total_weight': total_weight,
-                                'packed_weight': packed_weight
-                            }]
-
-                            with pd.ExcelWriter(filename) as writer:
-                                pd.DataFrame(packed_data).to_excel(writer, sheet_name='Упакованные', index=False)
-                                pd.DataFrame(unpacked_data).to_excel(writer, sheet_name='Неупакованные', index=False)
-                                pd.DataFrame(stats_data).to_excel(writer, sheet_name='Статистика', index=False)
+                        else:
+                            # Потоковая запись строк без промежуточных таблиц
+                            export_format = SAVE_FORMATS[file_format]
+                            filename = export_to_file(
+                                ExportSource.from_packer(packer), export_format,
+                                f'results/packing_result_{timestamp}.{EXPORT_FORMATS[export_format][1]}'
+                            )
 
                         st.success(f"Результаты сохранены в файл: {filename}")
                     except Exception as e:
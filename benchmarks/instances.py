@@ -0,0 +1,152 @@
+# benchmarks/instances.py
+"""Генератор тестовых экземпляров в стиле Bischoff–Ratcliff (BR1–BR15).
+
+Классы различаются числом типов коробок: от слабо неоднородных (BR1, 3 типа)
+до сильно неоднородных (BR15, 100 типов). Размеры коробок берутся из диапазонов
+исходного генератора и масштабируются под размеры поддона.
+
+Запуск:
+    python -m benchmarks.instances --classes BR1 BR8 --seeds 0 1 --output corpus.json
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from src.validation.validators import ValidationConfig
+
+# Число типов коробок в классах BR1–BR15
+BR_CLASSES = {
+    'BR1': 3, 'BR2': 5, 'BR3': 8, 'BR4': 10, 'BR5': 12,
+    'BR6': 15, 'BR7': 20, 'BR8': 30, 'BR9': 40, 'BR10': 50,
+    'BR11': 60, 'BR12': 70, 'BR13': 80, 'BR14': 90, 'BR15': 100
+}
+
+# Диапазоны размеров исходного генератора (контейнер 587 x 233 x 220 см)
+BR_LENGTH_RANGE = (30, 120)
+BR_WIDTH_RANGE = (25, 100)
+BR_HEIGHT_RANGE = (20, 80)
+# Длина поддона, для которой диапазоны BR уменьшаются вдвое
+BR_REFERENCE_LENGTH = 240
+
+DEFAULT_PALLET_HEIGHT = 160
+DEFAULT_PALLET_MAX_WEIGHT = 1000
+# Суммарный объем коробок относительно объема поддона
+DEFAULT_FILL_RATIO = 1.0
+# Плотность груза, кг/дм³
+DENSITY_RANGE = (0.05, 0.4)
+
+
+def _scaled_range(value_range, scale):
+    low, high = value_range
+    return max(1, round(low * scale)), max(1, round(high * scale))
+
+
+def generate_instance(br_class, pallet_size, seed=0, pallet_height=DEFAULT_PALLET_HEIGHT,
+                      max_weight=DEFAULT_PALLET_MAX_WEIGHT, fill_ratio=DEFAULT_FILL_RATIO):
+    """Сгенерировать один экземпляр в формате PackingRequest (pallet + boxes)"""
+    if br_class not in BR_CLASSES:
+        raise ValueError(f"Неизвестный класс экземпляров: {br_class}")
+
+    pallet_length, pallet_width = max(pallet_size), min(pallet_size)
+    rng = random.Random(f'{br_class}-{pallet_length}x{pallet_width}-{seed}')
+    scale = pallet_length / BR_REFERENCE_LENGTH
+
+    length_range = _scaled_range(BR_LENGTH_RANGE, scale)
+    width_range = _scaled_range(BR_WIDTH_RANGE, scale)
+    height_range = _scaled_range(BR_HEIGHT_RANGE, scale)
+
+    n_types = BR_CLASSES[br_class]
+    types = []
+    for index in range(n_types):
+        length = rng.randint(*length_range)
+        width = rng.randint(*width_range)
+        height = rng.randint(*height_range)
+        # Как в исходном генераторе: длина - наибольшее измерение основания
+        length, width = max(length, width), min(length, width)
+        volume_dm3 = length * width * height / 1000
+        weight = round(volume_dm3 * rng.uniform(*DENSITY_RANGE), 2)
+        types.append({
+            'name': f'{br_class}T{index + 1}',
+            'length': length,
+            'width': width,
+            'height': height,
+            'weight': max(weight, ValidationConfig.MIN_WEIGHT),
+            'volume': length * width * height,
+            'share': rng.uniform(0.5, 1.5)
+        })
+
+    # Количество каждого типа - по его доле в целевом объеме
+    target_volume = pallet_length * pallet_width * pallet_height * fill_ratio
+    total_share = sum(box_type['share'] for box_type in types)
+    boxes = []
+    for box_type in types:
+        type_volume = target_volume * box_type['share'] / total_share
+        quantity = max(1, round(type_volume / box_type['volume']))
+        boxes.append({
+            'name': box_type['name'],
+            'length': box_type['length'],
+            'width': box_type['width'],
+            'height': box_type['height'],
+            'weight': box_type['weight'],
+            'quantity': quantity
+        })
+
+    return {
+        'name': f'{br_class}-{pallet_length}x{pallet_width}-s{seed}',
+        'class': br_class,
+        'seed': seed,
+        'pallet': {
+            'length': pallet_length,
+            'width': pallet_width,
+            'height': pallet_height,
+            'max_weight': max_weight
+        },
+        'boxes': boxes
+    }
+
+
+def generate_corpus(classes=None, pallet_sizes=None, seeds=(0,), **kwargs):
+    """Сгенерировать набор экземпляров: классы x размеры поддонов x сиды"""
+    classes = classes or list(BR_CLASSES)
+    pallet_sizes = pallet_sizes or ValidationConfig.STANDARD_PALLET_SIZES
+    return [
+        generate_instance(br_class, pallet_size, seed, **kwargs)
+        for br_class in classes
+        for pallet_size in pallet_sizes
+        for seed in seeds
+    ]
+
+
+def load_corpus(path):
+    """Загрузить набор экземпляров из JSON"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Генератор экземпляров в стиле BR1-BR15')
+    parser.add_argument('--classes', nargs='+', default=list(BR_CLASSES), choices=list(BR_CLASSES))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--pallet-height', type=float, default=DEFAULT_PALLET_HEIGHT)
+    parser.add_argument('--max-weight', type=float, default=DEFAULT_PALLET_MAX_WEIGHT)
+    parser.add_argument('--fill-ratio', type=float, default=DEFAULT_FILL_RATIO)
+    parser.add_argument('--output', help='Файл для JSON (по умолчанию stdout)')
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(
+        args.classes, seeds=args.seeds, pallet_height=args.pallet_height,
+        max_weight=args.max_weight, fill_ratio=args.fill_ratio
+    )
+    payload = json.dumps(corpus, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+# benchmarks/load_test.py
+"""Нагрузочное тестирование FastAPI сервиса упаковки.
+
+Отправляет задачи /pack из набора экземпляров BR с заданной интенсивностью
+(пуассоновский поток), опрашивает /status и /result и считает задержки.
+
+Запуск:
+    # поднять локальный uvicorn и нагрузить его
+    python -m benchmarks.load_test --spawn --rate 2 --requests 50 --output load.json
+    # нагрузить уже запущенный сервис
+    python -m benchmarks.load_test --url http://localhost:8000 --rate 5 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from src.utils.constants import PackingMethod
+from .instances import BR_CLASSES, generate_corpus, load_corpus
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - зависимость нужна только для нагрузочного теста
+    httpx = None
+
+DEFAULT_PORT = 8765
+
+# validators включает INFO-логирование, из-за которого httpx пишет каждый запрос
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+def percentile(values, q):
+    """Перцентиль по методу ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_stats(values):
+    """Сводка задержек в миллисекундах"""
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values) * 1000, 2),
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p90_ms': round(percentile(values, 90) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2)
+    }
+
+
+async def run_request(client, payload, poll_interval, timeout):
+    """Отправить одну задачу и дождаться результата, замеряя все этапы"""
+    record = {
+        'method': payload['method'],
+        'instance': payload.get('instance'),
+        'status': 'failed',
+        'polls': 0,
+        'poll_time': 0.0
+    }
+    body = {key: value for key, value in payload.items() if key != 'instance'}
+
+    started = time.perf_counter()
+    try:
+        response = await client.post('/pack', json=body)
+    except httpx.HTTPError as e:
+        record['error'] = f'submit: {e}'
+        return record
+    record['submit_latency'] = time.perf_counter() - started
+
+    if response.status_code != 200:
+        record['error'] = f'submit: HTTP {response.status_code}'
+        return record
+    task_id = response.json()['task_id']
+
+    while time.perf_counter() - started < timeout:
+        await asyncio.sleep(poll_interval)
+        poll_started = time.perf_counter()
+        try:
+            status_response = await client.get(f'/status/{task_id}')
+            record['polls'] += 1
+            status = status_response.json()['status']
+            if status in ('completed', 'failed'):
+                result_response = await client.get(f'/result/{task_id}')
+                record['polls'] += 1
+        except httpx.HTTPError as e:
+            record['error'] = f'poll: {e}'
+            return record
+        finally:
+            record['poll_time'] += time.perf_counter() - poll_started
+
+        if status == 'completed' and result_response.status_code == 200:
+            record['status'] = 'completed'
+            record['time_to_result'] = time.perf_counter() - started
+            summary = result_response.json().get('summary', {})
+            record['packed_items'] = summary.get('packed_items')
+            record['total_items'] = summary.get('total_items')
+            break
+        if status == 'failed':
+            record['error'] = status_response.json().get('error')
+            break
+    else:
+        record['status'] = 'timeout'
+
+    try:
+        await client.delete(f'/task/{task_id}')
+    except httpx.HTTPError:
+        pass
+    return record
+
+
+async def generate_load(url, payloads, rate, duration, max_requests, poll_interval, timeout, seed):
+    """Пуассоновский поток запросов с интенсивностью rate запросов в секунду"""
+    rng = random.Random(seed)
+    tasks = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        sent = 0
+        while sent < max_requests and time.perf_counter() - started < duration:
+            payload = payloads[sent % len(payloads)]
+            tasks.append(asyncio.create_task(run_request(client, payload, poll_interval, timeout)))
+            sent += 1
+            await asyncio.sleep(rng.expovariate(rate))
+        records = await asyncio.gather(*tasks)
+        wall_time = time.perf_counter() - started
+
+    return records, wall_time
+
+
+def build_payloads(corpus, methods, seed):
+    """Смесь запросов: каждый экземпляр с каждым методом, в случайном порядке"""
+    payloads = []
+    for instance in corpus:
+        for method_name in methods:
+            payloads.append({
+                'instance': instance['name'],
+                'pallet': instance['pallet'],
+                'boxes': instance['boxes'],
+                'method': PackingMethod[method_name].value
+            })
+    random.Random(seed).shuffle(payloads)
+    return payloads
+
+
+def build_report(records, wall_time, args):
+    """Пропускная способность и перцентили задержек по методам"""
+    by_method = {}
+    for record in records:
+        by_method.setdefault(record['method'], []).append(record)
+
+    methods = {}
+    for method, method_records in by_method.items():
+        completed = [r for r in method_records if r['status'] == 'completed']
+        methods[PackingMethod(method).name] = {
+            'requests': len(method_records),
+            'completed': len(completed),
+            'failed': len(method_records) - len(completed),
+            'throughput_rps': round(len(completed) / wall_time, 3) if wall_time > 0 else 0,
+            'submit_latency': latency_stats([r['submit_latency'] for r in method_records if 'submit_latency' in r]),
+            'time_to_result': latency_stats([r['time_to_result'] for r in completed]),
+            'polling': {
+                'mean_polls': round(sum(r['polls'] for r in method_records) / len(method_records), 2),
+                'mean_poll_time_ms': round(sum(r['poll_time'] for r in method_records) / len(method_records) * 1000, 2)
+            }
+        }
+
+    completed = [r for r in records if r['status'] == 'completed']
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'url': args.url,
+            'rate': args.rate,
+            'poll_interval': args.poll_interval,
+            'requests': len(records),
+            'wall_time': round(wall_time, 3)
+        },
+        'overall': {
+            'completed': len(completed),
+            'throughput_rps': round(len(completed) / wall_time, 3) if wall_time > 0 else 0,
+            'submit_latency': latency_stats([r['submit_latency'] for r in records if 'submit_latency' in r]),
+            'time_to_result': latency_stats([r['time_to_result'] for r in completed])
+        },
+        'methods': methods,
+        'errors': [r['error'] for r in records if r.get('error')][:20]
+    }
+
+
+def format_report(report):
+    """Текстовая таблица по методам"""
+    lines = [
+        f"{'method':<16} {'done':>9} {'rps':>7} {'submit p50':>11} {'submit p99':>11} "
+        f"{'result p50':>11} {'result p99':>11} {'polls':>6}"
+    ]
+    for method_name, entry in report['methods'].items():
+        submit = entry['submit_latency']
+        result = entry['time_to_result']
+        lines.append(
+            f"{method_name:<16} {entry['completed']:>4}/{entry['requests']:<4} {entry['throughput_rps']:>7.3f} "
+            f"{submit.get('p50_ms', 0):>9.1f}ms {submit.get('p99_ms', 0):>9.1f}ms "
+            f"{result.get('p50_ms', 0):>9.1f}ms {result.get('p99_ms', 0):>9.1f}ms "
+            f"{entry['polling']['mean_polls']:>6.1f}"
+        )
+    overall = report['overall']
+    lines.append(
+        f"overall: {overall['completed']} completed, {overall['throughput_rps']} rps, "
+        f"wall time {report['meta']['wall_time']} s"
+    )
+    return '\n'.join(lines)
+
+
+def spawn_server(port):
+    """Запустить локальный uvicorn с API и дождаться /health"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'src.api.main:app', '--port', str(port), '--log-level', 'warning']
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f'{url}/health', timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('Не удалось запустить API сервер')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование API упаковки')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{DEFAULT_PORT}')
+    parser.add_argument('--spawn', action='store_true', help='Запустить локальный uvicorn')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--corpus', help='JSON с экземплярами (иначе генерируется)')
+    parser.add_argument('--classes', nargs='+', default=['BR1', 'BR3', 'BR5'], choices=list(BR_CLASSES))
+    parser.add_argument('--methods', nargs='+', default=[method.name for method in PackingMethod],
+                        choices=[method.name for method in PackingMethod])
+    parser.add_argument('--rate', type=float, default=1.0, help='Запросов в секунду')
+    parser.add_argument('--duration', type=float, default=60.0, help='Длительность подачи нагрузки, с')
+    parser.add_argument('--requests', type=int, default=100, help='Максимум запросов')
+    parser.add_argument('--poll-interval', type=float, default=0.25)
+    parser.add_argument('--timeout', type=float, default=300.0, help='Таймаут одной задачи, с')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для JSON отчета')
+    args = parser.parse_args(argv)
+
+    if httpx is None:
+        parser.error('Для нагрузочного теста нужен пакет httpx: pip install httpx')
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.classes, seeds=[args.seed])
+    payloads = build_payloads(corpus, args.methods, args.seed)
+
+    server = None
+    if args.spawn:
+        server, args.url = spawn_server(args.port)
+
+    try:
+        records, wall_time = asyncio.run(generate_load(
+            args.url, payloads, args.rate, args.duration, args.requests,
+            args.poll_interval, args.timeout, args.seed
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = build_report(records, wall_time, args)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# benchmarks/macro.py
+"""Макро-бенчмарк: все методы упаковки на наборе экземпляров BR1–BR15.
+
+Запуск:
+    python -m benchmarks.macro --classes BR1 BR5 BR10 --seeds 0 --output macro.json
+    python -m benchmarks.macro --corpus corpus.json --workers 8
+    python -m benchmarks.macro --classes BR7 --trace-dir traces  # трассы для python -m src.packers.trace
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from py3dbp import Bin, Item
+
+from src.packers.collision import COLLISION_BACKENDS
+from src.packers.factory import create_packer
+from src.utils.constants import PackingMethod
+from .instances import BR_CLASSES, generate_corpus, load_corpus
+
+
+def build_packer(instance, method, seed=None, use_raster_points=False, collision_backend='geometric'):
+    """Создать packer и загрузить в него поддон и коробки экземпляра"""
+    packer = create_packer(method.value, seed=seed, use_raster_points=use_raster_points,
+                           collision_backend=collision_backend)
+    pallet = instance['pallet']
+    packer.add_bin(Bin('Поддон', pallet['length'], pallet['width'], pallet['height'], pallet['max_weight']))
+    for box in instance['boxes']:
+        for i in range(int(box['quantity'])):
+            packer.add_item(Item(f"{box['name']}_{i}", box['length'], box['width'], box['height'], box['weight']))
+    return packer
+
+
+def run_case(instance, method_name, trace_dir=None, use_raster_points=False, collision_backend='geometric'):
+    """Выполнить один экземпляр одним методом и собрать метрики"""
+    method = PackingMethod[method_name]
+    phases = {}
+
+    start = time.perf_counter()
+    packer = build_packer(instance, method, seed=instance.get('seed'), use_raster_points=use_raster_points,
+                          collision_backend=collision_backend)
+    if trace_dir:
+        packer.enable_trace(os.path.join(trace_dir, f"{instance['name']}_{method_name}.pptr"))
+    phases['build'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packer.pack()
+    phases['pack'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packer.generate_detailed_analytics()
+    phases['analytics'] = time.perf_counter() - start
+
+    bin_ = packer.bins[0]
+    bin_volume = float(bin_.width) * float(bin_.height) * float(bin_.depth)
+    packed_volume = sum(float(item.width) * float(item.height) * float(item.depth) for item in bin_.items)
+
+    return {
+        'instance': instance['name'],
+        'class': instance.get('class'),
+        'method': method_name,
+        'total_items': len(packer.items),
+        'packed_items': len(bin_.items),
+        'unpacked_items': len(packer.unpacked_items),
+        'utilization': round(packed_volume / bin_volume * 100, 2) if bin_volume > 0 else 0,
+        'packed_weight': round(sum(float(item.weight) for item in bin_.items), 2),
+        'time': round(sum(phases.values()), 4),
+        'phases': {name: round(value, 4) for name, value in phases.items()},
+        'placement_attempts': packer.analytics['placement_attempts'],
+        'collision_memory_bytes': packer._collision.memory_bytes() if packer._collision is not None else 0
+    }
+
+
+def run_corpus(corpus, methods=None, workers=None, trace_dir=None, use_raster_points=False,
+               collision_backend='geometric'):
+    """Прогнать все методы на всех экземплярах в пуле процессов"""
+    methods = methods or [method.name for method in PackingMethod]
+    jobs = [(instance, method_name) for instance in corpus for method_name in methods]
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_case, instance, method_name, trace_dir, use_raster_points, collision_backend)
+            for instance, method_name in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def summarize(runs):
+    """Агрегаты по методам: среднее время, заполнение и доля упакованных"""
+    summary = {}
+    for run in runs:
+        entry = summary.setdefault(run['method'], {
+            'runs': 0, 'time': 0.0, 'utilization': 0.0, 'packed_items': 0, 'total_items': 0,
+            'phases': {}
+        })
+        entry['runs'] += 1
+        entry['time'] += run['time']
+        entry['utilization'] += run['utilization']
+        entry['packed_items'] += run['packed_items']
+        entry['total_items'] += run['total_items']
+        for phase, value in run['phases'].items():
+            entry['phases'][phase] = entry['phases'].get(phase, 0.0) + value
+
+    for entry in summary.values():
+        runs = entry['runs']
+        entry['mean_time'] = round(entry.pop('time') / runs, 4)
+        entry['mean_utilization'] = round(entry.pop('utilization') / runs, 2)
+        entry['packed_share'] = round(entry['packed_items'] / max(entry['total_items'], 1) * 100, 2)
+        entry['mean_phases'] = {phase: round(value / runs, 4) for phase, value in entry.pop('phases').items()}
+
+    return summary
+
+
+def format_table(runs, summary):
+    """Текстовые таблицы: по каждому прогону и сводная по методам"""
+    lines = [
+        f"{'instance':<24} {'method':<16} {'packed':>11} {'util %':>8} {'time, s':>9} "
+        f"{'build':>8} {'pack':>8} {'analyt.':>8}"
+    ]
+    for run in runs:
+        phases = run['phases']
+        lines.append(
+            f"{run['instance']:<24} {run['method']:<16} "
+            f"{run['packed_items']:>5}/{run['total_items']:<5} {run['utilization']:>8.2f} {run['time']:>9.3f} "
+            f"{phases['build']:>8.3f} {phases['pack']:>8.3f} {phases['analytics']:>8.3f}"
+        )
+
+    lines.append('')
+    lines.append(f"{'method':<16} {'runs':>5} {'packed %':>9} {'util %':>8} {'time, s':>9}")
+    for method_name, entry in summary.items():
+        lines.append(
+            f"{method_name:<16} {entry['runs']:>5} {entry['packed_share']:>9.2f} "
+            f"{entry['mean_utilization']:>8.2f} {entry['mean_time']:>9.3f}"
+        )
+    return '\n'.join(lines)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Макро-бенчмарк методов упаковки')
+    parser.add_argument('--corpus', help='JSON с экземплярами (иначе генерируется)')
+    parser.add_argument('--classes', nargs='+', default=['BR1', 'BR4', 'BR7', 'BR10', 'BR15'],
+                        choices=list(BR_CLASSES))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--methods', nargs='+', choices=[method.name for method in PackingMethod])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', help='Файл для JSON с результатами')
+    parser.add_argument('--trace-dir', help='Каталог для трасс упаковки')
+    parser.add_argument('--raster-points', action='store_true',
+                        help='Позиции на полу из растровых точек (Weight-Aware, SFC)')
+    parser.add_argument('--collision', choices=COLLISION_BACKENDS, default='geometric',
+                        help='Проверка пересечений: точная или по воксельной сетке')
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus) if args.corpus else generate_corpus(args.classes, seeds=args.seeds)
+
+    start = time.perf_counter()
+    runs = run_corpus(corpus, args.methods, args.workers, args.trace_dir, args.raster_points, args.collision)
+    wall_time = time.perf_counter() - start
+    summary = summarize(runs)
+
+    print(format_table(runs, summary))
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'revision': _git_revision(),
+                'python': platform.python_version(),
+                'workers': args.workers,
+                'instances': len(corpus),
+                'wall_time': round(wall_time, 3),
+                'collision': args.collision
+            },
+            'summary': summary,
+            'runs': runs
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
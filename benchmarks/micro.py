@@ -0,0 +1,334 @@
+# benchmarks/micro.py
+"""Микро-бенчмарки геометрических примитивов упаковщиков.
+
+Запуск:
+    python -m benchmarks.micro run --output baseline.json
+    python -m benchmarks.micro compare baseline.json current.json --threshold 0.15
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from py3dbp import Bin, Item
+
+from src.packers.extreme_points import ExtremePointPacker
+from src.packers.corner_points import CornerPointPacker
+from src.packers.collision import GeometricCollision, VoxelCollision
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_SEED = 42
+CELL_SIZE = 40
+# Сколько последних предметов дают точки для обновления EP/CP:
+# полный набор точек для 5k предметов делает один вызов слишком долгим
+POINT_SOURCE_ITEMS = 64
+# Ограничения размера для примитивов с квадратичной стоимостью одного вызова
+# (_update_corner_points проверяет каждую новую точку против всех предметов);
+# снимаются флагом --full
+SIZE_LIMITS = {
+    '_update_corner_points': 1000
+}
+# Если один раунд дольше этого, остальные раунды не выполняются
+SLOW_ROUND_TIME = 1.0
+# Шаг воксельной сетки (координаты синтетического состояния целые)
+VOXEL_RESOLUTION = 1
+
+
+def build_synthetic_state(packer, n_items, seed=DEFAULT_SEED):
+    """Заполнить packer n_items непересекающимися предметами (по ячейкам сетки)"""
+    rng = random.Random(seed)
+    cells_per_side = max(1, math.ceil(n_items ** (1 / 3)))
+    side = cells_per_side * CELL_SIZE
+
+    packer.bins = []
+    packer.items = []
+    packer.add_bin(Bin('bench_pallet', side, side, side, 10 ** 9))
+    packer.bins[0].items = []
+
+    for index in range(n_items):
+        cell_z, rest = divmod(index, cells_per_side * cells_per_side)
+        cell_y, cell_x = divmod(rest, cells_per_side)
+        width = rng.randint(10, CELL_SIZE)
+        height = rng.randint(10, CELL_SIZE)
+        depth = rng.randint(10, CELL_SIZE)
+        item = Item(f'bench_{index}', width, height, depth, rng.uniform(1, 30))
+        item.position = [
+            cell_x * CELL_SIZE + rng.randint(0, CELL_SIZE - width),
+            cell_y * CELL_SIZE + rng.randint(0, CELL_SIZE - height),
+            cell_z * CELL_SIZE
+        ]
+        packer.items.append(item)
+        packer.bins[0].items.append(item)
+
+    return packer
+
+
+def _corner_points(items):
+    """Угловые точки предметов - исходный набор точек для обновления EP/CP"""
+    points = [(0, 0, 0)]
+    for item in items:
+        x, y, z = item.position
+        points.extend([
+            (x + item.width, y, z),
+            (x, y + item.height, z),
+            (x, y, z + item.depth)
+        ])
+    return points
+
+
+def _probe(packer, rng):
+    """Случайная пробная коробка внутри контейнера"""
+    bin_ = packer.bins[0]
+    width, height, depth = rng.randint(10, CELL_SIZE), rng.randint(10, CELL_SIZE), rng.randint(10, CELL_SIZE)
+    x = rng.uniform(0, bin_.width - width)
+    y = rng.uniform(0, bin_.height - height)
+    z = rng.uniform(0, bin_.depth - depth)
+    return x, y, z, width, height, depth
+
+
+def build_collision_backends(packer, resolution=VOXEL_RESOLUTION):
+    """Точная и воксельная проверки пересечений для заполненного packer"""
+    bin_ = packer.bins[0]
+    voxel = VoxelCollision(bin_.width, bin_.height, bin_.depth, resolution)
+    for item in bin_.items:
+        voxel.add(item.position[0], item.position[1], item.position[2], item.width, item.height, item.depth)
+    return {'geometric': GeometricCollision(packer), 'voxel': voxel}
+
+
+def make_cases(n_items, seed=DEFAULT_SEED, memory=None):
+    """Сформировать набор замеряемых функций для состояния из n_items предметов.
+
+    В memory (если передан) записывается объем памяти структур проверки пересечений.
+    """
+    rng = random.Random(seed + n_items)
+    ep_packer = build_synthetic_state(ExtremePointPacker(), n_items, seed)
+    cp_packer = build_synthetic_state(CornerPointPacker(), n_items, seed)
+    placed = ep_packer.bins[0].items
+    x, y, z, width, height, depth = _probe(ep_packer, rng)
+    point = (x, y, z)
+
+    def intersection_scan():
+        check = ep_packer._check_intersection_orientation
+        for other in placed:
+            check(x, y, z, width, height, depth,
+                  other.position[0], other.position[1], other.position[2],
+                  other.width, other.height, other.depth)
+
+    def overlap_scan():
+        overlap = ep_packer._calculate_overlap_area_orientation
+        for other in placed:
+            overlap(other.position[0], other.position[1], other.width, other.height,
+                    x, y, width, height)
+
+    def support_check():
+        ep_packer._check_support_orientation(width, height, depth, x, y, placed[-1].position[2])
+
+    def orientations():
+        get_orientations = ep_packer._get_item_orientations
+        for item in placed:
+            get_orientations(item)
+
+    backends = build_collision_backends(ep_packer)
+    if memory is not None:
+        for backend_name, backend in backends.items():
+            memory[f'{backend_name}@{n_items}'] = backend.memory_bytes()
+    geometric, voxel = backends['geometric'], backends['voxel']
+    # Для вокселей берем целочисленную пробную позицию, чтобы результаты совпадали
+    grid_probe = (int(x), int(y), int(z), width, height, depth)
+
+    def collides_geometric():
+        geometric.collides(*grid_probe)
+
+    def collides_voxel():
+        voxel.collides(*grid_probe)
+
+    voxel_scratch = VoxelCollision(voxel.nx, voxel.ny, voxel.nz, VOXEL_RESOLUTION)
+
+    def place_voxel():
+        voxel_scratch.add(*grid_probe)
+
+    def point_inside():
+        cp_packer._point_inside_any_item(point)
+
+    source_items = placed[-POINT_SOURCE_ITEMS:]
+    seed_points = _corner_points(source_items)
+    new_item = Item('bench_new', width, height, depth, 1)
+    new_item.position = [x, y, z]
+
+    def update_extreme_points():
+        ep_packer.extreme_points = list(seed_points)
+        ep_packer.bins[0].items.append(new_item)
+        try:
+            ep_packer._update_extreme_points(new_item)
+        finally:
+            ep_packer.bins[0].items.pop()
+
+    def update_corner_points():
+        cp_packer.corner_points = list(seed_points)
+        cp_packer.bins[0].items.append(new_item)
+        try:
+            cp_packer._update_corner_points(new_item)
+        finally:
+            cp_packer.bins[0].items.pop()
+
+    return {
+        '_check_intersection_orientation': intersection_scan,
+        '_check_support_orientation': support_check,
+        '_calculate_overlap_area_orientation': overlap_scan,
+        '_get_item_orientations': orientations,
+        '_point_inside_any_item': point_inside,
+        '_update_extreme_points': update_extreme_points,
+        '_update_corner_points': update_corner_points,
+        'collides[geometric]': collides_geometric,
+        'collides[voxel]': collides_voxel,
+        'place[voxel]': place_voxel
+    }
+
+
+def time_callable(func, rounds=5, min_time=0.05, max_calls=100000):
+    """Замер времени одного вызова: подбор числа вызовов и несколько раундов"""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= max_calls:
+            break
+        calls = min(max_calls, calls * 10 if elapsed < min_time / 10 else calls * 2)
+
+    samples = [elapsed / calls]
+    if elapsed >= SLOW_ROUND_TIME:
+        rounds = 1
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        samples.append((time.perf_counter() - start) / calls)
+
+    return {
+        'calls_per_round': calls,
+        'rounds': rounds,
+        'min_us': round(min(samples) * 1e6, 3),
+        'median_us': round(statistics.median(samples) * 1e6, 3),
+        'mean_us': round(statistics.mean(samples) * 1e6, 3),
+        'stdev_us': round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0
+    }
+
+
+def run_benchmarks(sizes=None, seed=DEFAULT_SEED, rounds=5, min_time=0.05, only=None, full=False):
+    """Прогнать все примитивы на всех размерах состояния"""
+    sizes = sizes or DEFAULT_SIZES
+    results = {}
+    memory = {}
+
+    for n_items in sizes:
+        for name, func in make_cases(n_items, seed, memory).items():
+            if only and name not in only:
+                continue
+            if not full and n_items > SIZE_LIMITS.get(name, n_items):
+                continue
+            key = f'{name}@{n_items}'
+            results[key] = time_callable(func, rounds=rounds, min_time=min_time)
+            print(f"{key:<50} {results[key]['median_us']:>14.2f} us", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'sizes': sizes,
+            'rounds': rounds,
+            'size_limits': {} if full else SIZE_LIMITS,
+            'voxel_resolution': VOXEL_RESOLUTION
+        },
+        'results': results,
+        # Байты на структуры проверки пересечений: точная - список предметов, воксельная - сетка
+        'collision_memory': memory
+    }
+
+
+def compare_results(baseline, current, threshold=0.15, metric='median_us'):
+    """Сравнить два прогона; регрессия - рост метрики больше чем на threshold"""
+    rows = []
+    for key, base in sorted(baseline['results'].items()):
+        if key not in current['results']:
+            continue
+        before = base[metric]
+        after = current['results'][key][metric]
+        ratio = after / before if before > 0 else float('inf')
+        rows.append({
+            'case': key,
+            'baseline': before,
+            'current': after,
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold
+        })
+    return rows
+
+
+def format_comparison(rows, metric='median_us'):
+    """Текстовая таблица сравнения"""
+    lines = [f"{'case':<50} {'baseline':>14} {'current':>14} {'ratio':>8}"]
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        lines.append(
+            f"{row['case']:<50} {row['baseline']:>14.2f} {row['current']:>14.2f} {row['ratio']:>8.3f}{flag}"
+        )
+    lines.append(f"metric: {metric}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Микро-бенчмарки примитивов упаковки')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Выполнить замеры')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    run_parser.add_argument('--rounds', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.05,
+                            help='Минимальная длительность одного раунда, с')
+    run_parser.add_argument('--only', nargs='+', help='Замерять только указанные примитивы')
+    run_parser.add_argument('--full', action='store_true',
+                            help='Не ограничивать размер состояния для медленных примитивов')
+    run_parser.add_argument('--output', help='Файл для JSON с результатами (по умолчанию stdout)')
+
+    compare_parser = subparsers.add_parser('compare', help='Сравнить с сохраненным базовым прогоном')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help='Допустимый относительный рост времени (0.15 = 15%%)')
+    compare_parser.add_argument('--metric', default='median_us', choices=['min_us', 'median_us', 'mean_us'])
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_benchmarks(args.sizes, args.seed, args.rounds, args.min_time, args.only, args.full)
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        else:
+            print(payload)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    rows = compare_results(baseline, current, args.threshold, args.metric)
+    print(format_comparison(rows, args.metric))
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,29 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response, File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import uuid
 import asyncio
+import time
 from datetime import datetime
+import pandas as pd
 
 from src.utils.constants import STANDARD_BOXES, PackingMethod
-from src.packers.weight_aware import WeightAwarePacker
-from src.packers.extreme_points import ExtremePointPacker
-from src.packers.laff import LAFFPacker
-from src.packers.corner_points import CornerPointPacker
-from src.packers.sfc import SFCPacker
+from src.packers.factory import create_packer
+from src.packers.item_types import BoxTypeTable
+from src.packers.units import CoordinateScale
+from src.packers.bounds import preflight
+from src.packers.preselection import PRESELECT_MODES
+from src.packers.lns import improve_packing
+from src.packers.beam_search import BEAM_WIDTH
 from src.validation.validators import DataValidator
-from py3dbp import Bin, Item
+from src.utils.file_handlers import load_boxes_with_validation
+from src.utils.exporters import EXPORT_FORMATS, ExportCache, ExportSource, export_bytes
+from src.utils.layer_plans import LAYER_PLAN_FORMATS, LayerPlans, layer_plan_bytes
+from src.api.metrics import PackingMetrics
+from src.api.profiling import SORT_KEYS, ProfileStore, run_profiled, summarize_profile
+from py3dbp import Bin
 
 app = FastAPI(
     title="3D Bin Packing API",
@@ -30,6 +40,27 @@ app.add_middleware(
 )  # Добавьте закрывающую скобку
 
 tasks_storage = {}
+metrics = PackingMetrics(tasks_storage)
+# Файлы экспорта результатов создаются при первом запросе и переиспользуются
+export_cache = ExportCache(on_lookup=lambda hit: metrics.record_cache('export', hit))
+layer_plan_cache = ExportCache(on_lookup=lambda hit: metrics.record_cache('layers', hit))
+# Слои задач (LayerPlans) для планов: разбиение на слои и SVG считаются один раз на задачу
+layer_plans_storage: Dict[str, LayerPlans] = {}
+profile_store = ProfileStore()
+
+@app.middleware("http")
+async def collect_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Шаблон маршрута вместо фактического пути, чтобы task_id не попадал в метки
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        metrics.observe_request(request.method, endpoint, status_code, time.perf_counter() - start)
 
 # Встроенный класс для API (без Streamlit зависимостей)
 class APIErrorHandler:
@@ -56,6 +87,7 @@ class BoxData(BaseModel):
     quantity: int = 1
     fragile: bool = False
     stackable: bool = True
+    priority: float = 1.0
 
 class PalletData(BaseModel):
     length: float
@@ -69,6 +101,12 @@ class PackingRequest(BaseModel):
     method: str = "Weight-Aware (стабильная укладка с учетом веса)"
     support_threshold: float = 0.8
     weight_check_enabled: bool = True
+    # Предварительный выбор коробок, если заказ тяжелее или больше поддона: None, 'volume' или 'priority'
+    preselect: Optional[str] = None
+    # Время улучшения упаковки поиском в большой окрестности, с (0 - без улучшения)
+    improve_time: float = 0.0
+    # Ширина луча для метода Beam Search: больше - плотнее, но дольше
+    beam_width: int = BEAM_WIDTH
 
 class PackingResult(BaseModel):
     task_id: str
@@ -88,7 +126,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", **metrics.summary()}
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.registry.CONTENT_TYPE)
 
 @app.get("/methods")
 async def get_packing_methods():
@@ -100,105 +142,210 @@ async def get_packing_methods():
 async def get_standard_boxes():
     return {"standard_boxes": STANDARD_BOXES}
 
+def validate_packing_request(request: PackingRequest, boxes_validation=None):
+    """Валидация поддона и коробок запроса, HTTP 400 при ошибках
+    (boxes_validation - готовый результат проверки коробок, например, из загруженного файла)"""
+    validator = DataValidator()
+    error_handler = APIErrorHandler()
+    
+    pallet_validation = validator.validate_pallet_data(request.pallet.dict())
+    if not pallet_validation.is_valid:
+        validation_errors = error_handler.format_validation_errors(pallet_validation)
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Ошибки в данных поддона: {validation_errors}"
+        )
+    
+    if boxes_validation is None:
+        boxes_data = [box.dict() for box in request.boxes]
+        boxes_validation = validator.validate_boxes_list(boxes_data)
+    if not boxes_validation.is_valid:
+        validation_errors = error_handler.format_validation_errors(boxes_validation)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ошибки в данных коробок: {validation_errors}"
+        )
+    
+    if request.preselect is not None and request.preselect not in PRESELECT_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестный режим preselect: {request.preselect}. Доступны: {', '.join(PRESELECT_MODES)}"
+        )
+    
+    if request.improve_time < 0:
+        raise HTTPException(status_code=400, detail="improve_time не может быть отрицательным")
+    
+    if request.beam_width < 1:
+        raise HTTPException(status_code=400, detail="beam_width должна быть не меньше 1")
+
+def start_packing_task(request: PackingRequest, background_tasks: BackgroundTasks) -> PackingResult:
+    """Зарегистрировать задачу и запустить упаковку в фоне"""
+    task_id = str(uuid.uuid4())
+    task = PackingResult(
+        task_id=task_id,
+        status="pending",
+        created_at=datetime.now()
+    )
+    
+    tasks_storage[task_id] = task
+    background_tasks.add_task(perform_packing, task_id, request)
+    return task
+
 @app.post("/pack", response_model=PackingResult)
 async def create_packing_task(request: PackingRequest, background_tasks: BackgroundTasks):
     try:
         # Валидация данных
-        validator = DataValidator()
-        error_handler = APIErrorHandler()
-        
-        pallet_validation = validator.validate_pallet_data(request.pallet.dict())
-        if not pallet_validation.is_valid:
-            validation_errors = error_handler.format_validation_errors(pallet_validation)
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Ошибки в данных поддона: {validation_errors}"
-            )
-        
-        boxes_data = [box.dict() for box in request.boxes]
-        boxes_validation = validator.validate_boxes_list(boxes_data)
-        if not boxes_validation.is_valid:
-            validation_errors = error_handler.format_validation_errors(boxes_validation)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Ошибки в данных коробок: {validation_errors}"
-            )
-        
-        task_id = str(uuid.uuid4())
-        task = PackingResult(
-            task_id=task_id,
-            status="pending",
-            created_at=datetime.now()
-        )
-        
-        tasks_storage[task_id] = task
-        background_tasks.add_task(perform_packing, task_id, request)
-        
-        return task
+        validate_packing_request(request)
+        return start_packing_task(request, background_tasks)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка сервера: {str(e)}")
 
+def boxes_from_manifest(frame: pd.DataFrame) -> List[BoxData]:
+    """Коробки из таблицы загруженного файла (строки уже сложены по типам)"""
+    fields = [column for column in frame.columns if column in BoxData.__fields__]
+    return [
+        BoxData(**{field: value for field, value in zip(fields, row) if not pd.isna(value)})
+        for row in frame[fields].itertuples(index=False, name=None)
+    ]
+
+@app.post("/pack/upload", response_model=PackingResult)
+async def create_packing_task_from_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV, Excel, Parquet или Arrow: name,length,width,height,weight,quantity"),
+    pallet_length: float = Form(...),
+    pallet_width: float = Form(...),
+    pallet_height: float = Form(...),
+    pallet_max_weight: float = Form(...),
+    method: Optional[str] = Form(None),
+    support_threshold: Optional[float] = Form(None),
+    weight_check_enabled: Optional[bool] = Form(None),
+    preselect: Optional[str] = Form(None),
+    improve_time: Optional[float] = Form(None),
+    beam_width: Optional[int] = Form(None)
+):
+    """Упаковка коробок из загруженного файла: файл читается потоково и проверяется
+    теми же функциями, что и в приложении, без промежуточного JSON"""
+    try:
+        boxes_frame, boxes_validation = await run_in_threadpool(
+            load_boxes_with_validation, file.file, filename=file.filename
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Параметры, не переданные в форме, берутся по умолчанию из PackingRequest
+    options = {
+        "method": method, "support_threshold": support_threshold,
+        "weight_check_enabled": weight_check_enabled, "preselect": preselect,
+        "improve_time": improve_time, "beam_width": beam_width
+    }
+    request = PackingRequest(
+        pallet=PalletData(length=pallet_length, width=pallet_width, height=pallet_height, max_weight=pallet_max_weight),
+        boxes=[],
+        **{name: value for name, value in options.items() if value is not None}
+    )
+    validate_packing_request(request, boxes_validation)
+    request.boxes = boxes_from_manifest(boxes_frame)
+    return start_packing_task(request, background_tasks)
+
+@app.post("/preflight")
+async def preflight_packing(request: PackingRequest):
+    """Быстрые оценки без упаковки: число поддонов, коробки, которые заведомо не поместятся"""
+    validate_packing_request(request)
+    
+    pallet = request.pallet
+    boxes = [
+        (box.name, box.length, box.width, box.height, box.weight, box.quantity)
+        for box in request.boxes
+    ]
+    return preflight(boxes, (pallet.length, pallet.width, pallet.height), pallet.max_weight)
+
+def method_label(method: str) -> str:
+    """Имя PackingMethod для меток метрик (неизвестный метод - Weight-Aware, как в create_packer)"""
+    try:
+        return PackingMethod(method).name
+    except ValueError:
+        return PackingMethod.WEIGHT_AWARE.name
+
+def execute_packing(request: PackingRequest):
+    """Создать packer, выполнить упаковку и сформировать результат"""
+    # Создание packer'а
+    packer = create_packer(
+        request.method, request.support_threshold, request.weight_check_enabled, beam_width=request.beam_width
+    )
+        
+    # Размеры переводятся в целые внутренние единицы (10^-k см) и обратно после упаковки
+    pallet = request.pallet
+    scale = CoordinateScale.for_values(
+        [pallet.length, pallet.width, pallet.height] +
+        [value for box in request.boxes for value in (box.length, box.width, box.height)]
+    )
+    packer.scale = scale
+    packer.preselect = request.preselect
+    pallet_dimensions = tuple(
+        scale.to_internal(value, round_up=False) for value in (pallet.length, pallet.width, pallet.height)
+    )
+    packer.add_bin(Bin('Поддон', *pallet_dimensions, float(pallet.max_weight)))
+    
+    # Добавление коробок: один тип на каждое сочетание размеров, веса и флагов
+    item_types = BoxTypeTable(pallet_dimensions)
+    item_count = 0
+    for box in request.boxes:
+        item_types.add_boxes(
+            packer,
+            box.name,
+            scale.to_internal(box.length),
+            scale.to_internal(box.width),
+            scale.to_internal(box.height),
+            float(box.weight),
+            box.quantity,
+            fragile=box.fragile,
+            stackable=box.stackable,
+            priority=box.priority
+        )
+        item_count += box.quantity
+    
+    # Выполнение упаковки
+    packer.pack()
+    if request.improve_time > 0:
+        improve_packing(packer, request.improve_time)
+    scale.restore(packer)
+    
+    # Формирование результата
+    return packer, format_packing_result(packer, item_count, request)
+
 async def perform_packing(task_id: str, request: PackingRequest):
+    started = time.perf_counter()
     try:
         tasks_storage[task_id].status = "processing"
         
-        # Создание packer'а
-        packer = create_packer(request.method, request.support_threshold, request.weight_check_enabled)
-        
-        # Добавление поддона - ИСПРАВЛЕНИЕ: приводим к int
-        pallet = request.pallet
-        packer.add_bin(Bin(
-            'Поддон', 
-            int(pallet.length), 
-            int(pallet.width), 
-            int(pallet.height), 
-            float(pallet.max_weight)
-        ))
-        
-        # Добавление коробок
-        item_count = 0
-        for box in request.boxes:
-            for i in range(box.quantity):
-                item_count += 1
-                packer.add_item(Item(
-                    f'{box.name}_{i}',
-                    float(box.length),
-                    float(box.width),
-                    float(box.height),
-                    float(box.weight)
-                ))
-        
-        # Выполнение упаковки
-        packer.pack()
-        
-        # Формирование результата
-        result = format_packing_result(packer, item_count, request)
+        if profile_store.auto_enabled:
+            # Профиль сохраняется, только если задача оказалась медленной
+            (packer, result), profiler = run_profiled(execute_packing, request)
+            duration = time.perf_counter() - started
+            if duration >= profile_store.slow_task_threshold:
+                profile_store.add(
+                    summarize_profile(profiler), "slow_task", duration,
+                    method=method_label(request.method), task_id=task_id
+                )
+        else:
+            packer, result = execute_packing(request)
         
         tasks_storage[task_id].status = "completed"
         tasks_storage[task_id].result = result
         tasks_storage[task_id].completed_at = datetime.now()
+        metrics.observe_packing(
+            method_label(request.method), "completed", time.perf_counter() - started,
+            packed_items=len(packer.bins[0].items), calculation_time=packer.calculation_time
+        )
         
     except Exception as e:
         tasks_storage[task_id].status = "failed"
         tasks_storage[task_id].error = str(e)
         tasks_storage[task_id].completed_at = datetime.now()
-
-def create_packer(method: str, support_threshold: float, weight_check_enabled: bool):
-    if method == PackingMethod.WEIGHT_AWARE.value:
-        return WeightAwarePacker(support_threshold, weight_check_enabled)
-    elif method == PackingMethod.EXTREME_POINTS.value:
-        return ExtremePointPacker()
-    elif method == PackingMethod.LAFF.value:
-        return LAFFPacker()
-    elif method == PackingMethod.CORNER_POINTS.value:
-        return CornerPointPacker()
-    elif method == PackingMethod.SFC.value:
-        return SFCPacker()
-    else:
-        return WeightAwarePacker(support_threshold, weight_check_enabled)
+        metrics.observe_packing(method_label(request.method), "failed", time.perf_counter() - started)
 
 def format_packing_result(packer, item_count: int, request: PackingRequest) -> Dict[str, Any]:
     packed_items = len(packer.bins[0].items)
@@ -229,6 +376,11 @@ def format_packing_result(packer, item_count: int, request: PackingRequest) -> D
             "total_weight": round(total_weight, 2),
             "packed_weight": round(packed_weight, 2)
         },
+        "pallet": {
+            "width": float(packer.bins[0].width),
+            "height": float(packer.bins[0].height),
+            "depth": float(packer.bins[0].depth)
+        },
         "packed_items": [
             {
                 "name": item.name,
@@ -248,6 +400,38 @@ def format_packing_result(packer, item_count: int, request: PackingRequest) -> D
         ]
     }
 
+@app.post("/debug/profile")
+async def profile_packing(request: PackingRequest, limit: int = 30, sort: str = "cumulative"):
+    """Выполнить упаковку под cProfile (в пуле потоков) и вернуть горячие функции"""
+    validate_packing_request(request)
+    if sort not in SORT_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестный ключ сортировки: {sort}. Доступны: {', '.join(SORT_KEYS)}"
+        )
+    
+    started = time.perf_counter()
+    (packer, result), profiler = await run_in_threadpool(run_profiled, execute_packing, request)
+    duration = time.perf_counter() - started
+    
+    summary = summarize_profile(profiler, limit=limit, sort=sort)
+    entry = profile_store.add(summary, "manual", duration, method=method_label(request.method))
+    return {**entry, "packing_summary": result["summary"]}
+
+@app.get("/debug/profiles")
+async def list_profiles():
+    return {
+        "slow_task_threshold": profile_store.slow_task_threshold,
+        "profiles": profile_store.list()
+    }
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    return entry
+
 @app.get("/status/{task_id}")
 async def get_task_status(task_id: str):
     if task_id not in tasks_storage:
@@ -277,12 +461,93 @@ async def get_task_result(task_id: str):
     
     return task.result
 
+@app.get("/result/{task_id}/export")
+async def export_task_result(task_id: str, format: str = "csv"):
+    """Результат задачи файлом: csv, jsonl, parquet или xlsx"""
+    if task_id not in tasks_storage:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    task = tasks_storage[task_id]
+    
+    if task.status == "pending" or task.status == "processing":
+        raise HTTPException(status_code=202, detail="Задача еще выполняется")
+    
+    if task.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Задача завершилась с ошибкой: {task.error}")
+    
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестный формат экспорта: {format}. Доступны: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    try:
+        data = await run_in_threadpool(
+            export_cache.get_or_create, task_id, format,
+            lambda: export_bytes(ExportSource.from_result(task.result), format)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="packing_{task_id}.{extension}"'}
+    )
+
+def task_layer_plans_of(task_id: str, task: PackingResult) -> LayerPlans:
+    """LayerPlans задачи: строятся при первом запросе плана"""
+    plans = layer_plans_storage.get(task_id)
+    if plans is None:
+        plans = layer_plans_storage.setdefault(task_id, LayerPlans.from_result(task.result))
+    return plans
+
+@app.get("/result/{task_id}/layers")
+async def task_layer_plans(task_id: str, format: str = "html", layer: Optional[int] = None):
+    """Планы слоев (вид сверху): html - все слои для печати, svg - слой layer (с 1)"""
+    if task_id not in tasks_storage:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    task = tasks_storage[task_id]
+    
+    if task.status == "pending" or task.status == "processing":
+        raise HTTPException(status_code=202, detail="Задача еще выполняется")
+    
+    if task.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Задача завершилась с ошибкой: {task.error}")
+    
+    if format not in LAYER_PLAN_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестный формат плана: {format}. Доступны: {', '.join(LAYER_PLAN_FORMATS)}"
+        )
+    
+    try:
+        data = await run_in_threadpool(
+            layer_plan_cache.get_or_create, task_id, format if format == 'html' else f"{format}:{layer}",
+            lambda: layer_plan_bytes(task_layer_plans_of(task_id, task), format, layer)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = LAYER_PLAN_FORMATS[format]
+    suffix = f"_layer{layer}" if format == 'svg' else ""
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'inline; filename="layers_{task_id}{suffix}.{extension}"'}
+    )
+
 @app.delete("/task/{task_id}")
 async def delete_task(task_id: str):
     if task_id not in tasks_storage:
         raise HTTPException(status_code=404, detail="Задача не найдена")
     
     del tasks_storage[task_id]
+    export_cache.discard(task_id)
+    layer_plan_cache.discard(task_id)
+    layer_plans_storage.pop(task_id, None)
     return {"message": "Задача удалена"}
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+# src/api/metrics.py
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Границы гистограмм, секунды
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PACKING_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape_label_value(value)}"' for name, value in extra.items())
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Базовая метрика с набором меток"""
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, получено {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def _render_samples(self) -> List[str]:
+        values = self.samples()
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Значение, выставляемое напрямую или вычисляемое при чтении метрик"""
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels) -> float:
+        return self._collect().get(self._key(labels), 0.0)
+
+    def _collect(self) -> Dict[LabelValues, float]:
+        if self._callback is not None:
+            return self._callback()
+        with self._lock:
+            return dict(self._values)
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self._collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = REQUEST_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # Для каждого набора меток: счетчики по корзинам (не накопительные), сумма, количество
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def get_count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()}
+
+        lines = []
+        for key, (bucket_counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, {'le': _format_value(bound)})
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик с выводом в текстовом формате Prometheus"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              callback: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = REQUEST_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class PackingMetrics:
+    """Метрики сервиса упаковки"""
+
+    def __init__(self, tasks_storage: Dict):
+        self.tasks_storage = tasks_storage
+        self.registry = MetricsRegistry()
+        registry = self.registry
+
+        self.requests_total = registry.counter(
+            'packing_api_requests_total', 'Количество HTTP запросов', ('method', 'endpoint', 'status')
+        )
+        self.request_latency = registry.histogram(
+            'packing_api_request_duration_seconds', 'Длительность обработки HTTP запросов',
+            ('method', 'endpoint'), REQUEST_LATENCY_BUCKETS
+        )
+        self.packing_duration = registry.histogram(
+            'packing_task_duration_seconds', 'Длительность выполнения задач упаковки',
+            ('packing_method', 'status'), PACKING_DURATION_BUCKETS
+        )
+        self.tasks_total = registry.counter(
+            'packing_tasks_total', 'Количество завершенных задач упаковки', ('packing_method', 'status')
+        )
+        self.items_packed_total = registry.counter(
+            'packing_items_packed_total', 'Количество упакованных коробок', ('packing_method',)
+        )
+        self.items_per_second = registry.gauge(
+            'packing_items_per_second', 'Скорость упаковки последней завершенной задачи, коробок/с',
+            ('packing_method',)
+        )
+        self.queue_depth = registry.gauge(
+            'packing_queue_depth', 'Задачи в ожидании или в работе', callback=self._queue_depth
+        )
+        self.task_store_size = registry.gauge(
+            'packing_task_store_size', 'Количество задач в хранилище', callback=self._task_store_size
+        )
+        self.cache_hits = registry.counter(
+            'packing_cache_hits_total', 'Попадания в кэш', ('cache',)
+        )
+        self.cache_misses = registry.counter(
+            'packing_cache_misses_total', 'Промахи кэша', ('cache',)
+        )
+        self.cache_hit_ratio = registry.gauge(
+            'packing_cache_hit_ratio', 'Доля попаданий в кэш', ('cache',), callback=self._cache_hit_ratio
+        )
+        self.uptime = registry.gauge(
+            'packing_api_uptime_seconds', 'Время работы сервиса',
+            callback=lambda: {(): time.time() - registry.started_at}
+        )
+
+    def _queue_depth(self) -> Dict[LabelValues, float]:
+        tasks = list(self.tasks_storage.values())
+        return {(): sum(1 for task in tasks if task.status in ('pending', 'processing'))}
+
+    def _task_store_size(self) -> Dict[LabelValues, float]:
+        return {(): len(self.tasks_storage)}
+
+    def _cache_hit_ratio(self) -> Dict[LabelValues, float]:
+        ratios = {}
+        hits_by_cache = self.cache_hits.samples()
+        misses_by_cache = self.cache_misses.samples()
+        for key in set(hits_by_cache) | set(misses_by_cache):
+            hits = hits_by_cache.get(key, 0.0)
+            misses = misses_by_cache.get(key, 0.0)
+            ratios[key] = hits / (hits + misses) if hits + misses > 0 else 0.0
+        return ratios
+
+    def observe_request(self, method: str, endpoint: str, status: int, duration: float):
+        self.requests_total.inc(method=method, endpoint=endpoint, status=str(status))
+        self.request_latency.observe(duration, method=method, endpoint=endpoint)
+
+    def observe_packing(self, packing_method: str, status: str, duration: float,
+                        packed_items: int = 0, calculation_time: float = 0.0):
+        self.packing_duration.observe(duration, packing_method=packing_method, status=status)
+        self.tasks_total.inc(packing_method=packing_method, status=status)
+        if status == 'completed':
+            self.items_packed_total.inc(packed_items, packing_method=packing_method)
+            self.items_per_second.set(
+                packed_items / max(calculation_time, 0.001), packing_method=packing_method
+            )
+
+    def record_cache(self, cache: str, hit: bool):
+        if hit:
+            self.cache_hits.inc(cache=cache)
+        else:
+            self.cache_misses.inc(cache=cache)
+
+    def summary(self) -> Dict[str, float]:
+        """Краткая сводка для /health"""
+        return {
+            'uptime_seconds': round(time.time() - self.registry.started_at, 1),
+            'queue_depth': self._queue_depth()[()],
+            'task_store_size': self._task_store_size()[()]
+        }
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,123 @@
+# src/api/profiling.py
+
+import cProfile
+import os
+import pstats
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Модули, функции которых попадают в отчет профилировщика
+PROFILE_SCOPES = ('src/packers', 'src/validation', 'src/api')
+
+# Автоматическое профилирование задач дольше порога (0 - выключено)
+SLOW_TASK_THRESHOLD = float(os.environ.get('PACKING_PROFILE_SLOW_SECONDS', '0'))
+# Сколько последних профилей хранить
+PROFILE_KEEP = int(os.environ.get('PACKING_PROFILE_KEEP', '20'))
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+
+def _in_scopes(filename: str, scopes: Iterable[str]) -> bool:
+    normalized = filename.replace('\\', '/')
+    return any(f'/{scope}/' in normalized or normalized.startswith(f'{scope}/') for scope in scopes)
+
+
+def _short_path(filename: str, scopes: Iterable[str]) -> str:
+    normalized = filename.replace('\\', '/')
+    for scope in scopes:
+        index = normalized.find(scope + '/')
+        if index >= 0:
+            return normalized[index:]
+    return normalized
+
+
+def summarize_profile(profiler: cProfile.Profile, limit: int = 30, sort: str = 'cumulative',
+                      scopes: Iterable[str] = PROFILE_SCOPES) -> Dict[str, Any]:
+    """Агрегированные горячие функции профиля, только из указанных модулей"""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Неизвестный ключ сортировки: {sort}. Доступны: {', '.join(SORT_KEYS)}")
+
+    stats = pstats.Stats(profiler)
+    functions = []
+    for (filename, lineno, funcname), (primitive_calls, calls, tottime, cumtime, _) in stats.stats.items():
+        if not _in_scopes(filename, scopes):
+            continue
+        functions.append({
+            'function': f'{_short_path(filename, scopes)}:{lineno}({funcname})',
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'tottime': round(tottime, 6),
+            'cumulative': round(cumtime, 6),
+            'per_call_us': round(tottime / calls * 1e6, 3) if calls else 0.0
+        })
+
+    sort_field = {'cumulative': 'cumulative', 'tottime': 'tottime', 'calls': 'calls'}[sort]
+    functions.sort(key=lambda entry: entry[sort_field], reverse=True)
+
+    return {
+        'total_time': round(stats.total_tt, 6),
+        'total_calls': stats.total_calls,
+        'sort': sort,
+        'functions': functions[:limit]
+    }
+
+
+def run_profiled(func: Callable, *args, **kwargs) -> Tuple[Any, cProfile.Profile]:
+    """Выполнить функцию под cProfile"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    return result, profiler
+
+
+class ProfileStore:
+    """Кольцевой буфер последних профилей"""
+
+    def __init__(self, keep: int = PROFILE_KEEP, slow_task_threshold: float = SLOW_TASK_THRESHOLD):
+        self.slow_task_threshold = slow_task_threshold
+        self._profiles = deque(maxlen=max(1, keep))
+        self._lock = threading.Lock()
+
+    @property
+    def auto_enabled(self) -> bool:
+        return self.slow_task_threshold > 0
+
+    def add(self, summary: Dict[str, Any], reason: str, duration: float,
+            method: Optional[str] = None, task_id: Optional[str] = None) -> Dict[str, Any]:
+        entry = {
+            'profile_id': str(uuid.uuid4()),
+            'captured_at': datetime.now().isoformat(timespec='seconds'),
+            'reason': reason,
+            'task_id': task_id,
+            'method': method,
+            'duration': round(duration, 4),
+            **summary
+        }
+        with self._lock:
+            self._profiles.append(entry)
+        return entry
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: entry[key] for key in ('profile_id', 'captured_at', 'reason', 'task_id', 'method', 'duration')}
+            for entry in reversed(profiles)
+        ]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for entry in self._profiles:
+                if entry['profile_id'] == profile_id:
+                    return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
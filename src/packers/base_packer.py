@@ -2,11 +2,25 @@
 
 from py3dbp import Packer
 import time
+import random
+import itertools
 from abc import ABC, abstractmethod
 import psutil
 import os
 
+from .trace import TraceRecorder
+from .item_types import build_orientations
+from .ems import EmptySpaces
+from .collision import GeometricCollision, create_collision_backend
+from .units import CoordinateScale
+from .preselection import select_items
+
 class BasePacker(Packer, ABC):
+    # Соблюдает ли метод грузоподъемность поддона (тогда перевес - повод не искать позицию)
+    limits_weight = False
+    # Минимальная доля основания на опоре для правил метода (_supports_item)
+    support_threshold = 0.5
+
     def __init__(self):
         super().__init__()
         self.unpacked_items = []
@@ -14,6 +28,46 @@ class BasePacker(Packer, ABC):
         self.calculation_time = 0
         self.allow_rotation = True
         
+        # Seed генератора случайных чисел (None - случайный) и путь для трассы упаковки
+        self.seed = None
+        self.trace_path = None
+        self._rng = random.Random()
+        self._trace = None
+        
+        # Память отказов: тип предмета -> версия состояния поддона, при которой он не поместился
+        self.use_failure_memo = True
+        self._placement_version = 0
+        self._failure_memo = {}
+        # Ориентации обычных py3dbp.Item по размерам (у PackItem они хранятся в BoxType)
+        self._orientation_cache = {}
+        
+        # Пустые максимальные пространства: пропуск безнадежных предметов и,
+        # по желанию, углы пространств как дополнительные кандидаты
+        self.use_ems = True
+        self.ems_candidates = False
+        self._ems = None
+        
+        # Остаток емкости поддона: предмет больше свободного объема или сверх грузоподъемности
+        # отклоняется без поиска позиции
+        self.use_bounds = True
+        self._free_volume = 0
+        self._placed_weight = 0
+        self._max_weight = 0
+        
+        # Предварительный выбор коробок (рюкзак по весу и объему): None, 'volume' или 'priority';
+        # остальные коробки сразу попадают в неупакованные
+        self.preselect = None
+        self.preselect_fill_ratio = 1.0
+        self._selected_items = []
+        
+        # Масштаб целочисленных координат (см. units.py); константы алгоритмов заданы в см
+        self.scale = CoordinateScale()
+        
+        # Проверка пересечений: 'geometric' (точная) или 'voxel' (битовая сетка с шагом voxel_resolution, см)
+        self.collision_backend = 'geometric'
+        self.voxel_resolution = 1
+        self._collision = None
+        
         # Расширенная аналитика
         self.analytics = {
             'placement_attempts': 0,
@@ -29,7 +83,8 @@ class BasePacker(Packer, ABC):
             'placement_timeline': [],
             'rejection_reasons': {},
             'orientation_preferences': {},
-            'density_analysis': {}
+            'density_analysis': {},
+            'failure_memo_hits': 0
         }
 
     @abstractmethod
@@ -37,22 +92,161 @@ class BasePacker(Packer, ABC):
         """Основной метод упаковки - должен быть реализован в наследниках"""
         pass
 
+    def enable_trace(self, path):
+        """Записывать трассу упаковки в файл при следующем вызове pack()"""
+        self.trace_path = path
+
+    def _items_to_pack(self):
+        """Предметы, которые упаковщик пытается разместить (после предварительного выбора)"""
+        return self._selected_items
+
+    def _record_order(self, items):
+        """Записать порядок обработки предметов в трассу"""
+        if self._trace is not None:
+            self._trace.record_order(items)
+
+    def _place_item(self, item, x, y, z, width, height, depth, candidates=0):
+        """Разместить предмет в выбранной ориентации"""
+        item.width, item.height, item.depth = width, height, depth
+        item.position = [x, y, z]
+        self.bins[0].items.append(item)
+        # Новая версия состояния: запомненные отказы устаревают, пока их не подтвердит _retain_failures
+        self._placement_version += 1
+        self._free_volume -= width * height * depth
+        self._placed_weight += item.weight
+        if self._ems is not None:
+            self._ems.place(x, y, z, width, height, depth)
+        if self._collision is not None:
+            self._collision.add(x, y, z, width, height, depth)
+        if self._trace is not None:
+            self._trace.record_placement(item, x, y, z, width, height, depth, candidates)
+
+    def _reject_item(self, item, candidates=0):
+        """Отметить предмет как неупакованный"""
+        self.unpacked_items.append(item)
+        self.packing_issues.append(f"Не удалось разместить {item.name}")
+        self._remember_failure(item)
+        if self._trace is not None:
+            self._trace.record_rejection(item, candidates)
+
+    def _item_type_key(self, item):
+        """Ключ типа предмета: размеры, вес и флаги"""
+        return (
+            item.width, item.height, item.depth, item.weight,
+            getattr(item, 'fragile', False), getattr(item, 'stackable', True)
+        )
+
+    def _is_known_failure(self, item):
+        """Предмет заведомо не поместится: ни одна ориентация не входит в поддон,
+        такой же тип не поместился и с тех пор состояние не изменилось,
+        предмет больше свободного объема или тяжелее остатка грузоподъемности,
+        или нет пустого пространства, вмещающего предмет"""
+        box_type = getattr(item, 'box_type', None)
+        if self.allow_rotation and box_type is not None and not box_type.fitting:
+            self._record_rejection_reason(item, 0, 0, 0, "does_not_fit_pallet")
+            return True
+        if self.use_failure_memo and self._failure_memo.get(self._item_type_key(item)) == self._placement_version:
+            self.analytics['failure_memo_hits'] += 1
+            return True
+        if self.use_bounds:
+            if item.width * item.height * item.depth > self._free_volume:
+                self._record_rejection_reason(item, 0, 0, 0, "exceeds_free_volume")
+                return True
+            if self.limits_weight and self._placed_weight + item.weight > self._max_weight:
+                self._record_rejection_reason(item, 0, 0, 0, "exceeds_weight_limit")
+                return True
+        if self._ems is not None and not self._ems.fits(item.width, item.height, item.depth, self.allow_rotation):
+            self._record_rejection_reason(item, 0, 0, 0, "no_empty_space")
+            return True
+        return False
+
+    def _seed_candidates(self, points, item):
+        """Добавить к точкам-кандидатам углы пустых пространств, вмещающих предмет"""
+        if not self.ems_candidates or self._ems is None:
+            return points
+        corners = self._ems.corner_points(item.width, item.height, item.depth, self.allow_rotation)
+        return list(dict.fromkeys(points + corners))
+
+    def _remember_failure(self, item):
+        if self.use_failure_memo:
+            self._failure_memo[self._item_type_key(item)] = self._placement_version
+
+    def _invalidate_failures(self):
+        """Сбросить все запомненные отказы (состояние изменилось без размещения)"""
+        self._placement_version += 1
+
+    def _retain_failures(self, placed_item, new_points):
+        """Перенести на новую версию отказы, которым не помогают новые точки-кандидаты"""
+        previous_version = self._placement_version - 1
+        for key, version in self._failure_memo.items():
+            if version == previous_version and not self._new_points_may_fit(key, placed_item, new_points):
+                self._failure_memo[key] = self._placement_version
+
+    def _top_surface_points(self, item):
+        """Углы верхней грани предмета - новые кандидаты для методов с сеткой позиций"""
+        x, y, z = item.position
+        top = z + item.depth
+        return [
+            (x, y, top),
+            (x + item.width, y, top),
+            (x, y + item.height, top),
+            (x + item.width, y + item.height, top)
+        ]
+
+    def _new_points_may_fit(self, key, placed_item, new_points):
+        """Может ли тип предмета поместиться в одной из новых точек или на верхней грани
+        размещенного предмета. Остальные точки-кандидаты размещение не расширяет: опору
+        оно дает только на уровне своей верхней грани, а свободное место только отнимает"""
+        bin_width, bin_height, bin_depth = self.bins[0].width, self.bins[0].height, self.bins[0].depth
+        px, py, pz = placed_item.position
+        top = pz + placed_item.depth
+        # Соседи на уровне верхней грани: вместе с ней дают опору основанию, задевающему грань
+        level = [other for other in self.bins[0].items
+                 if other is not placed_item and other.position[2] + other.depth == top]
+        width, height, depth = key[:3]
+        orientations = [(width, height, depth)]
+        if self.allow_rotation:
+            orientations = set(itertools.permutations((width, height, depth)))
+
+        for w, h, d in orientations:
+            if w > bin_width or h > bin_height:
+                continue
+            required = w * h * self.support_threshold
+            # Старые точки на верхней грани: оценка опоры сверху - перекрытие с гранью
+            # плюс перекрытия соседей в пределах основания вокруг нее
+            if top + d <= bin_depth:
+                support = min(w, placed_item.width) * min(h, placed_item.height)
+                for other in level:
+                    if support >= required:
+                        break
+                    support += self._calculate_overlap_area_orientation(
+                        other.position[0], other.position[1], other.width, other.height,
+                        px - w, py - h, placed_item.width + 2 * w, placed_item.height + 2 * h
+                    )
+                if support >= required:
+                    return True
+            for x, y, z in new_points:
+                if x + w > bin_width or y + h > bin_height or z + d > bin_depth:
+                    continue
+                if z == 0 or self._support_at(x, y, z, w, h)[0] >= required:
+                    return True
+        return False
+
     def _get_item_orientations(self, item):
         """Получить все возможные ориентации предмета"""
+        dimensions = (item.width, item.height, item.depth)
         if not self.allow_rotation:
-            return [(item.width, item.height, item.depth)]
-
-        orientations = [
-            (item.width, item.height, item.depth),  # исходная
-            (item.height, item.width, item.depth),  # поворот на 90°
-            (item.depth, item.height, item.width),  # поворот по другой оси
-            (item.height, item.depth, item.width),  # комбинированный поворот
-            (item.width, item.depth, item.height),  # еще один поворот
-            (item.depth, item.width, item.height)   # финальный поворот
-        ]
+            return [dimensions]
+
+        # Для типа коробки - только ориентации, которые помещаются в поддон
+        box_type = getattr(item, 'box_type', None)
+        if box_type is not None and box_type.dimensions == dimensions:
+            return box_type.fitting
 
-        # Убираем дубликаты (например, для кубических предметов)
-        return list(set(orientations))
+        orientations = self._orientation_cache.get(dimensions)
+        if orientations is None:
+            orientations = self._orientation_cache[dimensions] = build_orientations(*dimensions)
+        return orientations
 
     def _can_place_item_with_rotation(self, item, x, y, z):
         """Проверка размещения с учетом всех возможных поворотов"""
@@ -94,13 +288,8 @@ class BasePacker(Packer, ABC):
             return False
 
         # Проверка пересечений
-        for other in self.bins[0].items:
-            if self._check_intersection_orientation(
-                x, y, z, width, height, depth,
-                other.position[0], other.position[1], other.position[2],
-                other.width, other.height, other.depth
-            ):
-                return False
+        if self._collides(x, y, z, width, height, depth):
+            return False
 
         # Проверка поддержки снизу
         if z > 0:
@@ -108,6 +297,46 @@ class BasePacker(Packer, ABC):
 
         return True
 
+    def _accepts_placement(self, item, width, height, depth, x, y, z, support, supporters, placed_weight):
+        """Допустимость позиции при повторной вставке (lns.py) по правилам метода;
+        границы и пересечения уже проверены PackingState.probe(), support и supporters - из него"""
+        if z > 0 and not self._supports_item(item, width, height, x, y, z, support * width * height, supporters):
+            return False
+        return not self.limits_weight or placed_weight + item.weight <= self._max_weight
+
+    def _supports_item(self, item, width, height, x, y, z, support_area, supporters):
+        """Правила опоры метода: достаточно ли площади опоры support_area на предметах supporters.
+        Одни и те же для жадного прохода (_check_item_support) и повторной вставки (_accepts_placement)"""
+        return support_area >= width * height * self.support_threshold
+
+    def _support_at(self, x, y, z, width, height):
+        """Площадь опоры основания на верхних гранях предметов и опорные предметы"""
+        support_area = 0
+        supporters = []
+        for other in self.bins[0].items:
+            if other.position[2] + other.depth == z:
+                overlap = self._calculate_overlap_area_orientation(
+                    other.position[0], other.position[1], other.width, other.height,
+                    x, y, width, height
+                )
+                if overlap > 0:
+                    support_area += overlap
+                    supporters.append(other)
+        return support_area, supporters
+
+    def _check_item_support(self, item, width, height, x, y, z):
+        """Проверка опоры по правилам метода с аналитикой качества опоры"""
+        support_area, supporters = self._support_at(x, y, z, width, height)
+        self.analytics['support_quality_scores'].append(support_area / (width * height))
+        return self._supports_item(item, width, height, x, y, z, support_area, supporters)
+
+    def _collides(self, x, y, z, width, height, depth):
+        """Пересекается ли область с уже размещенными предметами"""
+        if self._collision is None:
+            # Вне pack() (например, в микробенчмарках) - точная проверка по списку предметов
+            self._collision = GeometricCollision(self)
+        return self._collision.collides(x, y, z, width, height, depth)
+
     def _check_intersection_orientation(self, x1, y1, z1, w1, h1, d1, x2, y2, z2, w2, h2, d2):
         """Проверка пересечения для конкретных размеров"""
         return not (
@@ -118,25 +347,12 @@ class BasePacker(Packer, ABC):
 
     def _check_support_orientation(self, width, height, depth, x, y, z, support_threshold=0.5):
         """Проверка поддержки для конкретной ориентации с аналитикой"""
-        total_support_area = 0
-        required_support_area = width * height * support_threshold
-        support_quality = 0
-
-        for other in self.bins[0].items:
-            if abs(other.position[2] + other.depth - z) < 0.1:
-                support_area = self._calculate_overlap_area_orientation(
-                    other.position[0], other.position[1], other.width, other.height,
-                    x, y, width, height
-                )
-
-                if support_area > 0:
-                    total_support_area += support_area
-                    support_quality += support_area / (width * height)
+        total_support_area, _ = self._support_at(x, y, z, width, height)
 
         # Записываем качество поддержки
-        self.analytics['support_quality_scores'].append(support_quality)
+        self.analytics['support_quality_scores'].append(total_support_area / (width * height))
         
-        return total_support_area >= required_support_area
+        return total_support_area >= width * height * support_threshold
 
     def _calculate_overlap_area_orientation(self, x1, y1, w1, h1, x2, y2, w2, h2):
         """Расчет площади перекрытия для конкретных размеров"""
@@ -152,6 +368,9 @@ class BasePacker(Packer, ABC):
     def _record_successful_placement(self, item, x, y, z, width, height, depth):
         """Записать успешное размещение для аналитики"""
         self.analytics['successful_placements'] += 1
+        # Аналитика ведется в сантиметрах
+        if not self.scale.is_identity:
+            x, y, z, width, height, depth = (self.scale.to_cm(value) for value in (x, y, z, width, height, depth))
         
         # Анализ по уровням
         level = self._get_level_for_height(z)
@@ -212,9 +431,7 @@ class BasePacker(Packer, ABC):
 
     def _check_weight_limit(self, item_weight):
         """Проверка весового ограничения паллеты"""
-        current_weight = sum(item.weight for item in self.bins[0].items)
-        max_weight = getattr(self.bins[0], 'max_weight', 1000)
-        return current_weight + item_weight <= max_weight
+        return self._placed_weight + item_weight <= self._max_weight
 
     def _check_stability(self, item_width, item_height, item_weight, x, y, z):
         """Проверка устойчивости упаковки"""
@@ -273,7 +490,8 @@ class BasePacker(Packer, ABC):
                     'min_support': min(self.analytics['support_quality_scores']) if self.analytics['support_quality_scores'] else 0,
                     'max_support': max(self.analytics['support_quality_scores']) if self.analytics['support_quality_scores'] else 0
                 },
-                'rejection_reasons': self.analytics['rejection_reasons']
+                'rejection_reasons': self.analytics['rejection_reasons'],
+                'failure_memo_hits': self.analytics['failure_memo_hits']
             },
             
             'performance_metrics': {
@@ -480,6 +698,10 @@ class BasePacker(Packer, ABC):
         self.calculation_time = time.time() - self.start_time
         process = psutil.Process(os.getpid())
         self.analytics['memory_usage_peak'] = process.memory_info().rss
+        
+        if self._trace is not None:
+            self._trace.trace.write(self.trace_path)
+            self._trace = None
 
     def _initialize_packing(self):
         """Инициализация перед упаковкой"""
@@ -490,6 +712,32 @@ class BasePacker(Packer, ABC):
         self.packing_issues = []
         self.bins[0].items = []
         
+        # Фиксируем seed, чтобы запуск можно было воспроизвести по трассе
+        seed = self.seed if self.seed is not None else random.randrange(2 ** 63)
+        self._rng = random.Random(seed)
+        self._trace = TraceRecorder(self, seed) if self.trace_path else None
+        self._placement_version = 0
+        self._failure_memo = {}
+        self._orientation_cache = {}
+        
+        bin_ = self.bins[0]
+        self._free_volume = bin_.width * bin_.height * bin_.depth
+        self._placed_weight = 0
+        self._max_weight = getattr(bin_, 'max_weight', 1000)
+        self._ems = None
+        if self.use_ems:
+            min_dimension = min(min(item.width, item.height, item.depth) for item in self.items)
+            self._ems = EmptySpaces(bin_.width, bin_.height, bin_.depth, min_dimension)
+        self._collision = create_collision_backend(
+            self.collision_backend, self, self.scale.length(self.voxel_resolution)
+        )
+        
+        # Маски ориентаций типов коробок для текущего поддона
+        for item in self.items:
+            box_type = getattr(item, 'box_type', None)
+            if box_type is not None:
+                box_type.prepare(bin_.width, bin_.height, bin_.depth)
+        
         # Сброс аналитики
         self.analytics = {
             'placement_attempts': 0,
@@ -505,7 +753,20 @@ class BasePacker(Packer, ABC):
             'placement_timeline': [],
             'rejection_reasons': {},
             'orientation_preferences': {},
-            'density_analysis': {}
+            'density_analysis': {},
+            'failure_memo_hits': 0
         }
         
+        self._selected_items = self.items
+        if self.preselect:
+            self._selected_items, excluded = select_items(
+                self.items, self._max_weight, self._free_volume * self.preselect_fill_ratio, self.preselect
+            )
+            for item in excluded:
+                self.unpacked_items.append(item)
+                self.packing_issues.append(f"{item.name} не выбрана для упаковки (превышение веса или объема)")
+                self._record_rejection_reason(item, 0, 0, 0, "not_selected")
+                if self._trace is not None:
+                    self._trace.record_rejection(item, 0)
+        
         return True
\ No newline at end of file
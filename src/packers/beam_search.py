@@ -0,0 +1,146 @@
+# src/packers/beam_search.py
+"""Лучевой поиск (beam search) по частичным планам укладки.
+
+Жадные методы фиксируют каждое размещение сразу. Здесь хранятся beam_width лучших
+частичных планов; каждый план расширяется следующим предметом (по убыванию объема)
+в branching лучших допустимых позициях. Позиции - начало координат и углы размещенных
+предметов (как у Extreme Points), допустимость - границы, пересечения, опора не меньше
+SUPPORT_THRESHOLD и грузоподъемность поддона.
+
+План - ветвь PackingState (state.py): дочерние планы создаются fork() без копирования
+размещений. Оценка считается по агрегатам состояния: доля упакованного объема, минус
+высота огибающей (максимальная верхняя отметка), плюс средние доли опоры и контакта
+предметов со стенками и соседями. Одинаковые планы (тот же набор типов предметов в тех
+же местах, в любом порядке) отбрасываются по хешу состояния.
+Расширения выполняются в пуле процессов, если workers > 1; результат от числа процессов
+не зависит.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .base_packer import BasePacker
+from .state import PackingState
+
+BEAM_WIDTH = 4
+BRANCHING = 4
+SUPPORT_THRESHOLD = 0.5
+# Сколько допустимых позиций (снизу вверх) оценивать при расширении плана
+CANDIDATE_LIMIT = 12
+# Веса слагаемых оценки плана
+HEIGHT_WEIGHT = 0.1
+SUPPORT_WEIGHT = 0.05
+CONTACT_WEIGHT = 0.05
+
+
+def _score(volume, top, support, contact, count, context):
+    bin_width, bin_height, bin_depth = context[:3]
+    return (
+        volume / (bin_width * bin_height * bin_depth)
+        - HEIGHT_WEIGHT * top / bin_depth
+        + SUPPORT_WEIGHT * support / count
+        + CONTACT_WEIGHT * contact / count
+    )
+
+
+def expand_plan(score, state, index, type_id, orientations, weight, context):
+    """Дочерние планы (оценка, состояние): предмет в branching лучших позициях
+    или пропущен, если позиций нет"""
+    max_weight, limits_weight, branching = context[3:]
+    candidates = []
+    if not (limits_weight and state.weight + weight > max_weight):
+        count = state.count + 1
+        for x, y, z in state.points():
+            for width, height, depth in orientations:
+                probe = state.probe(x, y, z, width, height, depth)
+                if probe is None or probe[0] < SUPPORT_THRESHOLD:
+                    continue
+                support, contact, _ = probe
+                child_score = _score(
+                    state.volume + width * height * depth, max(state.top, z + depth),
+                    state.support + support, state.contact + contact, count, context
+                )
+                candidates.append((-child_score, len(candidates), (x, y, z, width, height, depth), support, contact))
+            if len(candidates) >= CANDIDATE_LIMIT:
+                break
+    if not candidates:
+        return [(score, state)]
+
+    children = []
+    for negative_score, _, position, support, contact in sorted(candidates)[:branching]:
+        child = state.fork()
+        child.place(index, *position, weight, type_id, support, contact)
+        children.append((-negative_score, child))
+    return children
+
+
+def _expand_task(args):
+    return expand_plan(*args)
+
+
+class BeamSearchPacker(BasePacker):
+    limits_weight = True
+
+    def __init__(self, beam_width=BEAM_WIDTH, branching=BRANCHING, workers=1):
+        super().__init__()
+        # Ширина луча: больше - плотнее, но дольше (время растет линейно)
+        self.beam_width = beam_width
+        self.branching = branching
+        # Число процессов для расширения планов (1 - в текущем процессе)
+        self.workers = workers
+
+    def pack(self):
+        self._start_timing()
+        if not self._initialize_packing():
+            return
+
+        sorted_items = sorted(self._items_to_pack(), key=lambda x: -(x.width * x.height * x.depth))
+        self._record_order(sorted_items)
+
+        bin_ = self.bins[0]
+        context = (bin_.width, bin_.height, bin_.depth, self._max_weight, self.limits_weight, self.branching)
+        type_ids = {}
+        items = []
+        for item in sorted_items:
+            if self._is_known_failure(item):
+                self._reject_item(item)
+                continue
+            type_id = type_ids.setdefault(self._item_type_key(item), len(type_ids))
+            items.append((item, type_id, tuple(self._get_item_orientations(item))))
+
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers and self.workers > 1 else None
+        try:
+            best = self._search(items, context, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        placed = {placement.item: placement for placement in best.placements()}
+        for index, (item, _, _) in enumerate(items):
+            placement = placed.get(index)
+            if placement is not None:
+                self._place_item(item, *placement.position, placement.width, placement.height, placement.depth)
+            else:
+                self._reject_item(item)
+
+        self._end_timing()
+
+    def _search(self, items, context, executor):
+        bin_ = self.bins[0]
+        beam = [(0.0, PackingState(bin_.width, bin_.height, bin_.depth))]
+        for index, (item, type_id, orientations) in enumerate(items):
+            tasks = [(score, state, index, type_id, orientations, item.weight, context) for score, state in beam]
+            if executor is not None:
+                expansions = list(executor.map(_expand_task, tasks))
+            else:
+                expansions = [_expand_task(task) for task in tasks]
+            self.analytics['algorithm_iterations'] += len(tasks)
+
+            # Дубликаты состояний: остается план с лучшей оценкой (при равенстве - первый)
+            unique = {}
+            for children in expansions:
+                for score, state in children:
+                    known = unique.get(state.key)
+                    if known is None or score > known[0]:
+                        unique[state.key] = (score, state)
+            beam = sorted(unique.values(), key=lambda plan: -plan[0])[:self.beam_width]
+        return max(beam, key=lambda plan: (plan[1].volume, plan[0]))[1]
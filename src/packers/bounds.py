@@ -0,0 +1,209 @@
+# src/packers/bounds.py
+"""Нижние оценки и проверки заведомой невыполнимости упаковки.
+
+Коробки задаются группами (название, ширина, глубина, высота, вес, количество),
+поддон - размерами (ширина, глубина, высота) в тех же единицах.
+
+- объемная и весовая оценки числа поддонов;
+- типы коробок, которые не помещаются на поддон ни в одной ориентации;
+- оценки Martello-Pisinger-Vigo L1 и L2 для нескольких поддонов (с поворотами - по
+  ориентациям, допустимым для поддона);
+- верхняя оценка числа коробок на одном поддоне по объему и весу.
+"""
+
+import math
+
+import numpy as np
+
+from .item_types import build_orientations
+
+# Допуск округления вверх для сумм в числах с плавающей точкой
+CEIL_TOLERANCE = 1e-9
+# Пары осей (основание) и третья ось: 0 - ширина, 1 - глубина, 2 - высота
+AXIS_PAIRS = ((0, 1, 2), (0, 2, 1), (1, 2, 0))
+
+
+def _ceil(value):
+    return max(0, math.ceil(value - CEIL_TOLERANCE))
+
+
+def fitting_orientations(dimensions, pallet, allow_rotation=True):
+    """Ориентации коробки, которые помещаются в поддон"""
+    return [
+        orientation for orientation in build_orientations(*dimensions, allow_rotation=allow_rotation)
+        if all(size <= limit for size, limit in zip(orientation, pallet))
+    ]
+
+
+def volume_bound(boxes, pallet):
+    """Число поддонов не меньше суммарного объема коробок, деленного на объем поддона"""
+    pallet_volume = pallet[0] * pallet[1] * pallet[2]
+    total_volume = sum(width * depth * height * quantity for _, width, depth, height, _, quantity in boxes)
+    return _ceil(total_volume / pallet_volume) if pallet_volume > 0 else 0
+
+
+def weight_bound(boxes, max_weight):
+    """Число поддонов не меньше суммарного веса, деленного на грузоподъемность"""
+    total_weight = sum(weight * quantity for *_, weight, quantity in boxes)
+    return _ceil(total_weight / max_weight) if max_weight > 0 else 0
+
+
+def one_dimensional_bound(sizes, capacity):
+    """Оценка Martello-Toth L2 для одномерной упаковки; sizes - пары (размер, количество)"""
+    if not sizes or capacity <= 0:
+        return 0
+
+    half = capacity / 2
+    best = 0
+    for alpha in {0} | {size for size, _ in sizes if size <= half}:
+        large = medium = 0
+        medium_free = small_total = 0
+        for size, count in sizes:
+            if size > capacity - alpha:
+                large += count
+            elif size > half:
+                medium += count
+                medium_free += (capacity - size) * count
+            elif size >= alpha:
+                small_total += size * count
+        # Малые предметы сначала занимают место рядом со средними
+        bound = large + medium + _ceil((small_total - medium_free) / capacity)
+        best = max(best, bound)
+    return best
+
+
+def martello_l1(boxes, pallet, allow_rotation=True):
+    """Оценка L1: коробки шире половины поддона по обеим осям основания можно ставить только друг на друга.
+
+    С поворотами коробка учитывается, если это верно для всех ее допустимых ориентаций,
+    а ее размер по третьей оси берется минимальным по этим ориентациям.
+    """
+    best = 0
+    for first, second, third in AXIS_PAIRS:
+        sizes = []
+        for _, width, depth, height, _, quantity in boxes:
+            orientations = fitting_orientations((width, depth, height), pallet, allow_rotation)
+            if not orientations:
+                continue
+            if all(o[first] > pallet[first] / 2 and o[second] > pallet[second] / 2 for o in orientations):
+                sizes.append((min(o[third] for o in orientations), quantity))
+        best = max(best, one_dimensional_bound(sizes, pallet[third]))
+    return best
+
+
+def martello_l2(boxes, pallet, allow_rotation=False):
+    """Оценка L2 (Martello, Pisinger, Vigo).
+
+    С поворотами коробка попадает в группу (столбец, учет объема), только если в группу
+    попадает каждая ее допустимая ориентация, а высота в столбце - наименьшая по ним:
+    при любой выбранной ориентации оценка не больше настоящей. Перебор p и q для всех
+    коробок сразу - массивами NumPy (ориентации коробки дополнены повторами первой).
+    """
+    pallet_volume = pallet[0] * pallet[1] * pallet[2]
+    orientations, volumes, quantities = [], [], []
+    for _, width, depth, height, _, quantity in boxes:
+        fitting = fitting_orientations((width, depth, height), pallet, allow_rotation)
+        if fitting:
+            orientations.append(fitting + fitting[:1] * (6 - len(fitting)))
+            volumes.append(width * depth * height)
+            quantities.append(quantity)
+    if not orientations:
+        return 0
+    # (коробка, ориентация, ось)
+    orientations = np.array(orientations, dtype=np.float64)
+    quantities = np.array(quantities, dtype=np.float64)
+    volumes = np.array(volumes, dtype=np.float64) * quantities
+
+    best = 0
+    for first, second, third in AXIS_PAIRS:
+        length_a, length_b, length_c = pallet[first], pallet[second], pallet[third]
+        a, b = orientations[:, :, first], orientations[:, :, second]
+        heights = orientations[:, :, third].min(axis=1)
+        large = (a > length_a / 2) & (b > length_b / 2)
+        tall = large.all(axis=1)
+        l1 = one_dimensional_bound(
+            [(height, int(quantity)) for height, quantity in zip(heights[tall].tolist(), quantities[tall].tolist())],
+            length_c
+        )
+        best = max(best, l1)
+
+        # Достаточно перебрать p и q среди размеров не больше половины поддона
+        ps = np.unique(a[a <= length_a / 2])
+        qs = np.unique(b[b <= length_b / 2])[:, None, None]
+        if not len(ps) or not len(qs):
+            continue
+        column_b = b > length_b - qs
+        at_least_q = b >= qs
+        for p in ps.tolist():
+            # Коробка занимает почти все основание: рядом ничего размером не меньше p x q
+            column = (a > length_a - p) & column_b
+            in_column = column.all(axis=2)
+            counted = (column | large | ((a >= p) & at_least_q)).all(axis=2) & ~in_column
+            column_height = in_column @ (heights * quantities)
+            volume = counted @ volumes
+            free_volume = (length_c * l1 - column_height) * length_a * length_b
+            extra = np.ceil((volume - free_volume) / pallet_volume - CEIL_TOLERANCE).max()
+            best = max(best, l1 + max(0, int(extra)))
+    return best
+
+
+def single_pallet_capacity(boxes, pallet, max_weight=None, allow_rotation=True):
+    """Верхняя оценка числа коробок на одном поддоне: самые малые по объему
+    (и самые легкие, если задана грузоподъемность), пока хватает объема и веса"""
+    pallet_volume = pallet[0] * pallet[1] * pallet[2]
+    fitting = [box for box in boxes if fitting_orientations(box[1:4], pallet, allow_rotation)]
+
+    def count_within(groups, limit):
+        count, total = 0, 0
+        for value, quantity in sorted(groups):
+            take = quantity if value <= 0 else min(quantity, int((limit - total + CEIL_TOLERANCE) // value))
+            count += take
+            total += take * value
+            if take < quantity:
+                break
+        return count
+
+    capacity = count_within([(w * d * h, quantity) for _, w, d, h, _, quantity in fitting], pallet_volume)
+    if max_weight is not None and max_weight > 0:
+        capacity = min(capacity, count_within([(weight, quantity) for *_, weight, quantity in fitting], max_weight))
+    return capacity
+
+
+def preflight(boxes, pallet, max_weight, allow_rotation=True, weight_limited=True):
+    """Быстрая проверка заказа до упаковки: оценки и заведомо невыполнимые требования"""
+    boxes = list(boxes)
+    pallet_volume = pallet[0] * pallet[1] * pallet[2]
+    total_boxes = sum(quantity for *_, quantity in boxes)
+    total_volume = sum(w * d * h * quantity for _, w, d, h, _, quantity in boxes)
+    total_weight = sum(weight * quantity for *_, weight, quantity in boxes)
+
+    oversized, fitting = [], []
+    for box in boxes:
+        (fitting if fitting_orientations(box[1:4], pallet, allow_rotation) else oversized).append(box)
+    oversized_count = sum(box[5] for box in oversized)
+
+    bounds = {
+        'volume': volume_bound(fitting, pallet),
+        'weight': weight_bound(fitting, max_weight) if weight_limited else 0,
+        'l1': martello_l1(fitting, pallet, allow_rotation),
+        'l2': martello_l2(fitting, pallet, allow_rotation)
+    }
+    min_pallets = max(bounds.values())
+
+    capacity = single_pallet_capacity(fitting, pallet, max_weight if weight_limited else None, allow_rotation)
+    min_unpacked = oversized_count + max(0, total_boxes - oversized_count - capacity)
+
+    return {
+        'total_boxes': total_boxes,
+        'total_volume': total_volume,
+        'total_weight': total_weight,
+        'volume_ratio': round(total_volume / pallet_volume, 4) if pallet_volume > 0 else None,
+        'weight_ratio': round(total_weight / max_weight, 4) if max_weight > 0 else None,
+        'oversized_types': [box[0] for box in oversized],
+        'lower_bounds': bounds,
+        'min_pallets': min_pallets,
+        'max_boxes_single_pallet': capacity,
+        'min_unpacked': min_unpacked,
+        # 'infeasible' - все коробки на один поддон заведомо не поместятся, иначе проверка не исключает
+        'single_pallet': 'infeasible' if min_unpacked > 0 or min_pallets > 1 else 'possible'
+    }
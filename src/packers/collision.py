@@ -0,0 +1,124 @@
+# src/packers/collision.py
+"""Проверка пересечений с уже размещенными коробками.
+
+GeometricCollision - точная проверка перебором размещенных коробок.
+VoxelCollision - битовая сетка занятости: столбец (x, y) хранит занятые слои по z
+битами в массиве uint64, проверка - any() по срезу, размещение - |= по срезу.
+Для координат, кратных разрешению, результат совпадает с точной проверкой;
+для остальных вокселизация консервативна (может запретить допустимую позицию,
+но не пропустит пересечение).
+"""
+
+import math
+import sys
+
+import numpy as np
+
+WORD_BITS = 64
+WORD_MASK = (1 << WORD_BITS) - 1
+# Допуск при переводе координат в индексы вокселей
+EPSILON = 1e-9
+
+
+class GeometricCollision:
+    """Точная проверка по списку размещенных коробок packer'а"""
+
+    name = 'geometric'
+
+    def __init__(self, packer):
+        self.packer = packer
+
+    def add(self, x, y, z, width, height, depth):
+        # Коробки и так хранятся в packer.bins[0].items
+        pass
+
+    def collides(self, x, y, z, width, height, depth):
+        check = self.packer._check_intersection_orientation
+        for other in self.packer.bins[0].items:
+            if check(
+                x, y, z, width, height, depth,
+                other.position[0], other.position[1], other.position[2],
+                other.width, other.height, other.depth
+            ):
+                return True
+        return False
+
+    def memory_bytes(self):
+        """Список размещенных предметов и их координаты"""
+        items = self.packer.bins[0].items
+        return sys.getsizeof(items) + sum(sys.getsizeof(item.position) for item in items)
+
+
+class VoxelCollision:
+    """Битовая сетка занятости с заданным разрешением"""
+
+    name = 'voxel'
+
+    def __init__(self, width, height, depth, resolution=1):
+        self.resolution = resolution
+        self.nx = int(math.ceil(width / resolution - EPSILON))
+        self.ny = int(math.ceil(height / resolution - EPSILON))
+        self.nz = int(math.ceil(depth / resolution - EPSILON))
+        self.words = max(1, (self.nz + WORD_BITS - 1) // WORD_BITS)
+        self.grid = np.zeros((self.nx, self.ny, self.words), dtype=np.uint64)
+        self._masks = {}
+
+    def _span(self, start, size, limit):
+        """Индексы вокселей, которые пересекает отрезок [start, start + size)"""
+        first = int(math.floor(start / self.resolution + EPSILON))
+        last = int(math.ceil((start + size) / self.resolution - EPSILON))
+        return max(first, 0), min(last, limit)
+
+    def _z_mask(self, first, last):
+        """Слова uint64, которые задевают слои [first, last), и маска слоев в них"""
+        key = (first, last)
+        mask = self._masks.get(key)
+        if mask is None:
+            first_word = first // WORD_BITS
+            last_word = (last - 1) // WORD_BITS + 1
+            bits = ((1 << (last - first)) - 1) << (first - first_word * WORD_BITS)
+            words = [(bits >> (word * WORD_BITS)) & WORD_MASK for word in range(last_word - first_word)]
+            if len(words) == 1:
+                # Коробка в пределах одного слова: срез двумерный, маска - скаляр
+                mask = (first_word, np.uint64(words[0]))
+            else:
+                mask = (slice(first_word, last_word), np.array(words, dtype=np.uint64))
+            self._masks[key] = mask
+        return mask
+
+    def _region(self, x, y, z, width, height, depth):
+        """Срез сетки и маска слоев для области, None - если область пуста"""
+        x0, x1 = self._span(x, width, self.nx)
+        y0, y1 = self._span(y, height, self.ny)
+        z0, z1 = self._span(z, depth, self.nz)
+        if x0 >= x1 or y0 >= y1 or z0 >= z1:
+            return None, None
+        words, mask = self._z_mask(z0, z1)
+        return (slice(x0, x1), slice(y0, y1), words), mask
+
+    def add(self, x, y, z, width, height, depth):
+        region, mask = self._region(x, y, z, width, height, depth)
+        if region is not None:
+            self.grid[region] |= mask
+
+    def collides(self, x, y, z, width, height, depth):
+        region, mask = self._region(x, y, z, width, height, depth)
+        if region is None:
+            return False
+        return bool((self.grid[region] & mask).any())
+
+    def memory_bytes(self):
+        return self.grid.nbytes
+
+
+COLLISION_BACKENDS = ('geometric', 'voxel')
+
+
+def create_collision_backend(name, packer, resolution=1):
+    """Создать проверку пересечений для поддона packer'а"""
+    if name == 'geometric':
+        return GeometricCollision(packer)
+    if name == 'voxel':
+        bin_ = packer.bins[0]
+        return VoxelCollision(bin_.width, bin_.height, bin_.depth, resolution)
+    raise ValueError(f"Неизвестный способ проверки пересечений: {name}. Доступны: {', '.join(COLLISION_BACKENDS)}")
@@ -16,23 +16,25 @@ class CornerPointPacker(BasePacker):
 
         # Сортировка по объему и компактности
         sorted_items = sorted(
-            self.items,
+            self._items_to_pack(),
             key=lambda x: (-(x.width * x.height * x.depth),
                           -(min(x.width, x.height) / max(x.width, x.height)))
         )
+        self._record_order(sorted_items)
 
         for item in sorted_items:
+            if self._is_known_failure(item):
+                self._reject_item(item)
+                continue
+
+            candidates = len(self.corner_points)
             best_position = self._find_best_corner(item)
             if best_position:
-                x, y, z, width, height, depth = best_position
-                # Обновляем размеры предмета согласно выбранной ориентации
-                item.width, item.height, item.depth = width, height, depth
-                item.position = [x, y, z]
-                self.bins[0].items.append(item)
-                self._update_corner_points(item)
+                # Размеры предмета обновляются согласно выбранной ориентации
+                self._place_item(item, *best_position, candidates=candidates)
+                self._retain_failures(item, self._update_corner_points(item))
             else:
-                self.unpacked_items.append(item)
-                self.packing_issues.append(f"Не удалось разместить {item.name}")
+                self._reject_item(item, candidates)
 
         self._end_timing()
 
@@ -41,7 +43,7 @@ class CornerPointPacker(BasePacker):
         best_position = None
         min_score = float('inf')
         
-        for corner in self.corner_points:
+        for corner in self._seed_candidates(self.corner_points, item):
             x, y, z = corner
             # Используем систему поворотов из базового класса
             orientation = self._can_place_item_with_rotation(item, x, y, z)
@@ -89,7 +91,8 @@ class CornerPointPacker(BasePacker):
         if y + height == self.bins[0].height:
             corner_bonus += 5
         
-        return corner_bonus
+        # Бонусы заданы в см, расстояния в оценке - во внутренних единицах
+        return corner_bonus * self.scale.units_per_cm
 
     def _calculate_isolation_penalty(self, x, y, z, width, height, depth):
         """Штраф за изолированное размещение"""
@@ -157,6 +160,7 @@ class CornerPointPacker(BasePacker):
 
         # Сортируем точки: сначала по высоте, затем по расстоянию от начала координат
         self.corner_points.sort(key=lambda p: (p[2], p[0]**2 + p[1]**2))
+        return new_points
 
     def _generate_intersection_points(self, item1, item2):
         """Генерация точек пересечения между двумя предметами"""
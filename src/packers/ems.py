@@ -0,0 +1,119 @@
+# src/packers/ems.py
+"""Пустые максимальные пространства (Empty Maximal Spaces).
+
+Свободный объем поддона представляется набором максимальных пустых
+параллелепипедов. Любая позиция, в которую коробка помещается без пересечений,
+лежит внутри одного из них, поэтому «помещается ли коробка куда-нибудь» -
+это проверка размеров по списку пространств, без перебора позиций.
+
+После размещения коробки каждое пересекающее ее пространство заменяется
+шестью остатками (слева, справа, спереди, сзади, снизу, сверху от коробки),
+затем удаляются остатки, вложенные в другие пространства, и слишком малые
+для любой коробки заказа.
+"""
+
+
+class EmptySpaces:
+    """Набор пустых максимальных пространств с индексом по отсортированным размерам"""
+
+    def __init__(self, width, height, depth, min_dimension=0):
+        # Пространство: (x1, y1, z1, x2, y2, z2)
+        self.spaces = [(0, 0, 0, width, height, depth)]
+        # Пространство, у которого наименьшая сторона меньше, не вмещает ни одну коробку
+        self.min_dimension = min_dimension
+        self._index = None
+
+    @staticmethod
+    def _contains(outer, inner):
+        return (outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] <= inner[2] and
+                outer[3] >= inner[3] and outer[4] >= inner[4] and outer[5] >= inner[5])
+
+    def place(self, x, y, z, width, height, depth):
+        """Обновить пространства после размещения коробки"""
+        x2, y2, z2 = x + width, y + height, z + depth
+        kept = []
+        fragments = []
+        for space in self.spaces:
+            sx1, sy1, sz1, sx2, sy2, sz2 = space
+            if x >= sx2 or x2 <= sx1 or y >= sy2 or y2 <= sy1 or z >= sz2 or z2 <= sz1:
+                kept.append(space)
+                continue
+            # Остатки пространства вокруг коробки
+            if x > sx1:
+                fragments.append((sx1, sy1, sz1, x, sy2, sz2))
+            if x2 < sx2:
+                fragments.append((x2, sy1, sz1, sx2, sy2, sz2))
+            if y > sy1:
+                fragments.append((sx1, sy1, sz1, sx2, y, sz2))
+            if y2 < sy2:
+                fragments.append((sx1, y2, sz1, sx2, sy2, sz2))
+            if z > sz1:
+                fragments.append((sx1, sy1, sz1, sx2, sy2, z))
+            if z2 < sz2:
+                fragments.append((sx1, sy1, z2, sx2, sy2, sz2))
+
+        minimum = self.min_dimension
+        fragments = [
+            space for space in set(fragments)
+            if min(space[3] - space[0], space[4] - space[1], space[5] - space[2]) >= minimum
+        ]
+        # Прежние пространства были максимальными, поэтому проверяем на вложенность только новые
+        fragments.sort(key=lambda s: (s[3] - s[0]) * (s[4] - s[1]) * (s[5] - s[2]), reverse=True)
+        maximal = []
+        for fragment in fragments:
+            if any(self._contains(other, fragment) for other in maximal):
+                continue
+            if any(self._contains(other, fragment) for other in kept):
+                continue
+            maximal.append(fragment)
+
+        self.spaces = kept + maximal
+        self._index = None
+
+    def _sorted_index(self):
+        """Пространства с размерами по убыванию, отсортированные по наибольшему размеру"""
+        if self._index is None:
+            entries = []
+            for space in self.spaces:
+                dimensions = sorted((space[3] - space[0], space[4] - space[1], space[5] - space[2]), reverse=True)
+                entries.append((dimensions[0], dimensions[1], dimensions[2], space))
+            entries.sort(key=lambda entry: entry[0], reverse=True)
+            self._index = entries
+        return self._index
+
+    def spaces_for(self, width, height, depth, allow_rotation=True):
+        """Пространства, в которые помещается коробка (в какой-либо ориентации)"""
+        if not allow_rotation:
+            return [
+                space for space in self.spaces
+                if space[3] - space[0] >= width and space[4] - space[1] >= height and space[5] - space[2] >= depth
+            ]
+
+        largest, middle, smallest = sorted((width, height, depth), reverse=True)
+        result = []
+        for first, second, third, space in self._sorted_index():
+            if first < largest:
+                break
+            if second >= middle and third >= smallest:
+                result.append(space)
+        return result
+
+    def fits(self, width, height, depth, allow_rotation=True):
+        """Помещается ли коробка хотя бы в одно пустое пространство"""
+        if not allow_rotation:
+            return bool(self.spaces_for(width, height, depth, allow_rotation))
+
+        largest, middle, smallest = sorted((width, height, depth), reverse=True)
+        for first, second, third, _ in self._sorted_index():
+            if first < largest:
+                return False
+            if second >= middle and third >= smallest:
+                return True
+        return False
+
+    def corner_points(self, width, height, depth, allow_rotation=True):
+        """Нижние левые передние углы пространств, в которые помещается коробка"""
+        return [space[:3] for space in self.spaces_for(width, height, depth, allow_rotation)]
+
+    def __len__(self):
+        return len(self.spaces)
@@ -1,12 +1,12 @@
 # src/packers/extreme_points.py
 
 from .base_packer import BasePacker
-import random
 
 class ExtremePointPacker(BasePacker):
-    def __init__(self):
+    def __init__(self, seed=None):
         super().__init__()
         self.extreme_points = []
+        self.seed = seed
 
     def pack(self):
         self._start_timing()
@@ -17,22 +17,24 @@ class ExtremePointPacker(BasePacker):
 
         # Сортировка с небольшим случайным фактором для разнообразия
         sorted_items = sorted(
-            self.items,
-            key=lambda x: (-(x.width * x.height * x.depth) * (0.9 + 0.2 * random.random()))
+            self._items_to_pack(),
+            key=lambda x: (-(x.width * x.height * x.depth) * (0.9 + 0.2 * self._rng.random()))
         )
+        self._record_order(sorted_items)
 
         for item in sorted_items:
+            if self._is_known_failure(item):
+                self._reject_item(item)
+                continue
+
+            candidates = len(self.extreme_points)
             best_fit = self._find_best_fit(item)
             if best_fit:
-                x, y, z, width, height, depth = best_fit
-                # Обновляем размеры предмета согласно выбранной ориентации
-                item.width, item.height, item.depth = width, height, depth
-                item.position = [x, y, z]
-                self.bins[0].items.append(item)
-                self._update_extreme_points(item)
+                # Размеры предмета обновляются согласно выбранной ориентации
+                self._place_item(item, *best_fit, candidates=candidates)
+                self._retain_failures(item, self._update_extreme_points(item))
             else:
-                self.unpacked_items.append(item)
-                self.packing_issues.append(f"Не удалось разместить {item.name}")
+                self._reject_item(item, candidates)
 
         self._end_timing()
 
@@ -41,7 +43,7 @@ class ExtremePointPacker(BasePacker):
         best_position = None
         min_waste = float('inf')
         
-        for ep in self.extreme_points:
+        for ep in self._seed_candidates(self.extreme_points, item):
             x, y, z = ep
             # Используем систему поворотов из базового класса
             orientation = self._can_place_item_with_rotation(item, x, y, z)
@@ -99,19 +101,19 @@ class ExtremePointPacker(BasePacker):
         contact_area = 0
         
         # Контакт по X-плоскости
-        if abs((x1 + w1) - x2) < 0.1 or abs(x1 - (x2 + w2)) < 0.1:
+        if x1 + w1 == x2 or x1 == x2 + w2:
             y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
             z_overlap = max(0, min(z1 + d1, z2 + d2) - max(z1, z2))
             contact_area += y_overlap * z_overlap
         
         # Контакт по Y-плоскости
-        if abs((y1 + h1) - y2) < 0.1 or abs(y1 - (y2 + h2)) < 0.1:
+        if y1 + h1 == y2 or y1 == y2 + h2:
             x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
             z_overlap = max(0, min(z1 + d1, z2 + d2) - max(z1, z2))
             contact_area += x_overlap * z_overlap
         
         # Контакт по Z-плоскости
-        if abs((z1 + d1) - z2) < 0.1 or abs(z1 - (z2 + d2)) < 0.1:
+        if z1 + d1 == z2 or z1 == z2 + d2:
             x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
             y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
             contact_area += x_overlap * y_overlap
@@ -170,6 +172,7 @@ class ExtremePointPacker(BasePacker):
 
         # Сортируем точки: сначала по высоте, затем по расстоянию от начала координат
         self.extreme_points.sort(key=lambda p: (p[2], p[0]**2 + p[1]**2))
+        return new_points
 
     def _generate_projection_points(self, item):
         """Генерация точек проекций согласно алгоритму Extreme Points"""
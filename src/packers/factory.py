@@ -0,0 +1,33 @@
+# src/packers/factory.py
+
+from src.utils.constants import PackingMethod
+from .weight_aware import WeightAwarePacker
+from .extreme_points import ExtremePointPacker
+from .laff import LAFFPacker
+from .corner_points import CornerPointPacker
+from .sfc import SFCPacker
+from .beam_search import BeamSearchPacker, BEAM_WIDTH
+
+
+def create_packer(method, support_threshold=0.8, weight_check_enabled=True, seed=None,
+                  use_raster_points=False, collision_backend='geometric', voxel_resolution=1,
+                  beam_width=BEAM_WIDTH, workers=1):
+    """Создать packer по названию метода (значению PackingMethod)"""
+    if method == PackingMethod.WEIGHT_AWARE.value:
+        packer = WeightAwarePacker(support_threshold, weight_check_enabled, use_raster_points)
+    elif method == PackingMethod.EXTREME_POINTS.value:
+        packer = ExtremePointPacker()
+    elif method == PackingMethod.LAFF.value:
+        packer = LAFFPacker()
+    elif method == PackingMethod.CORNER_POINTS.value:
+        packer = CornerPointPacker()
+    elif method == PackingMethod.SFC.value:
+        packer = SFCPacker(use_raster_points)
+    elif method == PackingMethod.BEAM_SEARCH.value:
+        packer = BeamSearchPacker(beam_width, workers=workers)
+    else:
+        packer = WeightAwarePacker(support_threshold, weight_check_enabled, use_raster_points)
+    packer.seed = seed
+    packer.collision_backend = collision_backend
+    packer.voxel_resolution = voxel_resolution
+    return packer
@@ -0,0 +1,158 @@
+# src/packers/item_types.py
+
+from py3dbp.constants import RotationType
+
+# Позиция неразмещенной коробки, общая для всех экземпляров (как в py3dbp.Item)
+START_POSITION = [0, 0, 0]
+
+
+def build_orientations(width, height, depth, allow_rotation=True):
+    """Все различные ориентации предмета (тот же порядок, что и в BasePacker)"""
+    if not allow_rotation:
+        return [(width, height, depth)]
+
+    orientations = [
+        (width, height, depth),
+        (height, width, depth),
+        (depth, height, width),
+        (height, depth, width),
+        (width, depth, height),
+        (depth, width, height)
+    ]
+
+    # Убираем дубликаты (например, для кубических предметов)
+    return list(set(orientations))
+
+
+class BoxType:
+    """Тип коробки: размеры, вес, флаги и предрасчитанные данные ориентаций"""
+
+    __slots__ = (
+        'index', 'name', 'width', 'height', 'depth', 'weight', 'fragile', 'stackable', 'priority',
+        'key', 'volume', 'orientations', 'footprints', 'fits_pallet', 'fitting', 'pallet'
+    )
+
+    def __init__(self, index, name, width, height, depth, weight, fragile=False, stackable=True, priority=1):
+        self.index = index
+        self.name = name
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.weight = weight
+        self.fragile = fragile
+        self.stackable = stackable
+        # Ценность коробки при предварительном выборе (preselection.py)
+        self.priority = priority
+        self.key = (width, height, depth, weight, fragile, stackable, priority)
+        self.volume = width * height * depth
+
+        self.orientations = build_orientations(width, height, depth)
+        # Площадь основания каждой ориентации
+        self.footprints = [w * h for w, h, _ in self.orientations]
+        self.pallet = None
+        self.fits_pallet = [True] * len(self.orientations)
+        self.fitting = list(self.orientations)
+
+    @property
+    def dimensions(self):
+        return (self.width, self.height, self.depth)
+
+    def prepare(self, pallet_width, pallet_height, pallet_depth):
+        """Отметить ориентации, которые помещаются в поддон"""
+        pallet = (pallet_width, pallet_height, pallet_depth)
+        if pallet == self.pallet:
+            return
+        self.pallet = pallet
+        self.fits_pallet = [
+            w <= pallet_width and h <= pallet_height and d <= pallet_depth
+            for w, h, d in self.orientations
+        ]
+        self.fitting = [
+            orientation for orientation, fits in zip(self.orientations, self.fits_pallet) if fits
+        ]
+
+    def make_items(self, quantity, label=None, start=0):
+        """Коробки этого типа с именами label_0 ... label_{quantity-1}"""
+        label = label if label is not None else self.name
+        return [PackItem(self, label, ordinal) for ordinal in range(start, start + quantity)]
+
+
+class PackItem:
+    """Легкая коробка - ссылка на BoxType, совместимая с py3dbp.Item"""
+
+    __slots__ = ('box_type', 'label', 'ordinal', 'width', 'height', 'depth', 'position')
+
+    rotation_type = RotationType.RT_WHD
+
+    def __init__(self, box_type, label, ordinal):
+        self.box_type = box_type
+        self.label = label
+        self.ordinal = ordinal
+        # Размеры меняются при выборе ориентации во время упаковки
+        self.width = box_type.width
+        self.height = box_type.height
+        self.depth = box_type.depth
+        # При размещении заменяется новым списком
+        self.position = START_POSITION
+
+    @property
+    def name(self):
+        return f'{self.label}_{self.ordinal}'
+
+    @property
+    def weight(self):
+        return self.box_type.weight
+
+    @property
+    def fragile(self):
+        return self.box_type.fragile
+
+    @property
+    def stackable(self):
+        return self.box_type.stackable
+
+    @property
+    def priority(self):
+        return self.box_type.priority
+
+    def get_volume(self):
+        # Размеры могут быть переведены из внутренних единиц в см после упаковки
+        return self.width * self.height * self.depth
+
+    def __repr__(self):
+        return f'PackItem({self.name}, {self.width}x{self.height}x{self.depth}, {self.weight})'
+
+
+class BoxTypeTable:
+    """Таблица различных типов коробок заказа"""
+
+    def __init__(self, pallet=None):
+        self.types = []
+        self._by_key = {}
+        self.pallet = tuple(pallet) if pallet is not None else None
+
+    def add(self, name, width, height, depth, weight, fragile=False, stackable=True, priority=1):
+        """Тип для заданных размеров, веса, флагов и приоритета (существующий или новый)"""
+        key = (width, height, depth, weight, fragile, stackable, priority)
+        box_type = self._by_key.get(key)
+        if box_type is None:
+            box_type = BoxType(len(self.types), name, width, height, depth, weight, fragile, stackable, priority)
+            if self.pallet is not None:
+                box_type.prepare(*self.pallet)
+            self._by_key[key] = box_type
+            self.types.append(box_type)
+        return box_type
+
+    def add_boxes(self, packer, name, width, height, depth, weight, quantity, fragile=False, stackable=True,
+                  priority=1):
+        """Добавить в packer quantity коробок с именами name_0 ... name_{quantity-1}"""
+        box_type = self.add(name, width, height, depth, weight, fragile, stackable, priority)
+        for item in box_type.make_items(quantity, label=name):
+            packer.add_item(item)
+        return box_type
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
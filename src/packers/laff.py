@@ -14,9 +14,10 @@ class LAFFPacker(BasePacker):
 
         # Сортируем предметы по площади основания и высоте
         sorted_items = sorted(
-            self.items,
+            self._items_to_pack(),
             key=lambda x: (-x.width * x.height, -x.depth)
         )
+        self._record_order(sorted_items)
 
         current_level_height = 0
         remaining_height = self.bins[0].depth
@@ -40,6 +41,10 @@ class LAFFPacker(BasePacker):
 
             # Пытаемся разместить каждый предмет
             for item in level_items:
+                # Уровень не менялся с прошлого отказа для такого же типа
+                if self._is_known_failure(item):
+                    continue
+
                 best_position = self._find_best_position(
                     item,
                     current_level_height,
@@ -50,11 +55,16 @@ class LAFFPacker(BasePacker):
 
                 if best_position:
                     x, y = best_position
-                    item.position = [x, y, current_level_height]
-                    self.bins[0].items.append(item)
+                    # Кандидаты: начало уровня и по две точки от каждого предмета уровня
+                    self._place_item(
+                        item, x, y, current_level_height, item.width, item.height, item.depth,
+                        candidates=1 + 2 * len(current_level_items)
+                    )
                     current_level_items.append(item)
                     sorted_items.remove(item)
                     max_level_height = max(max_level_height, item.depth)
+                else:
+                    self._remember_failure(item)
 
             if not current_level_items:
                 break
@@ -63,11 +73,11 @@ class LAFFPacker(BasePacker):
             current_level_height += max_level_height
             remaining_height -= max_level_height
             self.levels.append(current_level_height)
+            self._invalidate_failures()
 
         # Добавляем оставшиеся предметы в список неупакованных
-        self.unpacked_items.extend(sorted_items)
         for item in sorted_items:
-            self.packing_issues.append(f"Не удалось разместить {item.name}")
+            self._reject_item(item)
 
         self._end_timing()
 
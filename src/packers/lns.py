@@ -0,0 +1,234 @@
+# src/packers/lns.py
+"""Улучшение готовой упаковки поиском в большой окрестности (ruin and recreate).
+
+После жадного прохода часть коробок остается неупакованной, хотя поместилась бы,
+если переложить участок поддона. На каждой итерации из поддона убирается область:
+- 'top' - верхний слой (предметы не ниже одной из верхних отметок z);
+- 'column' - колонна над случайным прямоугольником основания;
+- 'neighbours' - соседи случайного предмета (его габарит, расширенный на свой размер).
+Вместе с убранными удаляются предметы, которые на них опирались. Затем убранные и
+неупакованные предметы вставляются заново по убыванию объема в первую допустимую
+точку (углы размещенных предметов, снизу вверх) в самой низкой ориентации. Допустимость
+по опоре и весу проверяет сам метод (_accepts_placement), поэтому сохраняются его правила.
+Изменение принимается, только если упакованный объем вырос, иначе откатывается.
+
+Поиск работает с PackingState (state.py): предметы не меняются до конца улучшения,
+отказ от изменения - откат журнала состояния. Результат переносится в packer
+(позиции, ориентации, bins[0].items, unpacked_items), проверка пересечений packer'а
+переключается на точную, EMS отключаются - они не поддерживают удаление.
+"""
+
+import random
+import time
+
+from .collision import GeometricCollision
+from .state import PackingState
+
+RUIN_OPERATORS = ('top', 'column', 'neighbours')
+# Доля размера поддона для стороны основания колонны
+COLUMN_FRACTION = 1 / 3
+# Число верхних отметок z, из которых выбирается граница верхнего слоя
+TOP_LEVELS = 3
+# Относительный шум объема в порядке повторной вставки (разнообразие итераций)
+ORDER_NOISE = 0.2
+
+
+def _volume(item):
+    return item.width * item.height * item.depth
+
+
+def _overlap(a_start, a_size, b_start, b_size):
+    return a_start < b_start + b_size and b_start < a_start + a_size
+
+
+class RuinAndRecreate:
+    """Улучшение упаковки packer'а разрушением и повторной вставкой областей"""
+
+    def __init__(self, packer, time_budget=1.0, max_iterations=None, seed=None, operators=RUIN_OPERATORS):
+        unknown = [name for name in operators if name not in RUIN_OPERATORS]
+        if unknown:
+            raise ValueError(f"Неизвестные операторы разрушения: {', '.join(unknown)}. Доступны: {', '.join(RUIN_OPERATORS)}")
+        self.packer = packer
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self.operators = tuple(operators)
+        # По умолчанию - генератор packer'а, чтобы запуск с seed был воспроизводим
+        self._rng = packer._rng if seed is None else random.Random(seed)
+        self._state = None
+        self._unpacked = []
+
+    def run(self):
+        """Выполнить улучшение в пределах бюджета времени; возвращает статистику"""
+        packer = self.packer
+        started = time.perf_counter()
+        deadline = started + self.time_budget
+        bin_ = packer.bins[0]
+        initial_unpacked = list(packer.unpacked_items)
+        # Коробки, исключенные предварительным выбором, обратно не возвращаются
+        allowed = {id(item) for item in packer._items_to_pack()}
+
+        self._state = state = PackingState.from_items(bin_, bin_.items)
+        self._unpacked = list(packer.unpacked_items)
+        stats = {
+            'iterations': 0,
+            'accepted': 0,
+            'volume_before': state.volume,
+            'operators': {name: 0 for name in self.operators}
+        }
+        best_volume = state.volume
+
+        while time.perf_counter() < deadline:
+            if self.max_iterations is not None and stats['iterations'] >= self.max_iterations:
+                break
+            pending = [item for item in self._unpacked if id(item) in allowed and self._fits_pallet(item)]
+            if not pending or not state.count:
+                break
+            stats['iterations'] += 1
+
+            operator = self._rng.choice(self.operators)
+            removed = self._with_dependents(self._ruin(operator))
+            if not removed:
+                continue
+
+            mark = state.mark()
+            unpacked = self._unpacked
+            for placement in removed:
+                state.remove(placement)
+            pending_ids = {id(item) for item in pending}
+            self._unpacked = [item for item in unpacked if id(item) not in pending_ids]
+
+            completed = self._recreate([placement.item for placement in removed] + pending, deadline)
+            if completed and state.volume > best_volume:
+                best_volume = state.volume
+                state.commit()
+                stats['accepted'] += 1
+                stats['operators'][operator] += 1
+            else:
+                state.rollback(mark)
+                self._unpacked = unpacked
+
+        self._apply()
+        self._update_issues(initial_unpacked)
+        stats['volume_after'] = best_volume
+        stats['time'] = round(time.perf_counter() - started, 4)
+        packer.calculation_time += stats['time']
+        packer.analytics['lns'] = stats
+        return stats
+
+    def _fits_pallet(self, item):
+        box_type = getattr(item, 'box_type', None)
+        return not (self.packer.allow_rotation and box_type is not None and not box_type.fitting)
+
+    def _ruin(self, operator):
+        """Выбрать размещения области для удаления"""
+        state = self._state
+        placements = state.placements()
+        if operator == 'top':
+            levels = sorted({placement.position[2] for placement in placements})
+            cut = levels[-self._rng.randint(1, min(TOP_LEVELS, len(levels)))]
+            return [placement for placement in placements if placement.position[2] >= cut]
+
+        if operator == 'column':
+            width = max(1, int(state.width * COLUMN_FRACTION))
+            height = max(1, int(state.height * COLUMN_FRACTION))
+            x = self._rng.randint(0, max(0, int(state.width) - width))
+            y = self._rng.randint(0, max(0, int(state.height) - height))
+        else:
+            center = self._rng.choice(placements)
+            x = center.position[0] - center.width
+            y = center.position[1] - center.height
+            width, height = 3 * center.width, 3 * center.height
+        return [
+            placement for placement in placements
+            if _overlap(placement.position[0], placement.width, x, width) and
+            _overlap(placement.position[1], placement.height, y, height)
+        ]
+
+    def _with_dependents(self, removed):
+        """Добавить размещения, опирающиеся (прямо или через другие) на удаляемые"""
+        removed_ids = {id(placement) for placement in removed}
+        result = list(removed)
+        for placement in sorted(self._state.placements(), key=lambda p: p.position[2]):
+            if id(placement) in removed_ids or placement.position[2] == 0:
+                continue
+            for other in result:
+                if (other.top == placement.position[2] and
+                        _overlap(other.position[0], other.width, placement.position[0], placement.width) and
+                        _overlap(other.position[1], other.height, placement.position[1], placement.height)):
+                    removed_ids.add(id(placement))
+                    result.append(placement)
+                    break
+        return result
+
+    def _recreate(self, items, deadline):
+        """Вставить предметы по убыванию объема (с небольшим шумом) в первую допустимую точку,
+        выбирая в ней самую низкую ориентацию; False, если бюджет времени кончился раньше"""
+        state = self._state
+        capacity = state.width * state.height * state.depth
+        order = sorted(items, key=lambda i: -_volume(i) * self._rng.uniform(1, 1 + ORDER_NOISE))
+        for item in order:
+            if time.perf_counter() >= deadline:
+                return False
+            position = None
+            if _volume(item) <= capacity - state.volume:
+                position = self._first_fit(item)
+            if position:
+                state.place(item, *position, item.weight)
+            else:
+                self._unpacked.append(item)
+        return True
+
+    def _first_fit(self, item):
+        state = self._state
+        packer = self.packer
+        for x, y, z in state.points():
+            fitting = []
+            for width, height, depth in packer._get_item_orientations(item):
+                probe = state.probe(x, y, z, width, height, depth)
+                if probe is not None and packer._accepts_placement(
+                        item, width, height, depth, x, y, z, probe[0], probe[2], state.weight):
+                    fitting.append((width, height, depth))
+            if fitting:
+                width, height, depth = min(fitting, key=lambda o: (o[2], -o[0] * o[1]))
+                return (x, y, z, width, height, depth)
+        return None
+
+    def _apply(self):
+        """Перенести размещения состояния в предметы и packer"""
+        packer = self.packer
+        bin_ = packer.bins[0]
+        placements = self._state.placements()
+        for placement in placements:
+            item = placement.item
+            item.width, item.height, item.depth = placement.width, placement.height, placement.depth
+            item.position = list(placement.position)
+        bin_.items = [placement.item for placement in placements]
+        packer.unpacked_items = self._unpacked
+
+        packer._ems = None
+        packer._collision = GeometricCollision(packer)
+        packer._free_volume = bin_.width * bin_.height * bin_.depth - self._state.volume
+        packer._placed_weight = self._state.weight
+        packer._invalidate_failures()
+
+    def _update_issues(self, initial_unpacked):
+        """Привести сообщения о неразмещенных предметах к итоговому состоянию"""
+        packer = self.packer
+        before = {id(item) for item in initial_unpacked}
+        after = {id(item) for item in packer.unpacked_items}
+        packed_now = {f"Не удалось разместить {item.name}" for item in initial_unpacked if id(item) not in after}
+        issues = []
+        for message in packer.packing_issues:
+            if message in packed_now:
+                packed_now.discard(message)
+                continue
+            issues.append(message)
+        issues.extend(
+            f"Не удалось разместить {item.name}" for item in packer.unpacked_items if id(item) not in before
+        )
+        packer.packing_issues = issues
+
+
+def improve_packing(packer, time_budget=1.0, max_iterations=None, seed=None):
+    """Улучшить упаковку после pack() за время time_budget (с); возвращает статистику"""
+    return RuinAndRecreate(packer, time_budget, max_iterations, seed).run()
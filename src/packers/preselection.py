@@ -0,0 +1,171 @@
+# src/packers/preselection.py
+"""Предварительный выбор коробок для упаковки (ограниченный рюкзак по весу и объему).
+
+Если коробки заказа тяжелее грузоподъемности или больше объема поддона, заранее
+выбирается подмножество с наибольшей ценностью (объем или приоритет коробки),
+которое укладывается в оба ограничения. Упаковщик размещает только его.
+
+Небольшие задачи решаются динамическим программированием по сетке вес x объем
+(размеры округляются вверх до ячейки, поэтому решение допустимо и в точных
+значениях), большие - жадно по удельной ценности с дозаполнением остатка.
+"""
+
+import numpy as np
+
+# Число ячеек сетки DP (вес x объем или одно измерение, если второе ограничение не нарушается)
+DP_GRID_CELLS = 40_000
+# DP используется, если (число частей после двоичного разбиения количеств) x (ячейки сетки) не больше
+DP_MAX_WORK = 4_000_000
+PRESELECT_MODES = ('volume', 'priority')
+
+
+def _split_quantity(quantity):
+    """Двоичное разбиение количества: 1, 2, 4, ..., остаток"""
+    parts, size = [], 1
+    while quantity > 0:
+        take = min(size, quantity)
+        parts.append(take)
+        quantity -= take
+        size *= 2
+    return parts
+
+
+def _axis_buckets(values, limit, cells):
+    """Число ячеек по оси: точная сетка для небольших целых значений, иначе cells"""
+    if float(limit).is_integer() and limit <= cells and all(float(value).is_integer() for value in values):
+        return int(limit)
+    return cells
+
+
+def _buckets(value, limit, buckets):
+    """Размер в ячейках сетки с округлением вверх"""
+    if limit <= 0:
+        return 0
+    return int(np.ceil(value / limit * buckets - 1e-9))
+
+
+def _fill_remaining(groups, counts, max_weight, max_volume):
+    """Дозаполнить остаток емкости коробками по убыванию ценности"""
+    weight = sum(group[0] * count for group, count in zip(groups, counts))
+    volume = sum(group[1] * count for group, count in zip(groups, counts))
+    for index in sorted(range(len(groups)), key=lambda i: -groups[i][2]):
+        item_weight, item_volume, _, quantity = groups[index]
+        while counts[index] < quantity and weight + item_weight <= max_weight and volume + item_volume <= max_volume:
+            counts[index] += 1
+            weight += item_weight
+            volume += item_volume
+    return counts
+
+
+def _select_dp(groups, max_weight, max_volume, weight_buckets, volume_buckets):
+    parts = []
+    for index, (item_weight, item_volume, value, quantity) in enumerate(groups):
+        for count in _split_quantity(quantity):
+            parts.append((
+                index, count,
+                _buckets(item_weight * count, max_weight, weight_buckets) if weight_buckets else 0,
+                _buckets(item_volume * count, max_volume, volume_buckets) if volume_buckets else 0,
+                value * count
+            ))
+
+    # best[w, v] - наибольшая ценность при занятых не более w и v ячейках
+    best = np.zeros((weight_buckets + 1, volume_buckets + 1))
+    taken = []
+    for _, _, w, v, value in parts:
+        take = np.zeros(best.shape, dtype=bool)
+        if w <= weight_buckets and v <= volume_buckets:
+            candidate = best[:best.shape[0] - w, :best.shape[1] - v] + value
+            target = best[w:, v:]
+            better = candidate > target
+            take[w:, v:] = better
+            best[w:, v:] = np.where(better, candidate, target)
+        taken.append(take)
+
+    counts = [0] * len(groups)
+    w, v = weight_buckets, volume_buckets
+    for (index, count, part_w, part_v, _), take in zip(reversed(parts), reversed(taken)):
+        if take[w, v]:
+            counts[index] += count
+            w -= part_w
+            v -= part_v
+    return counts
+
+
+def _select_greedy(groups, max_weight, max_volume):
+    def density(group):
+        item_weight, item_volume, value, _ = group
+        load = item_weight / max_weight + item_volume / max_volume
+        return value / load if load > 0 else float('inf')
+
+    counts = [0] * len(groups)
+    weight = volume = 0
+    for index in sorted(range(len(groups)), key=lambda i: -density(groups[i])):
+        item_weight, item_volume, _, quantity = groups[index]
+        fits = quantity
+        if item_weight > 0:
+            fits = min(fits, int((max_weight - weight) // item_weight))
+        if item_volume > 0:
+            fits = min(fits, int((max_volume - volume) // item_volume))
+        fits = max(fits, 0)
+        counts[index] = fits
+        weight += item_weight * fits
+        volume += item_volume * fits
+    return counts
+
+
+def select_counts(groups, max_weight, max_volume):
+    """Сколько коробок каждой группы взять; groups - (вес, объем, ценность, количество)"""
+    total_weight = sum(w * q for w, _, _, q in groups)
+    total_volume = sum(v * q for _, v, _, q in groups)
+    if total_weight <= max_weight and total_volume <= max_volume:
+        return [quantity for *_, quantity in groups]
+
+    # Коробки, не проходящие по одному из ограничений, в выборе не участвуют
+    usable = [
+        (w, v, value, q) if w <= max_weight and v <= max_volume else (w, v, value, 0)
+        for w, v, value, q in groups
+    ]
+    # Ограничение, которое не может нарушиться, не требует измерения сетки
+    weight_binding, volume_binding = total_weight > max_weight, total_volume > max_volume
+    cells = DP_GRID_CELLS if weight_binding != volume_binding else int(DP_GRID_CELLS ** 0.5)
+    weight_buckets = _axis_buckets([w for w, *_ in usable], max_weight, cells) if weight_binding else 0
+    volume_buckets = _axis_buckets([v for _, v, *_ in usable], max_volume, cells) if volume_binding else 0
+    parts = sum(len(_split_quantity(q)) for *_, q in usable)
+    if parts * (weight_buckets + 1) * (volume_buckets + 1) <= DP_MAX_WORK:
+        counts = _select_dp(usable, max_weight, max_volume, weight_buckets, volume_buckets)
+    else:
+        counts = _select_greedy(usable, max_weight, max_volume)
+    return _fill_remaining(usable, counts, max_weight, max_volume)
+
+
+def _type_key(item):
+    box_type = getattr(item, 'box_type', None)
+    if box_type is not None:
+        return box_type
+    return (item.width, item.height, item.depth, item.weight, getattr(item, 'priority', 1))
+
+
+def select_items(items, max_weight, max_volume, mode='volume'):
+    """Разделить предметы на выбранные для упаковки и исключенные (порядок сохраняется)"""
+    if mode not in PRESELECT_MODES:
+        raise ValueError(f"Неизвестный режим выбора коробок: {mode}. Доступны: {', '.join(PRESELECT_MODES)}")
+
+    groups = {}
+    for item in items:
+        groups.setdefault(_type_key(item), []).append(item)
+
+    members = list(groups.values())
+    specs = []
+    for group in members:
+        item = group[0]
+        volume = item.width * item.height * item.depth
+        value = getattr(item, 'priority', 1) if mode == 'priority' else volume
+        specs.append((item.weight, volume, value, len(group)))
+
+    selected_ids = set()
+    for group, count in zip(members, select_counts(specs, max_weight, max_volume)):
+        selected_ids.update(id(item) for item in group[:count])
+
+    selected = [item for item in items if id(item) in selected_ids]
+    excluded = [item for item in items if id(item) not in selected_ids]
+    return selected, excluded
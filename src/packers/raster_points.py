@@ -0,0 +1,114 @@
+# src/packers/raster_points.py
+"""Кандидатные позиции на основе нормальных паттернов и сокращенных растровых точек.
+
+Нормальный паттерн по оси - координата, которую можно получить как сумму
+размеров коробок заказа (каждый размер берется любое число раз). Левый/нижний
+край любой коробки в плотной укладке можно сдвинуть к такой координате, поэтому
+проверять другие позиции не нужно. Сокращенные растровые точки (Scheithauer)
+оставляют из них только те, что не уступают симметричным позициям от дальней стенки.
+"""
+
+from bisect import bisect_right
+
+
+def normal_patterns(sizes, capacity):
+    """Все суммы размеров sizes (с повторениями) от 0 до capacity включительно.
+
+    Размеры и capacity - неотрицательные целые. Множество достижимых сумм хранится
+    битами одного целого числа Python: бит k установлен, если сумма k достижима.
+    """
+    if capacity < 0:
+        return []
+
+    mask = (1 << (capacity + 1)) - 1
+    reachable = 1
+    for size in sorted(set(sizes)):
+        if size <= 0 or size > capacity:
+            continue
+        # Неограниченный рюкзак: добавляем размер, пока появляются новые суммы
+        frontier = reachable
+        while frontier:
+            frontier = (frontier << size) & mask & ~reachable
+            reachable |= frontier
+
+    # Номера установленных битов (в строке bin младший бит - последний символ)
+    return [position for position, bit in enumerate(reversed(bin(reachable))) if bit == '1']
+
+
+def reduced_raster_points(patterns, length, min_size):
+    """Сокращенные растровые точки {<L - s> : s - паттерн, s >= min_size}, где <x> -
+    наибольшая позиция-паттерн, не превышающая x, а позиции - паттерны до L - min_size.
+
+    Коробку, справа от которой лежат коробки общей длиной r, можно прижать к дальней
+    стенке (s = ее длина + r), а затем обратно влево до ближайшего паттерна.
+    """
+    positions = [pattern for pattern in patterns if pattern <= length - min_size]
+    if not positions:
+        return []
+
+    points = set()
+    for pattern in patterns:
+        if pattern < min_size:
+            continue
+        index = bisect_right(positions, length - pattern) - 1
+        if index >= 0:
+            points.add(positions[index])
+    return sorted(points)
+
+
+def axis_candidates(sizes, length, resolution=1, reduced=True):
+    """Кандидатные координаты вдоль оси длиной length для размеров sizes"""
+    units = [int(round(size / resolution)) for size in sizes if size > 0]
+    if not units:
+        return [0]
+    capacity = int(length // resolution)
+    min_size = min(units)
+    patterns = normal_patterns(units, capacity)
+    if reduced:
+        positions = reduced_raster_points(patterns, capacity, min_size)
+    else:
+        # Коробка должна помещаться справа от позиции
+        positions = [pattern for pattern in patterns if pattern <= capacity - min_size]
+    return [position * resolution for position in positions]
+
+
+class CandidateLattice:
+    """Решетка кандидатных позиций на основании поддона для конкретного заказа"""
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.ys = ys
+
+    @classmethod
+    def from_items(cls, items, bin_width, bin_height, allow_rotation=True, resolution=1, reduced=True):
+        """Решетка по размерам всех различных коробок заказа"""
+        x_sizes, y_sizes = set(), set()
+        for dimensions in {(item.width, item.height, item.depth) for item in items}:
+            if allow_rotation:
+                # Любая сторона может оказаться вдоль любой оси
+                x_sizes.update(dimension for dimension in dimensions if dimension <= bin_width)
+                y_sizes.update(dimension for dimension in dimensions if dimension <= bin_height)
+            else:
+                x_sizes.add(dimensions[0])
+                y_sizes.add(dimensions[1])
+
+        return cls(
+            axis_candidates(x_sizes, bin_width, resolution, reduced),
+            axis_candidates(y_sizes, bin_height, resolution, reduced)
+        )
+
+    def positions(self, z=0):
+        """Все точки решетки на высоте z в порядке (x + y, x)"""
+        points = [(x, y, z) for x in self.xs for y in self.ys]
+        points.sort(key=lambda point: (point[0] + point[1], point[0]))
+        return points
+
+    def __len__(self):
+        return len(self.xs) * len(self.ys)
+
+
+def drop_covered(points, item):
+    """Точки на полу вне основания предмета (точка под предметом не годится ни для одной коробки)"""
+    x, y = item.position[0], item.position[1]
+    right, back = x + item.width, y + item.height
+    return [point for point in points if not (x <= point[0] < right and y <= point[1] < back)]
@@ -1,10 +1,14 @@
 from .base_packer import BasePacker
+from .raster_points import CandidateLattice, drop_covered
 import math
 
 class SFCPacker(BasePacker):
-    def __init__(self):
+    def __init__(self, use_raster_points=False):
         super().__init__()
         self.grid_size = 15
+        # Позиции на полу из растровых точек размеров коробок вместо спирали с шагом grid_size
+        self.use_raster_points = use_raster_points
+        self._spiral_positions = []
 
     def pack(self):
         self._start_timing()
@@ -12,20 +16,32 @@ class SFCPacker(BasePacker):
             return
 
         sorted_items = sorted(
-            self.items,
+            self._items_to_pack(),
             key=lambda x: (-x.weight, -(x.width * x.height * x.depth))
         )
+        self._record_order(sorted_items)
+
+        # Спиральные позиции зависят только от размеров поддона
+        if self.use_raster_points:
+            self._spiral_positions = self._get_raster_positions()
+        else:
+            self._spiral_positions = self._get_spiral_positions()
 
         for item in sorted_items:
+            if self._is_known_failure(item):
+                self._reject_item(item)
+                continue
+
+            # Позиции спирали и по четыре точки на верхней грани каждого предмета
+            candidates = len(self._spiral_positions) + 4 * len(self.bins[0].items)
             best_position = self._find_spiral_position_safe(item)
             if best_position:
-                x, y, z, width, height, depth = best_position
-                item.width, item.height, item.depth = width, height, depth
-                item.position = [x, y, z]
-                self.bins[0].items.append(item)
+                self._place_item(item, *best_position, candidates=candidates)
+                self._retain_failures(item, self._top_surface_points(item))
+                if self.use_raster_points and item.position[2] == 0:
+                    self._spiral_positions = drop_covered(self._spiral_positions, item)
             else:
-                self.unpacked_items.append(item)
-                self.packing_issues.append(f"Не удалось разместить {item.name}")
+                self._reject_item(item, candidates)
 
         self._end_timing()
 
@@ -33,7 +49,7 @@ class SFCPacker(BasePacker):
         best_position = None
         min_height = float('inf')
 
-        for x, y in self._get_spiral_positions():
+        for x, y in self._spiral_positions:
             for width, height, depth in self._get_item_orientations(item):
                 if self._can_place_item_safe(item, width, height, depth, x, y, 0):
                     return (x, y, 0, width, height, depth)
@@ -60,30 +76,44 @@ class SFCPacker(BasePacker):
 
         return best_position
 
+    def _accepts_placement(self, item, width, height, depth, x, y, z, support, supporters, placed_weight):
+        # Как в _can_place_item_safe: выше пола - только опора, на полу - только вес
+        if z > 0:
+            return self._supports_item(item, width, height, x, y, z, support * width * height, supporters)
+        return placed_weight + item.weight <= self._max_weight
+
     def _can_place_item_safe(self, item, width, height, depth, x, y, z):
         if (x + width > self.bins[0].width or
             y + height > self.bins[0].height or
             z + depth > self.bins[0].depth):
             return False
 
-        for other in self.bins[0].items:
-            if self._check_intersection_orientation(
-                x, y, z, width, height, depth,
-                other.position[0], other.position[1], other.position[2],
-                other.width, other.height, other.depth
-            ):
-                return False
+        if self._collides(x, y, z, width, height, depth):
+            return False
 
         if z > 0:
-            return self._check_support_orientation(width, height, depth, x, y, z, 0.5)
+            return self._check_item_support(item, width, height, x, y, z)
 
         if not self._check_weight_limit(item.weight):
             return False
 
         return True
 
+    def _get_raster_positions(self):
+        """Растровые точки в порядке удаления от центра поддона (как у спирали)"""
+        lattice = CandidateLattice.from_items(
+            self.items, self.bins[0].width, self.bins[0].height, self.allow_rotation
+        )
+        center_x = self.bins[0].width / 2
+        center_y = self.bins[0].height / 2
+        return sorted(
+            ((x, y) for x in lattice.xs for y in lattice.ys),
+            key=lambda p: ((p[0] - center_x) ** 2 + (p[1] - center_y) ** 2, p)
+        )
+
     def _get_spiral_positions(self):
         positions = []
+        step = self.scale.length(self.grid_size)
         center_x = int(self.bins[0].width // 2)
         center_y = int(self.bins[0].height // 2)
 
@@ -91,9 +121,9 @@ class SFCPacker(BasePacker):
 
         max_radius = int(min(center_x, center_y))
 
-        for radius in range(self.grid_size, max_radius, self.grid_size):
+        for radius in range(step, max_radius, step):
             circumference = 2 * math.pi * radius
-            num_points = max(8, int(circumference / self.grid_size))
+            num_points = max(8, int(circumference / step))
 
             for i in range(num_points):
                 angle = 2 * math.pi * i / num_points
@@ -106,17 +136,17 @@ class SFCPacker(BasePacker):
 
         corner_positions = [
             (0, 0),
-            (int(self.bins[0].width) - self.grid_size, 0),
-            (0, int(self.bins[0].height) - self.grid_size),
-            (int(self.bins[0].width) - self.grid_size, int(self.bins[0].height) - self.grid_size)
+            (int(self.bins[0].width) - step, 0),
+            (0, int(self.bins[0].height) - step),
+            (int(self.bins[0].width) - step, int(self.bins[0].height) - step)
         ]
 
         for x, y in corner_positions:
             if (x, y) not in positions and x >= 0 and y >= 0:
                 positions.append((x, y))
 
-        for x in range(0, int(self.bins[0].width), self.grid_size * 2):
-            for y in range(0, int(self.bins[0].height), self.grid_size * 2):
+        for x in range(0, int(self.bins[0].width), step * 2):
+            for y in range(0, int(self.bins[0].height), step * 2):
                 if (x, y) not in positions:
                     positions.append((x, y))
 
@@ -0,0 +1,312 @@
+# src/packers/state.py
+"""Состояние поддона с копированием при записи и журналом отмены.
+
+Размещение в py3dbp меняет сами предметы (размеры, position) и bins[0].items, поэтому
+поиску с ветвлениями (лучевой поиск, улучшение упаковки) приходилось копировать предметы.
+PackingState хранит размещения отдельно от предметов:
+- Placement - неизменяемая запись (предмет, позиция, размеры, вес), ее можно разделять
+  между ветвями; атрибуты совпадают с py3dbp.Item, поэтому к ней применимы проверки опоры;
+- пространственный индекс - сетка GRID_DIVISIONS x GRID_DIVISIONS по основанию поддона,
+  ячейка хранит кортеж размещений, чье основание ее касается (пока размещений не больше
+  SCAN_LIMIT, поиск соседей перебирает все - так быстрее);
+- точки-кандидаты (начало координат и углы размещенных предметов) в тех же ячейках;
+- все размещения - связный список (placement, предыдущие) в порядке размещения: и
+  добавление, и откат - замена головы за O(1), ветви разделяют общий хвост; убранные
+  размещения не вырезаются из списка сразу, а попадают в множество _removed - до commit();
+- число размещений по верхним отметкам (для верхней отметки без полного перебора);
+- агрегаты: объем, вес, верхняя отметка, суммы опоры и контакта, хеш состояния.
+
+fork() за O(1) создает ветвь, разделяющую словари ячеек с родителем: при первой записи
+ветвь копирует словари (число ячеек постоянно, убранных размещений - не больше изменений
+до commit()), значения ячеек неизменяемы.
+mark() и rollback() откатывают изменения состояния за O(числа изменений) по журналу;
+commit() принимает изменения: очищает журнал и вырезает убранные размещения из списка.
+"""
+
+import math
+
+# Число ячеек пространственного индекса по каждой оси основания
+GRID_DIVISIONS = 8
+# До стольких размещений перебор всех быстрее обхода ячеек индекса
+SCAN_LIMIT = 200
+
+
+class Placement:
+    """Размещенный предмет: item - предмет или его идентификатор, position - [x, y, z],
+    support и contact - доли опоры и контакта в момент размещения"""
+    __slots__ = ('item', 'position', 'width', 'height', 'depth', 'weight', 'type_id', 'support', 'contact', 'sequence')
+
+    def __init__(self, item, x, y, z, width, height, depth, weight, type_id=0, support=0, contact=0, sequence=0):
+        self.item = item
+        self.position = [x, y, z]
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.weight = weight
+        self.type_id = type_id
+        self.support = support
+        self.contact = contact
+        self.sequence = sequence
+
+    @property
+    def top(self):
+        return self.position[2] + self.depth
+
+    def key(self):
+        """Вклад в хеш состояния: тип предмета, позиция и ориентация"""
+        return hash((self.type_id, *self.position, self.width, self.height, self.depth))
+
+
+class PackingState:
+    """Размещения на поддоне, пространственный индекс, точки-кандидаты и агрегаты"""
+
+    def __init__(self, width, height, depth):
+        self.width, self.height, self.depth = width, height, depth
+        self._cell_width = max(1, math.ceil(width / GRID_DIVISIONS))
+        self._cell_height = max(1, math.ceil(height / GRID_DIVISIONS))
+        self._cells = {}
+        self._all = None
+        self._removed = set()
+        self._tops = {}
+        self._point_cells = {self._cell_of(0, 0): frozenset({(0, 0, 0)})}
+        self._shared = False
+        self._log = []
+        self._sequence = 0
+        self.count = 0
+        self.volume = 0
+        self.weight = 0
+        self.top = 0
+        self.support = 0
+        self.contact = 0
+        self.key = 0
+
+    @classmethod
+    def from_items(cls, bin_, items):
+        """Состояние с уже размещенными предметами py3dbp (например, после pack())"""
+        state = cls(bin_.width, bin_.height, bin_.depth)
+        for item in items:
+            state.place(item, *item.position, item.width, item.height, item.depth, item.weight)
+        state.commit()
+        return state
+
+    # Ветвление и откат
+
+    def fork(self):
+        """Новая ветвь; словари ячеек копируются только при первой записи"""
+        child = PackingState.__new__(PackingState)
+        child.__dict__.update(self.__dict__)
+        child._log = []
+        child._shared = self._shared = True
+        return child
+
+    def mark(self):
+        """Точка отката для rollback()"""
+        return len(self._log)
+
+    def rollback(self, mark=0):
+        """Отменить изменения, сделанные после mark()"""
+        self._own()
+        while len(self._log) > mark:
+            kind, key, value = self._log.pop()
+            if kind in self._INDEXES:
+                self._set(getattr(self, self._INDEXES[kind]), key, value)
+            elif kind == 'all':
+                self._all = value
+            elif kind == 'removed':
+                self._removed.discard(key)
+            else:
+                (self.count, self.volume, self.weight, self.top, self.support,
+                 self.contact, self.key, self._sequence) = value
+
+    def commit(self):
+        """Принять изменения: откат к прежним отметкам становится невозможен"""
+        self._own()
+        if self._removed:
+            node = None
+            for placement in self.placements():
+                node = (placement, node)
+            self._all = node
+            self._removed = set()
+        self._log = []
+
+    def _own(self):
+        if self._shared:
+            self._cells = dict(self._cells)
+            self._point_cells = dict(self._point_cells)
+            self._tops = dict(self._tops)
+            self._removed = set(self._removed)
+            self._shared = False
+
+    @staticmethod
+    def _set(cells, key, value):
+        if value:
+            cells[key] = value
+        else:
+            cells.pop(key, None)
+
+    # Словари, изменения которых пишутся в журнал: вид записи -> атрибут
+    _INDEXES = {'cell': '_cells', 'points': '_point_cells', 'tops': '_tops'}
+
+    def _write(self, kind, key, value):
+        cells = getattr(self, self._INDEXES[kind])
+        self._log.append((kind, key, cells.get(key)))
+        self._set(cells, key, value)
+
+    def _save_aggregates(self):
+        self._log.append(('aggregates', None, (
+            self.count, self.volume, self.weight, self.top, self.support, self.contact, self.key, self._sequence
+        )))
+
+    # Пространственный индекс
+
+    def _cell_of(self, x, y):
+        return (
+            min(int(x // self._cell_width), GRID_DIVISIONS - 1),
+            min(int(y // self._cell_height), GRID_DIVISIONS - 1)
+        )
+
+    def _cells_for(self, x, y, width, height):
+        """Ячейки, которых касается основание (включая границы - для поиска соседей)"""
+        last = GRID_DIVISIONS - 1
+        first_x = min(int(x // self._cell_width), last)
+        first_y = min(int(y // self._cell_height), last)
+        last_x = min(int((x + width) // self._cell_width), last)
+        last_y = min(int((y + height) // self._cell_height), last)
+        return [(cx, cy) for cx in range(first_x, last_x + 1) for cy in range(first_y, last_y + 1)]
+
+    def _iter_all(self):
+        """Все размещения от последнего к первому"""
+        node, removed = self._all, self._removed
+        while node is not None:
+            placement, node = node
+            if placement not in removed:
+                yield placement
+
+    def near(self, x, y, width, height):
+        """Размещения, чье основание может пересекать или касаться прямоугольника (без порядка)"""
+        if self.count <= SCAN_LIMIT:
+            return self._iter_all()
+        cells = self._cells_for(x, y, width, height)
+        if len(cells) == 1:
+            return self._cells.get(cells[0], ())
+        found = set()
+        for cell in cells:
+            found.update(self._cells.get(cell, ()))
+        return found
+
+    def placements(self):
+        """Все размещения в порядке размещения"""
+        placements = list(self._iter_all())
+        placements.reverse()
+        return placements
+
+    def points(self):
+        """Точки-кандидаты снизу вверх"""
+        points = set()
+        for cell_points in self._point_cells.values():
+            points |= cell_points
+        return sorted(points, key=lambda p: (p[2], p[1], p[0]))
+
+    # Проверка и изменение
+
+    def probe(self, x, y, z, width, height, depth):
+        """None, если область выходит за поддон или пересекает предметы, иначе
+        (доля опоры, доля контакта, опорные размещения).
+
+        Опора - доля основания на верхних гранях предметов (1 на полу), контакт - доля
+        поверхности, касающейся стенок поддона, соседей и опоры.
+        """
+        if x + width > self.width or y + height > self.height or z + depth > self.depth:
+            return None
+        supported = 0
+        contact = height * depth * ((x == 0) + (x + width == self.width))
+        contact += width * depth * ((y == 0) + (y + height == self.height))
+        supporters = []
+        for other in self.near(x, y, width, height):
+            ox, oy, oz = other.position
+            ow, oh, od = other.width, other.height, other.depth
+            # Предметы той же ячейки, которые не пересекаются и не касаются области
+            if ox > x + width or x > ox + ow or oy > y + height or y > oy + oh or oz > z + depth or z > oz + od:
+                continue
+            overlap_x = min(x + width, ox + ow) - max(x, ox)
+            overlap_y = min(y + height, oy + oh) - max(y, oy)
+            overlap_z = min(z + depth, oz + od) - max(z, oz)
+            if overlap_x > 0 and overlap_y > 0:
+                if overlap_z > 0:
+                    return None
+                if oz + od == z:
+                    supported += overlap_x * overlap_y
+                    supporters.append(other)
+            elif overlap_z > 0:
+                if overlap_y > 0 and overlap_x == 0:
+                    contact += overlap_y * overlap_z
+                elif overlap_x > 0 and overlap_y == 0:
+                    contact += overlap_x * overlap_z
+        base = width * height
+        support = 1.0 if z == 0 else supported / base
+        surface = 2 * (base + width * depth + height * depth)
+        return support, (contact + support * base) / surface, supporters
+
+    def place(self, item, x, y, z, width, height, depth, weight, type_id=0, support=0, contact=0):
+        """Разместить предмет; возвращает Placement"""
+        self._own()
+        self._save_aggregates()
+        placement = Placement(item, x, y, z, width, height, depth, weight, type_id, support, contact, self._sequence)
+        self._sequence += 1
+        for cell in self._cells_for(x, y, width, height):
+            self._write('cell', cell, self._cells.get(cell, ()) + (placement,))
+        self._log.append(('all', None, self._all))
+        self._all = (placement, self._all)
+        self._write('tops', z + depth, self._tops.get(z + depth, 0) + 1)
+
+        # Точки внутри предмета больше не нужны, добавляются три его угла
+        for cell in self._cells_for(x, y, width, height):
+            points = self._point_cells.get(cell)
+            if points:
+                inside = {
+                    p for p in points
+                    if x <= p[0] < x + width and y <= p[1] < y + height and z <= p[2] < z + depth
+                }
+                if inside:
+                    self._write('points', cell, points - inside)
+        for point in ((x + width, y, z), (x, y + height, z), (x, y, z + depth)):
+            if point[0] < self.width and point[1] < self.height and point[2] < self.depth:
+                self._add_point(point)
+
+        self.count += 1
+        self.volume += width * height * depth
+        self.weight += weight
+        self.top = max(self.top, z + depth)
+        self.support += support
+        self.contact += contact
+        self.key ^= placement.key()
+        return placement
+
+    def remove(self, placement):
+        """Убрать размещение; его начало снова становится точкой-кандидатом"""
+        self._own()
+        self._save_aggregates()
+        x, y, _ = placement.position
+        for cell in self._cells_for(x, y, placement.width, placement.height):
+            entries = self._cells.get(cell, ())
+            self._write('cell', cell, tuple(entry for entry in entries if entry is not placement))
+        self._log.append(('removed', placement, None))
+        self._removed.add(placement)
+        top = placement.top
+        self._write('tops', top, self._tops[top] - 1)
+        self._add_point(tuple(placement.position))
+
+        self.count -= 1
+        self.volume -= placement.width * placement.height * placement.depth
+        self.weight -= placement.weight
+        self.support -= placement.support
+        self.contact -= placement.contact
+        if top == self.top and top not in self._tops:
+            self.top = max(self._tops, default=0)
+        self.key ^= placement.key()
+
+    def _add_point(self, point):
+        cell = self._cell_of(point[0], point[1])
+        points = self._point_cells.get(cell, frozenset())
+        if point not in points:
+            self._write('points', cell, points | {point})
@@ -0,0 +1,259 @@
+# src/packers/trace.py
+"""Бинарная трасса упаковки и ее воспроизведение без повторного расчета.
+
+Формат (little-endian):
+    заголовок   'PPTR', версия u16, флаг seed u8, seed i64,
+                размеры поддона 3×f64, max_weight f64,
+                число предметов u32, длина порядка u32, число событий u32,
+                длина имени метода u16 и имя (utf-8)
+    предметы    длина имени u16, имя, ширина/высота/глубина/вес 4×f64
+    порядок     индексы предметов u32 в порядке обработки
+    события     по 34 байта: тип u8, индекс предмета u32, индекс ориентации u8,
+                x/y/z 3×f64, число рассмотренных кандидатов u32
+
+Запуск:
+    python -m src.packers.trace plan.pptr --steps
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+
+from py3dbp import Bin, Item
+
+MAGIC = b'PPTR'
+VERSION = 1
+
+EVENT_PLACED = 1
+EVENT_REJECTED = 0
+NO_ORIENTATION = 255
+
+# Перестановки исходных размеров (ширина, высота, глубина) в порядке _get_item_orientations
+ORIENTATION_PERMUTATIONS = (
+    (0, 1, 2),
+    (1, 0, 2),
+    (2, 1, 0),
+    (1, 2, 0),
+    (0, 2, 1),
+    (2, 0, 1)
+)
+
+_HEADER = struct.Struct('<4sHBq4dIIIH')
+_ITEM = struct.Struct('<4d')
+_NAME_LENGTH = struct.Struct('<H')
+_INDEX = struct.Struct('<I')
+_EVENT = struct.Struct('<BIBdddI')
+
+
+def orientation_index(dimensions, placed_dimensions):
+    """Индекс перестановки, переводящей исходные размеры в размеры размещения"""
+    for index, permutation in enumerate(ORIENTATION_PERMUTATIONS):
+        if all(dimensions[axis] == placed for axis, placed in zip(permutation, placed_dimensions)):
+            return index
+    raise ValueError(f"Размеры {placed_dimensions} не являются поворотом {dimensions}")
+
+
+def apply_orientation(dimensions, index):
+    permutation = ORIENTATION_PERMUTATIONS[index]
+    return tuple(dimensions[axis] for axis in permutation)
+
+
+class PackingTrace:
+    """Содержимое трассы: поддон, таблица предметов, порядок и события"""
+
+    def __init__(self, method, seed, bin_dimensions, max_weight, items, order=None, events=None):
+        self.method = method
+        self.seed = seed
+        self.bin_dimensions = tuple(bin_dimensions)
+        self.max_weight = max_weight
+        # (имя, ширина, высота, глубина, вес) до упаковки
+        self.items = items
+        self.order = order or []
+        # (тип, индекс предмета, индекс ориентации, x, y, z, кандидаты)
+        self.events = events or []
+
+    def write(self, path):
+        name = self.method.encode('utf-8')
+        chunks = [_HEADER.pack(
+            MAGIC, VERSION, self.seed is not None, self.seed or 0,
+            *self.bin_dimensions, self.max_weight,
+            len(self.items), len(self.order), len(self.events), len(name)
+        ), name]
+
+        for item_name, width, height, depth, weight in self.items:
+            encoded = item_name.encode('utf-8')
+            chunks.append(_NAME_LENGTH.pack(len(encoded)))
+            chunks.append(encoded)
+            chunks.append(_ITEM.pack(width, height, depth, weight))
+
+        chunks.extend(_INDEX.pack(index) for index in self.order)
+        chunks.extend(_EVENT.pack(*event) for event in self.events)
+
+        with open(path, 'wb') as f:
+            f.write(b''.join(chunks))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        (magic, version, has_seed, seed, width, height, depth, max_weight,
+         item_count, order_count, event_count, name_length) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: не является трассой упаковки")
+        if version != VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия трассы {version}")
+
+        offset = _HEADER.size
+        method = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+
+        items = []
+        for _ in range(item_count):
+            (length,) = _NAME_LENGTH.unpack_from(data, offset)
+            offset += _NAME_LENGTH.size
+            item_name = data[offset:offset + length].decode('utf-8')
+            offset += length
+            items.append((item_name, *_ITEM.unpack_from(data, offset)))
+            offset += _ITEM.size
+
+        order = [index for (index,) in _INDEX.iter_unpack(data[offset:offset + order_count * _INDEX.size])]
+        offset += order_count * _INDEX.size
+
+        events = list(_EVENT.iter_unpack(data[offset:offset + event_count * _EVENT.size]))
+
+        return cls(method, seed if has_seed else None, (width, height, depth), max_weight, items, order, events)
+
+
+class TraceRecorder:
+    """Запись трассы во время упаковки"""
+
+    def __init__(self, packer, seed):
+        bin_ = packer.bins[0]
+        self.trace = PackingTrace(
+            type(packer).__name__, seed,
+            (float(bin_.width), float(bin_.height), float(bin_.depth)),
+            float(getattr(bin_, 'max_weight', 0)),
+            [
+                (item.name, float(item.width), float(item.height), float(item.depth), float(item.weight))
+                for item in packer.items
+            ]
+        )
+        self._indexes = {id(item): index for index, item in enumerate(packer.items)}
+
+    def record_order(self, items):
+        self.trace.order = [self._indexes[id(item)] for item in items]
+
+    def record_placement(self, item, x, y, z, width, height, depth, candidates):
+        index = self._indexes[id(item)]
+        orientation = orientation_index(self.trace.items[index][1:4], (width, height, depth))
+        self.trace.events.append((EVENT_PLACED, index, orientation, x, y, z, candidates))
+
+    def record_rejection(self, item, candidates):
+        self.trace.events.append((EVENT_REJECTED, self._indexes[id(item)], NO_ORIENTATION, 0.0, 0.0, 0.0, candidates))
+
+
+class ReplayedPlan:
+    """Итоговый план из трассы с интерфейсом packer'а для визуализации и отчетов"""
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.bins = []
+        self.items = []
+        self.unpacked_items = []
+        self.steps = []
+        self.calculation_time = 0
+
+
+def replay_trace(trace):
+    """Восстановить план и пошаговые метрики из трассы (объекта или пути к файлу)"""
+    if not isinstance(trace, PackingTrace):
+        trace = PackingTrace.read(trace)
+
+    started = time.perf_counter()
+    plan = ReplayedPlan(trace)
+    width, height, depth = trace.bin_dimensions
+    bin_ = Bin('Поддон', width, height, depth, trace.max_weight)
+    plan.bins.append(bin_)
+    plan.items = [Item(name, w, h, d, weight) for name, w, h, d, weight in trace.items]
+
+    bin_volume = width * height * depth
+    packed_volume = 0.0
+    packed_weight = 0.0
+    max_height = 0.0
+
+    for step, (kind, index, orientation, x, y, z, candidates) in enumerate(trace.events):
+        item = plan.items[index]
+        entry = {'step': step, 'item': item.name, 'candidates': candidates}
+
+        if kind == EVENT_PLACED:
+            w, h, d = apply_orientation(trace.items[index][1:4], orientation)
+            item.width, item.height, item.depth = w, h, d
+            item.position = [x, y, z]
+            bin_.items.append(item)
+
+            packed_volume += w * h * d
+            packed_weight += item.weight
+            max_height = max(max_height, z + d)
+            entry.update({
+                'placed': True,
+                'position': [x, y, z],
+                'dimensions': [w, h, d],
+                'orientation': orientation
+            })
+        else:
+            plan.unpacked_items.append(item)
+            entry['placed'] = False
+
+        entry.update({
+            'packed_items': len(bin_.items),
+            'utilization': round(packed_volume / bin_volume * 100, 2) if bin_volume > 0 else 0,
+            'packed_weight': round(packed_weight, 2),
+            'max_height': max_height
+        })
+        plan.steps.append(entry)
+
+    plan.calculation_time = time.perf_counter() - started
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Воспроизведение трассы упаковки')
+    parser.add_argument('trace', help='Файл трассы')
+    parser.add_argument('--steps', action='store_true', help='Вывести пошаговые метрики')
+    parser.add_argument('--output', help='Файл для JSON с планом и шагами')
+    args = parser.parse_args(argv)
+
+    trace = PackingTrace.read(args.trace)
+    plan = replay_trace(trace)
+    bin_ = plan.bins[0]
+
+    print(f"Метод: {trace.method}, seed: {trace.seed}")
+    print(f"Поддон: {' x '.join(f'{value:g}' for value in trace.bin_dimensions)}, "
+          f"предметов: {len(trace.items)}, событий: {len(trace.events)}")
+    if args.steps:
+        for entry in plan.steps:
+            placement = (f"{entry['position']} {entry['dimensions']}" if entry['placed'] else 'не размещен')
+            print(f"{entry['step']:>5} {entry['item']:<24} {placement:<40} "
+                  f"кандидатов {entry['candidates']:>5}  заполнение {entry['utilization']:>6.2f}%")
+    last = plan.steps[-1] if plan.steps else {'utilization': 0, 'packed_weight': 0}
+    print(f"Упаковано: {len(bin_.items)}/{len(plan.items)}, заполнение {last['utilization']}%, "
+          f"вес {last['packed_weight']}, воспроизведение {plan.calculation_time * 1000:.1f} мс")
+
+    if args.output:
+        report = {
+            'method': trace.method,
+            'seed': trace.seed,
+            'bin': list(trace.bin_dimensions),
+            'order': [trace.items[index][0] for index in trace.order],
+            'steps': plan.steps
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# src/packers/units.py
+"""Целочисленные внутренние единицы длины.
+
+Размеры поддона и коробок при вводе переводятся в целые единицы 10^-k см, где k - наибольшее
+число знаков после запятой среди размеров (сантиметры, если все размеры целые): в таких
+единицах каждый размер - точно целое число. Если знаков больше MAX_DECIMALS, размеры
+округляются так, чтобы упаковка оставалась допустимой: коробки - вверх, поддон - вниз,
+а CoordinateScale.restore возвращает исходные размеры, а не округленные.
+Упаковщики сравнивают координаты точно, без допусков; после упаковки restore
+возвращает размеры и позиции в сантиметрах.
+"""
+
+import math
+from decimal import Decimal
+
+# Наибольшая точность внутренних единиц: 10^-MAX_DECIMALS см
+MAX_DECIMALS = 4
+# Допуск, с которым размер считается целым в выбранных единицах
+INTEGRAL_TOLERANCE = 1e-6
+
+
+def _decimals(value):
+    """Знаков после запятой в кратчайшей десятичной записи числа"""
+    exponent = Decimal(repr(float(value))).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+
+class CoordinateScale:
+    """Перевод длин из сантиметров во внутренние целые единицы и обратно"""
+
+    def __init__(self, units_per_cm=1):
+        self.units_per_cm = units_per_cm
+        # Исходные размеры в см для округленных значений: коробки (вверх) и поддон (вниз)
+        self._rounded_up = {}
+        self._rounded_down = {}
+
+    @classmethod
+    def for_values(cls, values):
+        """Наименьший масштаб 10^k единиц на см, в котором все значения целые (k <= MAX_DECIMALS)"""
+        decimals = max((_decimals(value) for value in values), default=0)
+        return cls(10 ** min(decimals, MAX_DECIMALS))
+
+    @property
+    def is_identity(self):
+        return self.units_per_cm == 1
+
+    def to_internal(self, value, round_up=True):
+        """Длина в сантиметрах -> целые внутренние единицы. Не кратные единице длины
+        округляются вверх (размеры коробок) или при round_up=False вниз (размеры поддона)"""
+        scaled = float(value) * self.units_per_cm
+        nearest = round(scaled)
+        if math.isclose(scaled, nearest, rel_tol=1e-12, abs_tol=INTEGRAL_TOLERANCE):
+            return int(nearest)
+        if round_up:
+            internal = math.ceil(scaled)
+            self._rounded_up.setdefault(internal, float(value))
+        else:
+            internal = math.floor(scaled)
+            self._rounded_down.setdefault(internal, float(value))
+        return internal
+
+    def to_cm(self, value):
+        """Внутренние единицы -> сантиметры"""
+        if self.units_per_cm == 1:
+            return value
+        return value / self.units_per_cm
+
+    def length(self, cm):
+        """Константа алгоритма в сантиметрах (шаг сетки, высота уровня) во внутренних единицах"""
+        return max(1, int(round(cm * self.units_per_cm)))
+
+    def restore(self, packer):
+        """Вернуть размеры поддона и коробок packer'а в сантиметры (исходные, если округлялись)"""
+        if not self.is_identity or self._rounded_up or self._rounded_down:
+            def box_cm(value):
+                original = self._rounded_up.get(value)
+                return original if original is not None else self.to_cm(value)
+
+            def pallet_cm(value):
+                original = self._rounded_down.get(value)
+                return original if original is not None else self.to_cm(value)
+
+            for bin_ in packer.bins:
+                bin_.width, bin_.height, bin_.depth = (
+                    pallet_cm(bin_.width), pallet_cm(bin_.height), pallet_cm(bin_.depth)
+                )
+            for item in packer.items:
+                item.width, item.height, item.depth = (
+                    box_cm(item.width), box_cm(item.height), box_cm(item.depth)
+                )
+                item.position = [self.to_cm(value) for value in item.position]
+        # Повторный вызов ничего не меняет
+        packer.scale = CoordinateScale()
+        return packer
@@ -1,11 +1,18 @@
 from .base_packer import BasePacker
+from .raster_points import CandidateLattice, drop_covered
 
 class WeightAwarePacker(BasePacker):
-    def __init__(self, support_threshold=0.8, weight_check_enabled=True):
+    limits_weight = True
+
+    def __init__(self, support_threshold=0.8, weight_check_enabled=True, use_raster_points=False):
         super().__init__()
         self.grid_step = 15
         self.support_threshold = support_threshold
         self.weight_check_enabled = weight_check_enabled
+        # Позиции на полу из растровых точек размеров коробок вместо сетки grid_step
+        self.use_raster_points = use_raster_points
+        self._floor_candidates = None
+        self._candidate_count = 0
 
     def pack(self):
         self._start_timing()
@@ -13,20 +20,30 @@ class WeightAwarePacker(BasePacker):
             return
 
         sorted_items = sorted(
-            self.items,
+            self._items_to_pack(),
             key=lambda x: (-x.weight, -(x.width * x.height))
         )
+        self._record_order(sorted_items)
+
+        self._floor_candidates = None
+        if self.use_raster_points:
+            self._floor_candidates = CandidateLattice.from_items(
+                self.items, self.bins[0].width, self.bins[0].height, self.allow_rotation
+            ).positions()
 
         for item in sorted_items:
+            if self._is_known_failure(item):
+                self._reject_item(item)
+                continue
+
             best_position = self._find_best_position_safe(item)
             if best_position:
-                x, y, z, width, height, depth = best_position
-                item.width, item.height, item.depth = width, height, depth
-                item.position = [x, y, z]
-                self.bins[0].items.append(item)
+                self._place_item(item, *best_position, candidates=self._candidate_count)
+                self._retain_failures(item, self._top_surface_points(item) + self._side_points(item))
+                if self._floor_candidates is not None and item.position[2] == 0:
+                    self._floor_candidates = drop_covered(self._floor_candidates, item)
             else:
-                self.unpacked_items.append(item)
-                self.packing_issues.append(f"Не удалось разместить {item.name}")
+                self._reject_item(item, self._candidate_count)
 
         self._end_timing()
 
@@ -35,6 +52,7 @@ class WeightAwarePacker(BasePacker):
         min_height = float('inf')
 
         candidates = self._generate_position_candidates()
+        self._candidate_count = len(candidates)
 
         for x, y, z in candidates:
             for width, height, depth in self._get_item_orientations(item):
@@ -53,13 +71,8 @@ class WeightAwarePacker(BasePacker):
             z + depth > self.bins[0].depth):
             return False
 
-        for other in self.bins[0].items:
-            if self._check_intersection_orientation(
-                x, y, z, width, height, depth,
-                other.position[0], other.position[1], other.position[2],
-                other.width, other.height, other.depth
-            ):
-                return False
+        if self._collides(x, y, z, width, height, depth):
+            return False
 
         if z > 0:
             if not self._check_support_safe(item, width, height, depth, x, y, z):
@@ -71,30 +84,18 @@ class WeightAwarePacker(BasePacker):
         return True
 
     def _check_support_safe(self, item, width, height, depth, x, y, z):
-        total_support_area = 0
-        required_support_area = width * height * self.support_threshold
-
-        supporting_items = []
+        return self._check_item_support(item, width, height, x, y, z)
 
-        for other in self.bins[0].items:
-            if abs(other.position[2] + other.depth - z) < 0.1:
-                support_area = self._calculate_overlap_area_orientation(
-                    other.position[0], other.position[1], other.width, other.height,
-                    x, y, width, height
-                )
-
-                if support_area > 0:
-                    if self.weight_check_enabled and other.weight < item.weight * 0.8:
-                        return False
-
-                    total_support_area += support_area
-                    supporting_items.append(other)
+    def _supports_item(self, item, width, height, x, y, z, support_area, supporters):
+        if support_area < width * height * self.support_threshold:
+            return False
 
-        if total_support_area < required_support_area:
+        # Опорные предметы не должны быть заметно легче ставящегося
+        if self.weight_check_enabled and any(other.weight < item.weight * 0.8 for other in supporters):
             return False
 
         if self.support_threshold > 0.7:
-            return self._check_edge_support(width, height, x, y, z, supporting_items)
+            return self._check_edge_support(width, height, x, y, z, supporters)
 
         return True
 
@@ -117,12 +118,21 @@ class WeightAwarePacker(BasePacker):
 
         return supported_corners >= 2
 
-    def _generate_position_candidates(self):
-        candidates = []
+    def _side_points(self, item):
+        """Углы основания у боковых граней предмета: коробка встает вплотную к нему,
+        а не в ближайший узел сетки grid_step"""
+        x, y, z = item.position
+        return [(x + item.width, y, z), (x, y + item.height, z)]
 
-        for x in range(0, int(self.bins[0].width), self.grid_step):
-            for y in range(0, int(self.bins[0].height), self.grid_step):
-                candidates.append((x, y, 0))
+    def _generate_position_candidates(self):
+        if self._floor_candidates is not None:
+            candidates = list(self._floor_candidates)
+        else:
+            candidates = []
+            step = self.scale.length(self.grid_step)
+            for x in range(0, int(self.bins[0].width), step):
+                for y in range(0, int(self.bins[0].height), step):
+                    candidates.append((x, y, 0))
 
         for other in self.bins[0].items:
             z = other.position[2] + other.depth
@@ -139,5 +149,9 @@ class WeightAwarePacker(BasePacker):
                         0 <= y < self.bins[0].height):
                         candidates.append((x, y, z))
 
-        candidates.sort(key=lambda pos: (pos[2], pos[0] + pos[1]))
-        return list(set(candidates))
\ No newline at end of file
+            for x, y, z in self._side_points(other):
+                if x < self.bins[0].width and y < self.bins[0].height:
+                    candidates.append((x, y, z))
+
+        # Сначала убираем дубликаты, затем сортируем (раньше set() терял порядок сортировки)
+        return sorted(set(candidates), key=lambda pos: (pos[2], pos[0] + pos[1], pos[0]))
\ No newline at end of file
@@ -51,6 +51,7 @@ class PackingMethod(Enum):
     LAFF = "Largest Area Fit First (быстрая послойная укладка)"
     CORNER_POINTS = "Corner Points (оптимизация по угловым точкам)"
     SFC = "Space Filling Curve (спиральная укладка с учетом веса)"
+    BEAM_SEARCH = "Beam Search (перебор нескольких лучших вариантов укладки)"
 
 method_descriptions = {
     PackingMethod.WEIGHT_AWARE.value: """
@@ -87,5 +88,12 @@ method_descriptions = {
 - Учет веса и устойчивости
 - Оптимизация использования пространства
 - Эффективен для разных размеров коробок
+""",
+    PackingMethod.BEAM_SEARCH.value: """
+**Beam Search метод**
+- Хранит несколько лучших частичных вариантов укладки вместо одного
+- Оценивает варианты по объему, высоте укладки и площади опоры
+- Ширина луча задает баланс между плотностью и временем расчета
+- Учитывает грузоподъемность поддона
 """
 }
\ No newline at end of file
@@ -0,0 +1,279 @@
+# src/utils/exporters.py
+"""Потоковый экспорт результатов упаковки в CSV, JSON Lines, Parquet и XLSX.
+
+Строки упакованных и неупакованных коробок не собираются в списки и DataFrame:
+источник (ExportSource) отдает генераторы строк, а писатель пишет их по мере получения.
+Источник строится из packer'а (приложение) или из результата задачи API.
+
+- CSV и Parquet: одна таблица коробок со столбцом status (packed/unpacked), у
+  неупакованных координаты пустые; в Parquet статистика - в метаданных схемы.
+- JSON Lines: первая строка - статистика, затем по строке на коробку.
+- XLSX: листы "Упакованные", "Неупакованные", "Статистика"; строки пишутся сразу, не держа
+  лист в памяти (xlsxwriter в режиме constant_memory или openpyxl write_only).
+- GLB: 3D-модель упаковки для внешних просмотрщиков (gltf_export.py).
+"""
+
+import csv
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from openpyxl import Workbook
+
+from .gltf_export import GLB_MEDIA_TYPE, write_glb
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - нужен только для Parquet
+    pa = pq = None
+
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - без него XLSX пишет openpyxl (медленнее)
+    xlsxwriter = None
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'glb': (GLB_MEDIA_TYPE, 'glb'),
+}
+BINARY_FORMATS = ('parquet', 'xlsx', 'glb')
+ITEM_COLUMNS = ('status', 'name', 'position_x', 'position_y', 'position_z', 'width', 'height', 'depth', 'weight')
+PACKED_COLUMNS = ('name', 'width', 'height', 'depth', 'weight', 'position_x', 'position_y', 'position_z')
+UNPACKED_COLUMNS = ('name', 'width', 'height', 'depth', 'weight')
+# Строк в одной группе Parquet
+PARQUET_BATCH_ROWS = 10_000
+# Объем кэша готовых файлов экспорта, байт
+EXPORT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ExportSource:
+    """Источник строк: packed() и unpacked() - генераторы словарей, statistics - словарь,
+    pallet - размеры поддона (ширина, длина, высота) или None"""
+
+    def __init__(self, packed, unpacked, statistics, pallet=None):
+        self.packed = packed
+        self.unpacked = unpacked
+        self.statistics = statistics
+        self.pallet = pallet
+
+    @classmethod
+    def from_packer(cls, packer):
+        """Источник из packer'а после упаковки (размеры в единицах предметов)"""
+        bin_ = packer.bins[0]
+
+        def packed():
+            for item in bin_.items:
+                yield {
+                    'name': item.name,
+                    'width': float(item.width),
+                    'height': float(item.height),
+                    'depth': float(item.depth),
+                    'weight': float(item.weight),
+                    'position_x': float(item.position[0]),
+                    'position_y': float(item.position[1]),
+                    'position_z': float(item.position[2]),
+                }
+
+        def unpacked():
+            for item in packer.unpacked_items:
+                yield {
+                    'name': item.name,
+                    'width': float(item.width),
+                    'height': float(item.height),
+                    'depth': float(item.depth),
+                    'weight': float(item.weight),
+                }
+
+        packed_volume = sum(float(item.width) * float(item.height) * float(item.depth) for item in bin_.items)
+        bin_volume = float(bin_.width) * float(bin_.height) * float(bin_.depth)
+        statistics = {
+            'total_items': len(packer.items),
+            'packed_items': len(bin_.items),
+            'unpacked_items': len(packer.unpacked_items),
+            'space_utilization': round(packed_volume / bin_volume * 100, 2) if bin_volume > 0 else 0,
+            'calculation_time': round(getattr(packer, 'calculation_time', 0), 3),
+            'total_weight': round(sum(float(item.weight) for item in packer.items), 2),
+            'packed_weight': round(sum(float(item.weight) for item in bin_.items), 2),
+        }
+        return cls(packed, unpacked, statistics, (float(bin_.width), float(bin_.height), float(bin_.depth)))
+
+    @classmethod
+    def from_result(cls, result):
+        """Источник из результата задачи API (format_packing_result)"""
+
+        def packed():
+            for item in result['packed_items']:
+                position, dimensions = item['position'], item['dimensions']
+                yield {
+                    'name': item['name'],
+                    'width': dimensions['width'],
+                    'height': dimensions['height'],
+                    'depth': dimensions['depth'],
+                    'weight': item['weight'],
+                    'position_x': position['x'],
+                    'position_y': position['y'],
+                    'position_z': position['z'],
+                }
+
+        def unpacked():
+            for item in result['unpacked_items']:
+                dimensions = item['dimensions']
+                yield {
+                    'name': item['name'],
+                    'width': dimensions['width'],
+                    'height': dimensions['height'],
+                    'depth': dimensions['depth'],
+                    'weight': item['weight'],
+                }
+
+        pallet = result.get('pallet')
+        if pallet is not None:
+            pallet = (pallet['width'], pallet['height'], pallet['depth'])
+        return cls(packed, unpacked, dict(result['summary']), pallet)
+
+    def items(self):
+        """Упакованные и неупакованные коробки в одной таблице (ITEM_COLUMNS)"""
+        for row in self.packed():
+            yield {'status': 'packed', **row}
+        for row in self.unpacked():
+            yield {'status': 'unpacked', 'position_x': None, 'position_y': None, 'position_z': None, **row}
+
+
+def write_csv(source, stream):
+    """CSV в текстовый поток"""
+    writer = csv.writer(stream)
+    writer.writerow(ITEM_COLUMNS)
+    for row in source.items():
+        writer.writerow(['' if row[column] is None else row[column] for column in ITEM_COLUMNS])
+
+
+def write_jsonl(source, stream):
+    """JSON Lines в текстовый поток: статистика, затем коробки"""
+    stream.write(json.dumps({'type': 'statistics', **source.statistics}, ensure_ascii=False) + '\n')
+    for row in source.items():
+        stream.write(json.dumps({'type': row['status'], **row}, ensure_ascii=False) + '\n')
+
+
+def write_parquet(source, stream):
+    """Parquet в бинарный поток группами по PARQUET_BATCH_ROWS строк"""
+    if pa is None:
+        raise ValueError("Для экспорта в Parquet установите пакет pyarrow")
+    schema = pa.schema(
+        [('status', pa.string()), ('name', pa.string())] +
+        [(column, pa.float64()) for column in ITEM_COLUMNS[2:]],
+        metadata={'statistics': json.dumps(source.statistics, ensure_ascii=False)}
+    )
+    with pq.ParquetWriter(stream, schema) as writer:
+        batch = {column: [] for column in ITEM_COLUMNS}
+        count = 0
+        for row in source.items():
+            for column in ITEM_COLUMNS:
+                batch[column].append(row[column])
+            count += 1
+            if count == PARQUET_BATCH_ROWS:
+                writer.write_batch(pa.record_batch(list(batch.values()), schema=schema))
+                batch = {column: [] for column in ITEM_COLUMNS}
+                count = 0
+        if count:
+            writer.write_batch(pa.record_batch(list(batch.values()), schema=schema))
+
+
+def write_xlsx(source, stream):
+    """XLSX в бинарный поток; строки пишутся сразу, лист не хранится в памяти
+    (xlsxwriter в режиме constant_memory, без него - openpyxl write_only)"""
+    sheets = (
+        ('Упакованные', PACKED_COLUMNS, ([row[column] for column in PACKED_COLUMNS] for row in source.packed())),
+        ('Неупакованные', UNPACKED_COLUMNS, ([row[column] for column in UNPACKED_COLUMNS] for row in source.unpacked())),
+        ('Статистика', list(source.statistics), iter([list(source.statistics.values())])),
+    )
+    if xlsxwriter is None:
+        workbook = Workbook(write_only=True)
+        for title, header, rows in sheets:
+            sheet = workbook.create_sheet(title)
+            sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+        workbook.save(stream)
+        return
+
+    workbook = xlsxwriter.Workbook(stream, {'constant_memory': True, 'in_memory': False})
+    for title, header, rows in sheets:
+        sheet = workbook.add_worksheet(title)
+        sheet.write_row(0, 0, header)
+        for index, row in enumerate(rows, 1):
+            sheet.write_row(index, 0, row)
+    workbook.close()
+
+
+def write_export(source, export_format, stream):
+    """Записать экспорт в поток: текстовый для csv/jsonl, бинарный для BINARY_FORMATS"""
+    writers = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet, 'xlsx': write_xlsx, 'glb': write_glb}
+    if export_format not in writers:
+        raise ValueError(f"Неизвестный формат экспорта: {export_format}. Доступны: {', '.join(EXPORT_FORMATS)}")
+    writers[export_format](source, stream)
+
+
+def export_to_file(source, export_format, filename):
+    """Записать экспорт в файл"""
+    binary = export_format in BINARY_FORMATS
+    with open(filename, 'wb' if binary else 'w', encoding=None if binary else 'utf-8', newline=None if binary else '') as stream:
+        write_export(source, export_format, stream)
+    return filename
+
+
+def export_bytes(source, export_format):
+    """Экспорт в байтах (для ответа API и кнопок скачивания)"""
+    buffer = io.BytesIO()
+    if export_format in BINARY_FORMATS:
+        write_export(source, export_format, buffer)
+    else:
+        text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+        write_export(source, export_format, text)
+        text.flush()
+        text.detach()
+    return buffer.getvalue()
+
+
+class ExportCache:
+    """Готовые файлы экспорта по (задача, формат): создаются при первом запросе,
+    вытесняются самые давние при превышении max_bytes. on_lookup(hit) - для метрик"""
+
+    def __init__(self, max_bytes=EXPORT_CACHE_BYTES, on_lookup=None):
+        self.max_bytes = max_bytes
+        self.on_lookup = on_lookup
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_or_create(self, task_id, export_format, build):
+        """Байты экспорта; build() вызывается только при промахе"""
+        key = (task_id, export_format)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if self.on_lookup is not None:
+            self.on_lookup(data is not None)
+        if data is not None:
+            return data
+
+        data = build()
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def discard(self, task_id):
+        """Удалить экспорты задачи"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == task_id]:
+                self._size -= len(self._entries.pop(key))
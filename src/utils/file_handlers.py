@@ -2,142 +2,221 @@
 
 import pandas as pd
 from datetime import datetime
+from collections import defaultdict
+from contextlib import contextmanager
+import codecs
 import json
 import os
 import numpy as np
+import openpyxl
 
-def validate_box_data(df):
-    """Расширенная валидация данных коробок с детальными проверками"""
-    required_columns = ['name', 'length', 'width', 'height', 'weight', 'quantity']
-    
-    # Проверка наличия всех столбцов
-    missing_columns = [col for col in required_columns if col not in df.columns]
+from src.utils.exporters import ExportSource
+from src.validation.vectorized import BoxTableValidation, summarize_errors, validate_boxes_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - нужен только для Parquet/Arrow
+    pa = pq = None
+
+REQUIRED_COLUMNS = ['name', 'length', 'width', 'height', 'weight', 'quantity']
+NUMERIC_COLUMNS = ['length', 'width', 'height', 'weight', 'quantity']
+# Одинаковые коробки (имя, размеры, вес) в разных строках складываются в количество
+AGGREGATE_KEY = ['name', 'length', 'width', 'height', 'weight']
+ALLOWED_EXTENSIONS = ['.csv', '.xlsx', '.xls', '.parquet', '.arrow', '.feather']
+# Строк в одной части при потоковом чтении файла
+CHUNK_ROWS = 50_000
+# Байт начала CSV для определения кодировки
+ENCODING_PREFIX = 64 * 1024
+# Сколько ошибок строк хранить при потоковой проверке (остальные только считаются)
+STREAM_ERROR_LIMIT = 1000
+
+def validate_box_data(df, config=None):
+    """Проверка таблицы коробок правилами ValidationConfig (один векторизованный проход)"""
+    frame, result = validate_boxes_table(df, config)
+    if not result.is_valid:
+        raise ValueError(f"Обнаружены ошибки в данных:\n{summarize_errors(result)}")
+    return frame
+
+def validate_boxes_table(df, config=None):
+    """Проверка таблицы коробок без исключения для ошибок в строках; возвращает (данные, ValidationResult)"""
+    _check_columns(df)
+    _check_nulls(df)
+    frame, result = validate_boxes_frame(df, config)
+    _check_duplicate_names(frame)
+    return frame, result
+
+def _check_columns(df):
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing_columns:
         raise ValueError(f"Отсутствуют обязательные столбцы: {', '.join(missing_columns)}")
-    
-    # Проверка пустых значений
-    for col in required_columns:
-        if df[col].isnull().any():
-            null_rows = df[df[col].isnull()].index.tolist()
-            raise ValueError(f"Обнаружены пустые значения в столбце '{col}' в строках: {null_rows}")
-    
-    # Проверка типов данных
-    numeric_columns = ['length', 'width', 'height', 'weight', 'quantity']
-    for col in numeric_columns:
-        try:
-            df[col] = pd.to_numeric(df[col], errors='raise')
-        except ValueError:
-            invalid_rows = df[~pd.to_numeric(df[col], errors='coerce').notna()].index.tolist()
-            raise ValueError(f"Некорректные числовые значения в столбце '{col}' в строках: {invalid_rows}")
-    
-    # Проверка положительных значений
-    for col in numeric_columns:
-        negative_mask = df[col] <= 0
-        if negative_mask.any():
-            negative_rows = df[negative_mask].index.tolist()
-            raise ValueError(f"Обнаружены отрицательные или нулевые значения в столбце '{col}' в строках: {negative_rows}")
-    
-    # Проверка разумных значений размеров
-    size_columns = ['length', 'width', 'height']
-    for col in size_columns:
-        large_mask = df[col] > 500
-        if large_mask.any():
-            large_rows = df[large_mask].index.tolist()
-            raise ValueError(f"Подозрительно большие размеры (>{500} см) в столбце '{col}' в строках: {large_rows}")
-        
-        small_mask = df[col] < 1
-        if small_mask.any():
-            small_rows = df[small_mask].index.tolist()
-            raise ValueError(f"Подозрительно маленькие размеры (<{1} см) в столбце '{col}' в строках: {small_rows}")
-    
-    # Проверка веса
-    heavy_mask = df['weight'] > 1000
-    if heavy_mask.any():
-        heavy_rows = df[heavy_mask].index.tolist()
-        raise ValueError(f"Подозрительно большой вес (>{1000} кг) в строках: {heavy_rows}")
-    
-    light_mask = df['weight'] < 0.1
-    if light_mask.any():
-        light_rows = df[light_mask].index.tolist()
-        raise ValueError(f"Подозрительно маленький вес (<{0.1} кг) в строках: {light_rows}")
-    
-    # Проверка логической корректности плотности
-    df['volume'] = df['length'] * df['width'] * df['height'] / 1000000  # в кубометрах
-    df['density'] = df['weight'] / df['volume']  # кг/м³
-    
-    high_density_mask = df['density'] > 10000  # плотность больше свинца
-    if high_density_mask.any():
-        dense_rows = df[high_density_mask].index.tolist()
-        raise ValueError(f"Подозрительно высокая плотность материала (>{10000} кг/м³) в строках: {dense_rows}")
-    
-    low_density_mask = df['density'] < 1  # плотность меньше воды
-    if low_density_mask.any():
-        light_rows = df[low_density_mask].index.tolist()
-        raise ValueError(f"Подозрительно низкая плотность материала (<{1} кг/м³) в строках: {light_rows}")
-    
-    # Проверка целостности количества
-    non_integer_mask = df['quantity'] != df['quantity'].astype(int)
-    if non_integer_mask.any():
-        non_int_rows = df[non_integer_mask].index.tolist()
-        raise ValueError(f"Количество должно быть целым числом в строках: {non_int_rows}")
-    
-    # Проверка уникальности имен
-    duplicate_names = df[df['name'].duplicated()]['name'].unique()
+
+def _check_nulls(df):
+    null_mask = df[REQUIRED_COLUMNS].isna()
+    if null_mask.to_numpy().any():
+        col = null_mask.columns[null_mask.any().to_numpy()][0]
+        null_rows = df.index[null_mask[col].to_numpy()].tolist()
+        raise ValueError(f"Обнаружены пустые значения в столбце '{col}' в строках: {null_rows}")
+
+def _check_duplicate_names(df):
+    duplicate_names = df['name'][df['name'].duplicated()].unique()
     if len(duplicate_names) > 0:
         raise ValueError(f"Обнаружены дублирующиеся имена коробок: {list(duplicate_names)}")
-    
-    # Удаляем временные столбцы
-    df = df.drop(['volume', 'density'], axis=1)
-    
-    return df
 
-def validate_file_format(file):
-    """Валидация формата загружаемого файла"""
-    if not hasattr(file, 'name'):
+def validate_file_format(file, filename=None):
+    """Валидация формата загружаемого файла (filename - имя файла, если у потока его нет)"""
+    if filename is None and not hasattr(file, 'name'):
         raise ValueError("Неверный формат файла")
     
-    allowed_extensions = ['.csv', '.xlsx', '.xls']
-    file_extension = os.path.splitext(file.name)[1].lower()
+    file_extension = os.path.splitext(filename or file.name)[1].lower()
     
-    if file_extension not in allowed_extensions:
+    if file_extension not in ALLOWED_EXTENSIONS:
         raise ValueError(f"Неподдерживаемый формат файла: {file_extension}. "
-                        f"Поддерживаются: {', '.join(allowed_extensions)}")
+                        f"Поддерживаются: {', '.join(ALLOWED_EXTENSIONS)}")
     
     return True
 
-def load_boxes_from_file(file):
-    """Загрузка коробок из CSV/Excel файла с расширенной валидацией"""
+def detect_encoding(prefix):
+    """Кодировка CSV по началу файла: utf-8 (с BOM или без), иначе cp1251, иначе latin1"""
+    for encoding in ('utf-8-sig', 'cp1251'):
+        try:
+            # Начало может обрываться посреди многобайтного символа - final=False
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin1'
+
+@contextmanager
+def _open_binary(file):
+    """Бинарный поток файла: загруженный файл (с read) или путь"""
+    if hasattr(file, 'read'):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        yield file
+    else:
+        with open(file, 'rb') as stream:
+            yield stream
+
+def _strip_strings(chunk):
+    """Очистка строковых столбцов от лишних пробелов (пустые значения остаются пустыми)"""
+    for col in chunk.columns:
+        column = chunk[col]
+        if column.dtype == object or pd.api.types.is_string_dtype(column):
+            chunk[col] = column.where(column.isna(), column.astype(str).str.strip())
+    return chunk
+
+def _frame(rows, columns, offset):
+    return pd.DataFrame(rows, columns=columns, index=pd.RangeIndex(offset, offset + len(rows)))
+
+class _NonNumericValues(Exception):
+    """В числовом столбце CSV встретилось нечисловое значение"""
+
+def _iter_csv(stream, chunk_rows, typed):
+    encoding = detect_encoding(stream.read(ENCODING_PREFIX))
+    stream.seek(0)
+    # Типы заданы явно, а не выводятся заново в каждой части: числовые столбцы разбирает
+    # сам парсер, остальные - строки. Без typed все столбцы читаются строками, числа
+    # разбирает проверка (нечисловые значения становятся ошибками строк)
+    dtype = defaultdict(lambda: str, {col: 'float64' for col in NUMERIC_COLUMNS}) if typed else str
+    reader = pd.read_csv(stream, encoding=encoding, dtype=dtype, chunksize=chunk_rows)
+    while True:
+        try:
+            chunk = next(reader)
+        except StopIteration:
+            return
+        except ValueError:
+            if typed:
+                raise _NonNumericValues()
+            raise
+        yield chunk
+
+def _iter_xlsx(stream, chunk_rows):
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
     try:
-        # Валидация формата файла
-        validate_file_format(file)
-        
-        # Загрузка данных в зависимости от формата
-        if file.name.endswith('.csv'):
-            try:
-                df = pd.read_csv(file, encoding='utf-8')
-            except UnicodeDecodeError:
-                try:
-                    df = pd.read_csv(file, encoding='cp1251')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(file, encoding='latin1')
-        elif file.name.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(file)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(value).strip() if value is not None else '' for value in header]
+        batch, offset = [], 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row[:len(columns)])
+            if len(batch) == chunk_rows:
+                yield _frame(batch, columns, offset)
+                offset += len(batch)
+                batch = []
+        if batch:
+            yield _frame(batch, columns, offset)
+    finally:
+        workbook.close()
+
+def _iter_arrow(stream, extension, chunk_rows):
+    if pa is None:
+        raise ValueError("Для чтения Parquet/Arrow установите пакет pyarrow")
+    if extension == '.parquet':
+        batches = pq.ParquetFile(stream).iter_batches(batch_size=chunk_rows)
+    else:
+        try:
+            reader = pa.ipc.open_file(stream)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            stream.seek(0)
+            batches = pa.ipc.open_stream(stream)
+    offset = 0
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_rows):
+            chunk = batch.slice(start, chunk_rows).to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+def iter_manifest_chunks(file, chunk_rows=CHUNK_ROWS, typed=True, filename=None):
+    """Строки файла коробок частями по chunk_rows (сквозная нумерация строк в индексе);
+    typed - читать числовые столбцы CSV сразу числами"""
+    validate_file_format(file, filename)
+    extension = os.path.splitext(filename or file.name)[1].lower()
+    with _open_binary(file) as stream:
+        if extension == '.csv':
+            chunks = _iter_csv(stream, chunk_rows, typed)
+        elif extension == '.xlsx':
+            chunks = _iter_xlsx(stream, chunk_rows)
+        elif extension == '.xls':
+            # Старый формат Excel не читается потоково
+            df = pd.read_excel(stream)
+            chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
         else:
-            raise ValueError("Неподдерживаемый формат файла")
-        
-        # Проверка на пустой файл
-        if df.empty:
-            raise ValueError("Загруженный файл пуст")
-        
-        # Очистка данных от лишних пробелов
-        string_columns = df.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            df[col] = df[col].astype(str).str.strip()
-        
-        # Валидация данных
-        df = validate_box_data(df)
-        
-        return df
+            chunks = _iter_arrow(stream, extension, chunk_rows)
+        for chunk in chunks:
+            yield _strip_strings(chunk)
+
+def _merge_quantities(aggregate, frame):
+    """Сложить количества одинаковых коробок части с уже прочитанными"""
+    extra = {col: 'first' for col in frame.columns if col not in AGGREGATE_KEY and col != 'quantity'}
+    parts = [frame] if aggregate is None else [aggregate, frame]
+    combined = pd.concat(parts, ignore_index=True) if len(parts) > 1 else frame
+    merged = combined.groupby(AGGREGATE_KEY, sort=False, dropna=False).agg({'quantity': 'sum', **extra})
+    return merged.reset_index()[list(frame.columns)]
+
+def load_boxes_from_file(file, config=None):
+    """Загрузка коробок из CSV/Excel/Parquet/Arrow файла с расширенной валидацией"""
+    df, result = load_boxes_with_validation(file, config)
+    if not result.is_valid:
+        raise ValueError(f"Ошибка при загрузке файла: Обнаружены ошибки в данных:\n{summarize_errors(result)}")
+    return df
+
+def load_boxes_with_validation(file, config=None, chunk_rows=CHUNK_ROWS, filename=None):
+    """Потоковая загрузка коробок: каждая часть проверяется сразу, одинаковые строки
+    складываются в количество; возвращает (типы коробок, ValidationResult).
+    file - путь или бинарный поток (filename - имя файла, если у потока его нет)"""
+    try:
+        try:
+            return _load_manifest(file, config, chunk_rows, True, filename)
+        except _NonNumericValues:
+            # Повторное чтение строками, чтобы проверка указала строки с нечисловыми значениями
+            return _load_manifest(file, config, chunk_rows, False, filename)
         
     except pd.errors.EmptyDataError:
         raise ValueError("Файл пуст или содержит только заголовки")
@@ -149,8 +228,30 @@ def load_boxes_from_file(file):
         else:
             raise ValueError(f"Ошибка при загрузке файла: {str(e)}")
 
+def _load_manifest(file, config, chunk_rows, typed, filename):
+    validation = BoxTableValidation(config, STREAM_ERROR_LIMIT)
+    aggregate = None
+    for chunk in iter_manifest_chunks(file, chunk_rows, typed, filename):
+        if chunk.empty:
+            continue
+        if aggregate is None:
+            _check_columns(chunk)
+        _check_nulls(chunk)
+        aggregate = _merge_quantities(aggregate, validation.add(chunk))
+    
+    # Проверка на пустой файл
+    if aggregate is None:
+        raise ValueError("Загруженный файл пуст")
+    
+    result = validation.finish()
+    if result.is_valid:
+        aggregate['quantity'] = aggregate['quantity'].astype(int)
+    _check_duplicate_names(aggregate)
+    return aggregate, result
+
 def save_packing_result_with_analytics(packer, space_utilization, save_dir='results'):
-    """Сохранение результатов упаковки с расширенной аналитикой"""
+    """Сохранение результатов упаковки с расширенной аналитикой; строки коробок и
+    статистика - из ExportSource, как у остальных форматов экспорта"""
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
@@ -159,6 +260,8 @@ def save_packing_result_with_analytics(packer, space_utilization, save_dir='resu
         
         # Получаем детальную аналитику
         analytics = packer.generate_detailed_analytics()
+        source = ExportSource.from_packer(packer)
+        level_for_height = getattr(packer, '_get_level_for_height', None)
         
         # Расчет дополнительной статистики
         total_volume = sum(item.width * item.height * item.depth for item in packer.items)
@@ -183,32 +286,33 @@ def save_packing_result_with_analytics(packer, space_utilization, save_dir='resu
                 'volume': packer.bins[0].width * packer.bins[0].height * packer.bins[0].depth
             },
             'packed_items': [{
-                'name': item.name,
+                'name': row['name'],
                 'position': {
-                    'x': item.position[0],
-                    'y': item.position[1], 
-                    'z': item.position[2]
+                    'x': row['position_x'],
+                    'y': row['position_y'],
+                    'z': row['position_z']
                 },
                 'dimensions': {
-                    'width': item.width,
-                    'height': item.height,
-                    'depth': item.depth
+                    'width': row['width'],
+                    'height': row['height'],
+                    'depth': row['depth']
                 },
-                'weight': item.weight,
-                'volume': item.width * item.height * item.depth,
-                'level': packer._get_level_for_height(item.position[2]) if hasattr(packer, '_get_level_for_height') else 0
-            } for item in packer.bins[0].items],
+                'weight': row['weight'],
+                'volume': row['width'] * row['height'] * row['depth'],
+                'level': level_for_height(row['position_z']) if level_for_height else 0
+            } for row in source.packed()],
             'unpacked_items': [{
-                'name': item.name,
+                'name': row['name'],
                 'dimensions': {
-                    'width': item.width,
-                    'height': item.height,
-                    'depth': item.depth
+                    'width': row['width'],
+                    'height': row['height'],
+                    'depth': row['depth']
                 },
-                'weight': item.weight,
-                'volume': item.width * item.height * item.depth,
+                'weight': row['weight'],
+                'volume': row['width'] * row['height'] * row['depth'],
                 'reason': 'Не удалось разместить'
-            } for item in packer.unpacked_items],
+            } for row in source.unpacked()],
+            'statistics': source.statistics,
             'basic_statistics': {
                 'space_utilization': round(space_utilization, 2),
                 'volume_utilization': round(packed_volume / total_volume * 100, 2) if total_volume > 0 else 0,
@@ -244,79 +348,3 @@ def save_packing_result_with_analytics(packer, space_utilization, save_dir='resu
 def save_packing_result(packer, space_utilization, save_dir='results'):
     """Обратная совместимость - базовое сохранение результатов"""
     return save_packing_result_with_analytics(packer, space_utilization, save_dir)
-
-def export_analytics_to_excel(packer, analytics, save_dir='results'):
-    """Экспорт аналитики в Excel с множественными листами"""
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f'{save_dir}/analytics_report_{timestamp}.xlsx'
-        
-        os.makedirs(save_dir, exist_ok=True)
-        
-        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
-            # Лист 1: Основные метрики
-            efficiency_df = pd.DataFrame([analytics['efficiency_metrics']])
-            efficiency_df.to_excel(writer, sheet_name='Эффективность', index=False)
-            
-            # Лист 2: Анализ размещения
-            placement_data = []
-            for item in packer.bins[0].items:
-                placement_data.append({
-                    'Имя': item.name,
-                    'X': item.position[0],
-                    'Y': item.position[1],
-                    'Z': item.position[2],
-                    'Ширина': item.width,
-                    'Высота': item.height,
-                    'Глубина': item.depth,
-                    'Вес': item.weight,
-                    'Объем': item.width * item.height * item.depth,
-                    'Уровень': packer._get_level_for_height(item.position[2]) if hasattr(packer, '_get_level_for_height') else 0
-                })
-            
-            placement_df = pd.DataFrame(placement_data)
-            placement_df.to_excel(writer, sheet_name='Размещение', index=False)
-            
-            # Лист 3: Анализ по уровням
-            if 'items_by_level' in analytics['placement_analysis']:
-                level_data = []
-                for level, data in analytics['placement_analysis']['items_by_level'].items():
-                    level_data.append({
-                        'Уровень': level,
-                        'Количество_предметов': len(data['items']),
-                        'Общий_объем': data['total_volume'],
-                        'Общий_вес': data['total_weight'],
-                        'Диапазон_высот': f"{data['height_range'][0]:.1f} - {data['height_range'][1]:.1f}"
-                    })
-                
-                level_df = pd.DataFrame(level_data)
-                level_df.to_excel(writer, sheet_name='Анализ_по_уровням', index=False)
-            
-            # Лист 4: Использование ориентаций
-            if analytics['placement_analysis']['orientation_usage']:
-                orientation_data = []
-                for orientation, count in analytics['placement_analysis']['orientation_usage'].items():
-                    orientation_data.append({
-                        'Ориентация': orientation,
-                        'Количество_использований': count,
-                        'Процент': round(count / sum(analytics['placement_analysis']['orientation_usage'].values()) * 100, 2)
-                    })
-                
-                orientation_df = pd.DataFrame(orientation_data)
-                orientation_df.to_excel(writer, sheet_name='Ориентации', index=False)
-            
-            # Лист 5: Временная линия размещения
-            if analytics['spatial_analysis']['placement_timeline']:
-                timeline_df = pd.DataFrame(analytics['spatial_analysis']['placement_timeline'])
-                timeline_df.to_excel(writer, sheet_name='Временная_линия', index=False)
-            
-            # Лист 6: Рекомендации
-            recommendations_df = pd.DataFrame({
-                'Рекомендации': analytics['recommendations']
-            })
-            recommendations_df.to_excel(writer, sheet_name='Рекомендации', index=False)
-        
-        return filename
-        
-    except Exception as e:
-        raise ValueError(f"Ошибка при создании Excel отчета: {str(e)}")
\ No newline at end of file
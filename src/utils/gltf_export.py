@@ -0,0 +1,202 @@
+# src/utils/gltf_export.py
+"""Экспорт упаковки в бинарный glTF (GLB) для внешних просмотрщиков.
+
+Геометрия одна - единичный куб (24 вершины с нормалями граней, 36 индексов). Коробки -
+его экземпляры (расширение EXT_mesh_gpu_instancing): для каждого типа коробки узел со
+своим материалом и атрибутами экземпляров TRANSLATION и SCALE - срезами общих буферов
+смещений и масштабов (n, 3) float32, записанных из массивов NumPy как есть. Цвет задается
+материалом типа: цвет экземпляра в расширение не входит. Поддон - тонкая плита под коробками.
+
+Оси и единицы glTF: Y вверх, метры. Координаты упаковки (x - длина, y - ширина, z - высота,
+сантиметры) переводятся в (x, z, -y) с масштабом CM_TO_M.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from .visualization import get_box_colors, get_box_type_from_name
+
+GLB_MEDIA_TYPE = 'model/gltf-binary'
+CM_TO_M = 0.01
+# Толщина плиты поддона, см
+PALLET_THICKNESS = 2
+PALLET_COLOR = 'gray'
+# sRGB цветов 3D-сцены (visualization.CUSTOM_COLORS и цвета STANDARD_BOXES), остальные - серые
+COLOR_RGB = {
+    'red': (255, 0, 0), 'blue': (0, 0, 255), 'green': (0, 128, 0), 'yellow': (255, 255, 0),
+    'purple': (128, 0, 128), 'orange': (255, 165, 0), 'pink': (255, 192, 203), 'cyan': (0, 255, 255),
+    'gray': (128, 128, 128),
+}
+
+FLOAT, UNSIGNED_SHORT = 5126, 5123
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+
+
+def _unit_cube():
+    """Единичный куб [0, 1]³: позиции и нормали (24, 3) float32, индексы (36,) uint16"""
+    positions, normals, indices = [], [], []
+    for axis in range(3):
+        u, v = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0, 1):
+            base = len(positions)
+            normal = [0.0, 0.0, 0.0]
+            normal[axis] = 1.0 if side else -1.0
+            for a, b in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                point = [0.0, 0.0, 0.0]
+                point[axis], point[u], point[v] = side, a, b
+                positions.append(point)
+                normals.append(normal)
+            # Обход против часовой стрелки при взгляде снаружи
+            quad = (0, 1, 2, 0, 2, 3) if side else (0, 2, 1, 0, 3, 2)
+            indices.extend(base + index for index in quad)
+    return (np.array(positions, dtype=np.float32), np.array(normals, dtype=np.float32),
+            np.array(indices, dtype=np.uint16))
+
+
+def _linear_rgba(color):
+    """baseColorFactor glTF (линейный RGB) для названия цвета"""
+    srgb = np.array(COLOR_RGB.get(color, COLOR_RGB['gray']), dtype=np.float64) / 255
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    return [round(float(value), 4) for value in linear] + [1.0]
+
+
+class _GLBBuilder:
+    """Буфер, bufferView и accessor'ы glTF"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def add_view(self, array, target=None):
+        """Записать массив в буфер отдельным bufferView; возвращает номер bufferView"""
+        data = np.ascontiguousarray(array).tobytes()
+        view = {'buffer': 0, 'byteOffset': self.size, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        self.buffer_views.append(view)
+        self.chunks.append(data)
+        self.size += len(data)
+        padding = -self.size % 4
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.size += padding
+        return len(self.buffer_views) - 1
+
+    def add(self, array, accessor_type, target=None, bounds=False):
+        """Записать массив и accessor ко всему массиву; возвращает номер accessor'а"""
+        return self.accessor(self.add_view(array, target), array, accessor_type, bounds)
+
+    def accessor(self, view, array, accessor_type, bounds=False, count=None, offset=0):
+        """Accessor к части bufferView: count строк array начиная со строки offset"""
+        rows = array[offset:offset + count] if count is not None else array
+        accessor = {
+            'bufferView': view,
+            'byteOffset': int(offset * array.itemsize * (array.shape[1] if array.ndim > 1 else 1)),
+            'componentType': UNSIGNED_SHORT if array.dtype == np.uint16 else FLOAT,
+            'count': int(len(rows)),
+            'type': accessor_type,
+        }
+        if bounds:
+            accessor['min'] = rows.min(axis=0).tolist()
+            accessor['max'] = rows.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+def write_glb(source, stream):
+    """GLB в бинарный поток: source - ExportSource с размерами поддона (source.pallet)"""
+    names, positions, dims = [], [], []
+    for row in source.packed():
+        names.append(row['name'])
+        positions.append((row['position_x'], row['position_y'], row['position_z']))
+        dims.append((row['width'], row['height'], row['depth']))
+    positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+    dims = np.array(dims, dtype=np.float64).reshape(-1, 3)
+
+    # Экземпляры сгруппированы по типам: у каждого типа - непрерывный отрезок буферов
+    box_types = [get_box_type_from_name(name) for name in names]
+    colors = get_box_colors(box_types)
+    type_index = {box_type: index for index, box_type in enumerate(colors)}
+    type_ids = np.array([type_index[box_type] for box_type in box_types], dtype=np.int64)
+    order = np.argsort(type_ids, kind='stable')
+    positions, dims, type_ids = positions[order], dims[order], type_ids[order]
+
+    # Угол [0, 0, 0] куба - минимальная точка коробки в осях glTF: (x, z, -(y + ширина))
+    translations = np.column_stack((
+        positions[:, 0], positions[:, 2], -(positions[:, 1] + dims[:, 1])
+    )).astype(np.float32) * np.float32(CM_TO_M)
+    scales = np.column_stack((dims[:, 0], dims[:, 2], dims[:, 1])).astype(np.float32) * np.float32(CM_TO_M)
+
+    builder = _GLBBuilder()
+    cube_positions, cube_normals, cube_indices = _unit_cube()
+    attributes = {
+        'POSITION': builder.add(cube_positions, 'VEC3', ARRAY_BUFFER, bounds=True),
+        'NORMAL': builder.add(cube_normals, 'VEC3', ARRAY_BUFFER),
+    }
+    indices = builder.add(cube_indices, 'SCALAR', ELEMENT_ARRAY_BUFFER)
+
+    materials, meshes, nodes = [], [], []
+
+    def add_mesh(name, color):
+        materials.append({
+            'name': name,
+            'pbrMetallicRoughness': {'baseColorFactor': _linear_rgba(color), 'metallicFactor': 0.0,
+                                     'roughnessFactor': 0.8},
+        })
+        meshes.append({'name': name, 'primitives': [
+            {'attributes': attributes, 'indices': indices, 'material': len(materials) - 1}
+        ]})
+        return len(meshes) - 1
+
+    pallet = getattr(source, 'pallet', None)
+    if pallet is not None:
+        width, length, _ = pallet
+        nodes.append({
+            'name': 'Поддон', 'mesh': add_mesh('Поддон', PALLET_COLOR),
+            'translation': [0.0, -PALLET_THICKNESS * CM_TO_M, -length * CM_TO_M],
+            'scale': [width * CM_TO_M, PALLET_THICKNESS * CM_TO_M, length * CM_TO_M],
+        })
+
+    if len(positions):
+        translation_view = builder.add_view(translations)
+        scale_view = builder.add_view(scales)
+        starts = np.searchsorted(type_ids, np.arange(len(colors)))
+        ends = np.searchsorted(type_ids, np.arange(len(colors)), 'right')
+        for type_id, (box_type, color) in enumerate(colors.items()):
+            start, count = int(starts[type_id]), int(ends[type_id] - starts[type_id])
+            nodes.append({
+                'name': box_type,
+                'mesh': add_mesh(box_type, color),
+                'extensions': {'EXT_mesh_gpu_instancing': {'attributes': {
+                    'TRANSLATION': builder.accessor(translation_view, translations, 'VEC3', count=count, offset=start),
+                    'SCALE': builder.accessor(scale_view, scales, 'VEC3', count=count, offset=start),
+                }}},
+            })
+
+    document = {
+        'asset': {'version': '2.0', 'generator': 'pallet-packer'},
+        'scene': 0,
+        'scenes': [{'name': 'Упаковка', 'nodes': list(range(len(nodes)))}],
+        'nodes': nodes,
+        'meshes': meshes,
+        'materials': materials,
+        'accessors': builder.accessors,
+        'bufferViews': builder.buffer_views,
+        'buffers': [{'byteLength': builder.size}],
+    }
+    if len(positions):
+        document['extensionsUsed'] = document['extensionsRequired'] = ['EXT_mesh_gpu_instancing']
+
+    content = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    content += b' ' * (-len(content) % 4)
+    total = 12 + 8 + len(content) + 8 + builder.size
+    stream.write(struct.pack('<4sII', b'glTF', 2, total))
+    stream.write(struct.pack('<I4s', len(content), b'JSON'))
+    stream.write(content)
+    stream.write(struct.pack('<I4s', builder.size, b'BIN\0'))
+    for chunk in builder.chunks:
+        stream.write(chunk)
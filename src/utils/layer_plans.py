@@ -0,0 +1,190 @@
+# src/utils/layer_plans.py
+"""Поуровневые планы укладки (вид сверху) для инструкций погрузки.
+
+Упаковка делится на слои по высоте: по настоящим разрывам (отметкам z, которые не
+пересекает ни одна коробка, height_layers), а если их нет - по уровням packer'а
+(_get_level_for_height) по нижней грани коробки. Каждый слой рисуется как SVG: контур
+поддона, контуры коробок нижнего слоя пунктиром и коробки слоя, закрашенные по типу
+(цвета как в 3D-сцене), с номером в порядке размещения и названием. Координаты всех
+прямоугольников слоя считаются массивами NumPy, разметка собирается одним проходом.
+
+LayerPlans хранит готовые SVG слоев, поэтому повторный показ слоя ничего не считает.
+to_html() собирает все слои в один документ для печати: слой на страницу.
+"""
+
+from html import escape
+
+import numpy as np
+
+from .exporters import ExportSource
+from .visualization import get_box_colors, get_box_type_from_name, height_layers
+
+LAYER_PLAN_FORMATS = {
+    'html': ('text/html; charset=utf-8', 'html'),
+    'svg': ('image/svg+xml', 'svg'),
+}
+# Ширина рисунка слоя, px; высота - по пропорциям поддона
+SVG_WIDTH = 800
+SVG_MARGIN = 10
+# Размер шрифта подписей, px: подписи мельче MIN_FONT_SIZE не выводятся (остается всплывающая)
+MAX_FONT_SIZE = 14
+MIN_FONT_SIZE = 6
+# Средняя ширина символа относительно размера шрифта
+CHAR_WIDTH = 0.6
+
+PAGE_STYLE = """
+@page { size: A4 landscape; margin: 10mm; }
+body { font-family: sans-serif; }
+section { break-after: page; page-break-after: always; }
+section:last-child { break-after: auto; page-break-after: auto; }
+svg { width: 100%; height: auto; max-height: 170mm; }
+"""
+
+
+def render_layer_svg(names, positions, dims, colors, pallet, below=None):
+    """SVG слоя (вид сверху): names - подписи коробок, positions и dims - массивы (n, 3),
+    colors - цвета заливки, pallet - (ширина, длина) поддона, below - (позиции, размеры)
+    коробок нижнего слоя для контуров"""
+    scale = (SVG_WIDTH - 2 * SVG_MARGIN) / pallet[0]
+    height = pallet[1] * scale + 2 * SVG_MARGIN
+
+    def rects(positions, dims):
+        # Начало координат поддона - левый нижний угол рисунка
+        x = SVG_MARGIN + positions[:, 0] * scale
+        w = dims[:, 0] * scale
+        h = dims[:, 1] * scale
+        y = height - SVG_MARGIN - positions[:, 1] * scale - h
+        return x, y, w, h
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {height:.1f}" '
+        f'font-family="sans-serif" text-anchor="middle" dominant-baseline="central">',
+        f'<rect x="{SVG_MARGIN}" y="{SVG_MARGIN}" width="{SVG_WIDTH - 2 * SVG_MARGIN}" '
+        f'height="{height - 2 * SVG_MARGIN:.1f}" fill="#f4f4f4" stroke="black" stroke-width="2"/>'
+    ]
+    if below is not None and len(below[0]):
+        x, y, w, h = rects(*below)
+        parts.append('<g fill="none" stroke="#999" stroke-dasharray="4 3">')
+        parts.extend(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}"/>'
+            for x, y, w, h in zip(x.tolist(), y.tolist(), w.tolist(), h.tolist())
+        )
+        parts.append('</g>')
+
+    x, y, w, h = rects(positions, dims)
+    labels = [f'{number}. {name}' for number, name in enumerate(names, 1)]
+    lengths = np.array([len(label) for label in labels], dtype=np.float64)
+    font = np.minimum(np.minimum(h * 0.4, w / np.maximum(lengths, 1) / CHAR_WIDTH), MAX_FONT_SIZE)
+    parts.append('<g stroke="black" fill-opacity="0.6">')
+    for x, y, w, h, color, label, font in zip(
+            x.tolist(), y.tolist(), w.tolist(), h.tolist(), colors, labels, font.tolist()):
+        label = escape(label)
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" fill="{color}">'
+            f'<title>{label}</title></rect>'
+        )
+        if font >= MIN_FONT_SIZE:
+            parts.append(
+                f'<text x="{x + w / 2:.1f}" y="{y + h / 2:.1f}" font-size="{font:.1f}" '
+                f'stroke="none" fill-opacity="1">{label}</text>'
+            )
+    parts.append('</g></svg>')
+    return ''.join(parts)
+
+
+class LayerPlans:
+    """Слои упаковки и их SVG (готовые SVG хранятся)"""
+
+    def __init__(self, names, positions, dims, pallet, level_for_height=None):
+        self.names = list(names)
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.dims = np.asarray(dims, dtype=np.float64).reshape(-1, 3)
+        self.pallet = pallet
+        bottoms, tops = self.positions[:, 2], self.positions[:, 2] + self.dims[:, 2]
+        layer_ids = height_layers(bottoms, tops) if len(bottoms) else np.zeros(0, dtype=np.int64)
+        if level_for_height is not None and len(np.unique(bottoms)) > 1 and not layer_ids.any():
+            # Разрывов нет (коробки разной высоты вперемешку) - уровни packer'а
+            layer_ids = np.array([level_for_height(z) for z in bottoms.tolist()], dtype=np.int64)
+        # Номера слоев подряд с 0; внутри слоя - порядок размещения
+        _, layer_ids = np.unique(layer_ids, return_inverse=True)
+        self.layers = [np.flatnonzero(layer_ids == layer) for layer in range(int(layer_ids.max(initial=-1)) + 1)]
+        colors = get_box_colors(get_box_type_from_name(name) for name in self.names)
+        self.colors = [colors[get_box_type_from_name(name)] for name in self.names]
+        self._svg = {}
+
+    @classmethod
+    def from_source(cls, source, pallet, level_for_height=None):
+        """Слои по упакованным коробкам ExportSource"""
+        names, positions, dims = [], [], []
+        for row in source.packed():
+            names.append(row['name'])
+            positions.append((row['position_x'], row['position_y'], row['position_z']))
+            dims.append((row['width'], row['height'], row['depth']))
+        return cls(names, positions, dims, pallet, level_for_height)
+
+    @classmethod
+    def from_packer(cls, packer):
+        bin_ = packer.bins[0]
+        return cls.from_source(
+            ExportSource.from_packer(packer), (float(bin_.width), float(bin_.height)),
+            packer._get_level_for_height if hasattr(packer, '_get_level_for_height') else None
+        )
+
+    @classmethod
+    def from_result(cls, result):
+        """Слои по результату задачи API (нужен result['pallet'])"""
+        pallet = result['pallet']
+        return cls.from_source(ExportSource.from_result(result), (pallet['width'], pallet['height']))
+
+    def __len__(self):
+        return len(self.layers)
+
+    def describe(self, layer):
+        """Заголовок слоя: номер, отметки по высоте, число коробок"""
+        boxes = self.layers[layer]
+        bottom = self.positions[boxes, 2].min()
+        top = (self.positions[boxes, 2] + self.dims[boxes, 2]).max()
+        return f"Слой {layer + 1} из {len(self.layers)}: высота {bottom:g}-{top:g}, коробок: {len(boxes)}"
+
+    def _task(self, layer):
+        boxes = self.layers[layer]
+        below = None
+        if layer > 0:
+            lower = self.layers[layer - 1]
+            below = (self.positions[lower], self.dims[lower])
+        return (
+            [self.names[index] for index in boxes], self.positions[boxes], self.dims[boxes],
+            [self.colors[index] for index in boxes], self.pallet, below
+        )
+
+    def svg(self, layer):
+        """SVG слоя layer (с 0)"""
+        if layer not in self._svg:
+            self._svg[layer] = render_layer_svg(*self._task(layer))
+        return self._svg[layer]
+
+    def render_all(self):
+        """SVG всех слоев"""
+        return [self.svg(layer) for layer in range(len(self.layers))]
+
+    def to_html(self, title="Планы слоев упаковки"):
+        """Документ для печати: каждый слой на отдельной странице"""
+        pages = [
+            f'<section><h2>{escape(self.describe(layer))}</h2>{svg}</section>'
+            for layer, svg in enumerate(self.render_all())
+        ]
+        return (
+            f'<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8"><title>{escape(title)}</title>'
+            f'<style>{PAGE_STYLE}</style></head><body>{"".join(pages)}</body></html>'
+        )
+
+
+def layer_plan_bytes(plans, plan_format, layer=None):
+    """План в байтах: 'html' - все слои, 'svg' - слой layer (с 1)"""
+    if plan_format not in LAYER_PLAN_FORMATS:
+        raise ValueError(f"Неизвестный формат плана: {plan_format}. Доступны: {', '.join(LAYER_PLAN_FORMATS)}")
+    if plan_format == 'html':
+        return plans.to_html().encode('utf-8')
+    if layer is None or not 1 <= layer <= len(plans):
+        raise ValueError(f"Укажите номер слоя от 1 до {len(plans)}")
+    return plans.svg(layer - 1).encode('utf-8')
@@ -1,9 +1,39 @@
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import streamlit as st
 from .constants import STANDARD_BOXES
 
+# Режимы отрисовки коробок: 'boxes' - по два trace на коробку (Mesh3d и ребра),
+# 'merged' - вся геометрия в одном Mesh3d и одном trace ребер,
+# 'culled' - как 'merged', но только коробки с открытой гранью (VisibilityIndex)
+RENDER_MODES = ('boxes', 'merged', 'culled')
+# С какого числа коробок режим по умолчанию - 'merged'
+MERGED_MODE_THRESHOLD = 200
+# Цвета для пользовательских коробок
+CUSTOM_COLORS = ['red', 'blue', 'green', 'yellow', 'purple', 'orange', 'pink', 'cyan']
+BOX_OPACITY = 0.7
+# В режиме 'culled' внутренние коробки не рисуются, поэтому видимые - непрозрачные
+CULLED_OPACITY = 1.0
+
+# Сетка видимости: не больше стольких ячеек по оси (иначе - равномерная сетка)
+VOXEL_AXIS_LIMIT = 128
+# Доля коробок, начиная с которой обновление видимости пересчитывает все коробки сразу
+INCREMENTAL_FRACTION = 0.25
+
+# Единичный куб: вершины, треугольники граней и ребра (в порядке get_cube_vertices_and_faces)
+CUBE_CORNERS = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]
+], dtype=np.float32)
+CUBE_FACES = np.array([
+    [0, 1, 2], [0, 2, 3], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4],
+    [2, 3, 7], [2, 7, 6], [0, 3, 7], [0, 7, 4], [1, 2, 6], [1, 6, 5]
+], dtype=np.int32)
+# Обход ребер куба ломаными (-1 - разрыв линии): 20 точек вместо 36 для 12 отдельных ребер
+CUBE_EDGE_PATH = np.array([0, 1, 2, 3, 0, 4, 5, 6, 7, 4, -1, 1, 5, -1, 2, 6, -1, 3, 7, -1], dtype=np.int32)
+
 def get_box_type_from_name(name):
     return name.split('_')[0]
 
@@ -94,60 +124,321 @@ def create_pallet_trace(dims):
         name='Поддон'
     )
 
-def create_3d_visualization(packer):
+def get_box_colors(box_types):
+    """Цвета типов коробок: из STANDARD_BOXES или по очереди из CUSTOM_COLORS (словарь тип -> цвет)"""
+    colors = {}
+    color_index = 0
+    for box_type in box_types:
+        if box_type in colors:
+            continue
+        if box_type in STANDARD_BOXES:
+            colors[box_type] = STANDARD_BOXES[box_type]['color']
+        else:
+            colors[box_type] = CUSTOM_COLORS[color_index % len(CUSTOM_COLORS)]
+            color_index += 1
+    return colors
+
+def box_arrays(items):
+    """Позиции и размеры предметов массивами (n, 3) float32"""
+    positions = np.array([item.position for item in items], dtype=np.float32).reshape(-1, 3)
+    dims = np.array([(item.width, item.height, item.depth) for item in items], dtype=np.float32).reshape(-1, 3)
+    return positions, dims
+
+def create_merged_box_traces(positions, dims, type_ids, type_colors, names=None, opacity=BOX_OPACITY):
+    """Все коробки одним Mesh3d и одним Scatter3d ребер.
+
+    type_ids - номер типа коробки (индекс в type_colors) для каждой коробки. Цвет задается
+    по граням через intensity с дискретной шкалой, поэтому все массивы числовые и
+    передаются в браузер как типизированные (без списков строк цветов).
+    """
+    count = len(positions)
+    vertices = (positions[:, None, :] + CUBE_CORNERS[None, :, :] * dims[:, None, :]).reshape(-1, 3)
+    faces = (CUBE_FACES[None, :, :] + (np.arange(count, dtype=np.int32) * 8)[:, None, None]).reshape(-1, 3)
+    intensity = np.repeat(np.asarray(type_ids, dtype=np.float32) + 0.5, len(CUBE_FACES))
+
+    # Дискретная шкала: тип t занимает отрезок [t, t + 1] из [0, число типов]
+    type_count = max(1, len(type_colors))
+    colorscale = []
+    for index, color in enumerate(type_colors or ['gray']):
+        colorscale.extend([[index / type_count, color], [(index + 1) / type_count, color]])
+
+    mesh = go.Mesh3d(
+        x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+        i=faces[:, 0], j=faces[:, 1], k=faces[:, 2],
+        intensity=intensity, intensitymode='cell',
+        colorscale=colorscale, cmin=0, cmax=type_count, showscale=False,
+        opacity=opacity,
+        flatshading=True,
+        name='Коробки',
+        showlegend=False
+    )
+    if names is not None:
+        mesh.update(hovertext=np.repeat(np.asarray(names, dtype=object), len(CUBE_CORNERS)),
+                    hovertemplate='%{hovertext}<extra></extra>')
+
+    # Ребра: ломаные CUBE_EDGE_PATH каждой коробки, разрывы - NaN
+    corners = vertices.reshape(count, len(CUBE_CORNERS), 3)
+    segments = corners[:, CUBE_EDGE_PATH]
+    segments[:, CUBE_EDGE_PATH < 0] = np.nan
+    segments = segments.reshape(-1, 3)
+    edges = go.Scatter3d(
+        x=segments[:, 0], y=segments[:, 1], z=segments[:, 2],
+        mode='lines',
+        line=dict(color='black', width=2),
+        name='Ребра',
+        hoverinfo='skip',
+        showlegend=False
+    )
+    return mesh, edges
+
+def create_legend_traces(type_colors):
+    """Пустые trace для легенды по типам коробок (словарь тип -> цвет)"""
+    return [
+        go.Scatter3d(
+            x=[None], y=[None], z=[None],
+            mode='markers',
+            marker=dict(color=color, size=8, symbol='square'),
+            name=box_type,
+            showlegend=True
+        )
+        for box_type, color in type_colors.items()
+    ]
+
+def height_layers(bottoms, tops):
+    """Номер слоя каждой коробки по настоящим разрывам по высоте: отметкам z, которые
+    не пересекает ни одна коробка (если таких нет - все коробки в одном слое)"""
+    bottoms = np.asarray(bottoms, dtype=np.float64)
+    tops = np.asarray(tops, dtype=np.float64)
+    candidates = np.unique(bottoms)
+    # Коробок, пересекающих отметку: начались ниже нее минус закончились не выше
+    crossing = (np.searchsorted(np.sort(bottoms), candidates, 'left') -
+                np.searchsorted(np.sort(tops), candidates, 'right'))
+    breaks = candidates[(crossing == 0) & (candidates > 0)]
+    return np.searchsorted(breaks, bottoms, 'right')
+
+def _axis_edges(starts, ends, size):
+    """Границы ячеек по оси: все координаты коробок (точная сетка) или, если их больше
+    VOXEL_AXIS_LIMIT, равномерная сетка"""
+    edges = np.unique(np.clip(np.concatenate(([0, size], starts, ends)), 0, size))
+    if len(edges) - 1 > VOXEL_AXIS_LIMIT:
+        edges = np.linspace(0, size, VOXEL_AXIS_LIMIT + 1)
+    return edges
+
+class VisibilityIndex:
+    """Какие коробки видны снаружи: у коробки есть грань, не закрытая соседями целиком.
+
+    Пространство поддона делится на ячейки по координатам граней коробок (при большом их
+    числе - равномерно по VOXEL_AXIS_LIMIT на ось). Ячейка занята, если целиком внутри
+    коробки; грань закрыта, если заняты все ячейки вплотную за ней. Пол поддона закрывает
+    нижние грани, стенки поддона - нет. На грубой сетке ошибка только в сторону "видна".
+
+    separate_layers=True - слои (height_layers) рассматриваются отдельно, как в разнесенном
+    виде: коробки другого слоя грани не закрывают. update(active) меняет набор показанных
+    коробок (срез по высоте) и пересчитывает только коробки рядом с изменившимися.
+    """
+
+    def __init__(self, positions, dims, bin_dims, separate_layers=False):
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.dims = np.asarray(dims, dtype=np.float64).reshape(-1, 3)
+        count = len(self.positions)
+        starts, ends = self.positions, self.positions + self.dims
+        self.layers = height_layers(starts[:, 2], ends[:, 2])
+        self.separate_layers = separate_layers
+        # Значение ячейки: 0 - свободна, иначе номер слоя занявшей коробки + 1
+        self._owner = (self.layers + 1 if separate_layers else np.ones(count, dtype=np.int64)).astype(np.int16)
+
+        self.edges = [_axis_edges(starts[:, axis], ends[:, axis], bin_dims[axis]) for axis in range(3)]
+        shape = tuple(len(edges) - 1 for edges in self.edges)
+        # Ячейки внутри коробки [inner_lo, inner_hi) и перекрытые ее гранью [cover_lo, cover_hi)
+        self._inner = np.zeros((count, 3, 2), dtype=np.int64)
+        cover = np.zeros((count, 3, 2), dtype=np.int64)
+        before = np.zeros((count, 3), dtype=np.int64)
+        after = np.zeros((count, 3), dtype=np.int64)
+        for axis, edges in enumerate(self.edges):
+            start, end = starts[:, axis], ends[:, axis]
+            self._inner[:, axis, 0] = np.searchsorted(edges, start, 'left')
+            self._inner[:, axis, 1] = np.maximum(np.searchsorted(edges, end, 'right') - 1, self._inner[:, axis, 0])
+            cover[:, axis, 0] = np.clip(np.searchsorted(edges, start, 'right') - 1, 0, shape[axis] - 1)
+            cover[:, axis, 1] = np.clip(np.searchsorted(edges, end, 'left'), cover[:, axis, 0] + 1, shape[axis])
+            # Ячейки вплотную перед и за коробкой по оси
+            before[:, axis] = np.searchsorted(edges, start, 'left') - 1
+            after[:, axis] = np.searchsorted(edges, end, 'right') - 1
+
+        # Грани: слой ячеек за гранью [x0, x1, y0, y1, z0, z1] и положение грани
+        # (0 - внутри поддона, 1 - на стенке или выше поддона - открыта, 2 - на полу - закрыта)
+        self._slabs = np.zeros((count, 6, 6), dtype=np.int64)
+        self._outside = np.zeros((count, 6), dtype=np.int8)
+        for axis in range(3):
+            for side, neighbour in enumerate((before[:, axis], after[:, axis])):
+                face = 2 * axis + side
+                self._slabs[:, face] = cover.reshape(count, 6)
+                self._slabs[:, face, 2 * axis] = neighbour
+                self._slabs[:, face, 2 * axis + 1] = neighbour + 1
+                outside = (neighbour < 0) | (neighbour >= shape[axis])
+                self._outside[:, face] = np.where(outside, 2 if (axis == 2 and side == 0) else 1, 0)
+
+        self._grid = np.zeros(shape, dtype=np.int16)
+        self.active = np.zeros(count, dtype=bool)
+        self.visible = np.zeros(count, dtype=bool)
+        self.update(np.ones(count, dtype=bool))
+
+    @classmethod
+    def from_items(cls, bin_, items, separate_layers=False):
+        """Индекс по предметам py3dbp (в порядке items)"""
+        positions, dims = box_arrays(items)
+        return cls(positions, dims, (float(bin_.width), float(bin_.height), float(bin_.depth)), separate_layers)
+
+    def _fill(self, boxes, clear=False):
+        for box in boxes:
+            (x0, x1), (y0, y1), (z0, z1) = self._inner[box]
+            self._grid[x0:x1, y0:y1, z0:z1] = 0 if clear else self._owner[box]
+
+    def update(self, active):
+        """Показать коробки active (маска); возвращает маску видимых коробок"""
+        active = np.asarray(active, dtype=bool)
+        removed = np.flatnonzero(self.active & ~active)
+        added = np.flatnonzero(active & ~self.active)
+        if not len(removed) and not len(added):
+            return self.visible
+        self._fill(removed, clear=True)
+        self._fill(added)
+        self.active = active
+        self.visible &= active
+
+        changed = np.concatenate((removed, added))
+        if len(changed) > INCREMENTAL_FRACTION * len(self.active):
+            self._refresh(np.flatnonzero(active))
+            return self.visible
+
+        # Пересчет только коробок, чьи соседние ячейки могли измениться
+        inner = self._inner[changed]
+        low, high = inner[:, :, 0].min(axis=0), inner[:, :, 1].max(axis=0)
+        near = active.copy()
+        for axis in range(3):
+            near &= (self._slabs[:, :, 2 * axis].min(axis=1) < high[axis]) & \
+                    (self._slabs[:, :, 2 * axis + 1].max(axis=1) > low[axis])
+        near[added] = True
+        self._refresh_each(np.flatnonzero(near & active))
+        return self.visible
+
+    def _refresh_each(self, boxes):
+        grid = self._grid
+        for box in boxes:
+            visible = False
+            for face in range(6):
+                outside = self._outside[box, face]
+                if outside:
+                    visible = outside == 1
+                else:
+                    x0, x1, y0, y1, z0, z1 = self._slabs[box, face]
+                    visible = not (grid[x0:x1, y0:y1, z0:z1] == self._owner[box]).all()
+                if visible:
+                    break
+            self.visible[box] = visible
+
+    def _refresh(self, boxes):
+        """Пересчет всех коробок boxes: суммы занятых ячеек слоя за гранями по префиксным суммам"""
+        self.visible[:] = False
+        for owner in np.unique(self._owner[boxes]):
+            group = boxes[self._owner[boxes] == owner]
+            prefix = np.zeros(tuple(size + 1 for size in self._grid.shape), dtype=np.int32)
+            prefix[1:, 1:, 1:] = (self._grid == owner).cumsum(0).cumsum(1).cumsum(2)
+
+            slabs = self._slabs[group]
+            inside = self._outside[group] == 0
+            x0, x1, y0, y1, z0, z1 = (np.where(inside, slabs[:, :, index], 0) for index in range(6))
+            filled = (prefix[x1, y1, z1] - prefix[x0, y1, z1] - prefix[x1, y0, z1] - prefix[x1, y1, z0] +
+                      prefix[x0, y0, z1] + prefix[x0, y1, z0] + prefix[x1, y0, z0] - prefix[x0, y0, z0])
+            open_faces = (self._outside[group] == 1) | (inside & (filled < (x1 - x0) * (y1 - y0) * (z1 - z0)))
+            self.visible[group] = open_faces.any(axis=1)
+
+def create_3d_visualization(packer, mode=None, visibility=None, cutaway_z=None, explode_gap=0):
+    """3D-сцена упаковки. mode - один из RENDER_MODES; по умолчанию 'merged',
+    если коробок больше MERGED_MODE_THRESHOLD, иначе 'boxes'.
+
+    Для 'culled': visibility - VisibilityIndex по packer.bins[0].items (его стоит хранить
+    между вызовами - тогда срез пересчитывается инкрементально), cutaway_z - показать
+    только коробки, начинающиеся ниже этой отметки, explode_gap - поднять каждый слой
+    на explode_gap больше предыдущего (индекс должен быть с separate_layers=True).
+    """
+    items = packer.bins[0].items
+    if mode is None:
+        mode = 'merged' if len(items) > MERGED_MODE_THRESHOLD else 'boxes'
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Неизвестный режим отрисовки: {mode}. Доступны: {', '.join(RENDER_MODES)}")
+
     fig = go.Figure()
     bin_dims = [packer.bins[0].width, packer.bins[0].height, packer.bins[0].depth]
+    z_range = bin_dims[2]
+    title = "3D визуализация упаковки"
     
     # Добавляем поддон
     pallet_trace = create_pallet_trace(bin_dims)
     fig.add_trace(pallet_trace)
     
-    # Цвета для пользовательских коробок
-    custom_colors = ['red', 'blue', 'green', 'yellow', 'purple', 'orange', 'pink', 'cyan']
-    custom_box_colors = {}
-    color_index = 0
-    
     # Сортируем элементы по высоте для лучшего отображения
     sorted_items = sorted(
-        packer.bins[0].items,
+        items,
         key=lambda x: x.position[2]
     )
-    
-    for item in sorted_items:
-        pos = [item.position[0], item.position[1], item.position[2]]
-        dims = [item.width, item.height, item.depth]
-        box_type = get_box_type_from_name(item.name)
-        
-        # Получаем цвет из STANDARD_BOXES или назначаем новый для типа коробки
-        if box_type in STANDARD_BOXES:
-            color = STANDARD_BOXES[box_type]['color']
-        else:
-            if box_type not in custom_box_colors:
-                custom_box_colors[box_type] = custom_colors[color_index % len(custom_colors)]
-                color_index += 1
-            color = custom_box_colors[box_type]
-        
-        vertices, faces = get_cube_vertices_and_faces(pos, dims)
-        box_mesh, box_edges = create_mesh_trace_with_edges(
-            vertices, faces, color, 0.7, f'Коробка {item.name}'
+    box_types = [get_box_type_from_name(item.name) for item in sorted_items]
+    box_colors = get_box_colors(box_types)
+    type_index = {box_type: index for index, box_type in enumerate(box_colors)}
+
+    if mode == 'culled':
+        if visibility is None:
+            visibility = VisibilityIndex.from_items(packer.bins[0], items, separate_layers=explode_gap > 0)
+        active = np.ones(len(items), dtype=bool) if cutaway_z is None else visibility.positions[:, 2] < cutaway_z
+        shown = np.flatnonzero(visibility.update(active))
+        positions = visibility.positions[shown].astype(np.float32)
+        positions[:, 2] += visibility.layers[shown] * explode_gap
+        if explode_gap and len(items):
+            z_range += explode_gap * int(visibility.layers.max())
+        shown_items = [items[index] for index in shown]
+        box_mesh, box_edges = create_merged_box_traces(
+            positions, visibility.dims[shown].astype(np.float32),
+            [type_index[get_box_type_from_name(item.name)] for item in shown_items], list(box_colors.values()),
+            names=[f'Коробка {item.name}' for item in shown_items], opacity=CULLED_OPACITY
         )
-        
         fig.add_trace(box_mesh)
         fig.add_trace(box_edges)
+        fig.add_traces(create_legend_traces(box_colors))
+        title += f" (видимых коробок: {len(shown)} из {int(active.sum())})"
+    elif mode == 'merged':
+        positions, dims = box_arrays(sorted_items)
+        box_mesh, box_edges = create_merged_box_traces(
+            positions, dims, [type_index[box_type] for box_type in box_types], list(box_colors.values()),
+            names=[f'Коробка {item.name}' for item in sorted_items]
+        )
+        fig.add_trace(box_mesh)
+        fig.add_trace(box_edges)
+        fig.add_traces(create_legend_traces(box_colors))
+    else:
+        for item, box_type in zip(sorted_items, box_types):
+            pos = [item.position[0], item.position[1], item.position[2]]
+            dims = [item.width, item.height, item.depth]
+
+            vertices, faces = get_cube_vertices_and_faces(pos, dims)
+            box_mesh, box_edges = create_mesh_trace_with_edges(
+                vertices, faces, box_colors[box_type], BOX_OPACITY, f'Коробка {item.name}'
+            )
+
+            fig.add_trace(box_mesh)
+            fig.add_trace(box_edges)
     
     fig.update_layout(
         scene=dict(
             aspectmode='cube',
             xaxis=dict(nticks=4, range=[0, bin_dims[0]], title='Длина'),
             yaxis=dict(nticks=4, range=[0, bin_dims[1]], title='Ширина'),
-            zaxis=dict(nticks=4, range=[0, bin_dims[2]], title='Высота'),
+            zaxis=dict(nticks=4, range=[0, z_range], title='Высота'),
             camera=dict(
                 up=dict(x=0, y=0, z=1),
                 center=dict(x=0, y=0, z=0),
                 eye=dict(x=2, y=2, z=2)
             )
         ),
-        title="3D визуализация упаковки",
+        title=title,
         showlegend=True,
         legend=dict(
             yanchor="top",
@@ -1,5 +1,6 @@
 # src/validation/__init__.py
 
 from .validators import DataValidator, ValidationConfig, ValidationError, ValidationResult
+from .vectorized import validate_boxes_frame
 
-__all__ = ['DataValidator', 'ValidationConfig', 'ValidationError', 'ValidationResult']
\ No newline at end of file
+__all__ = ['DataValidator', 'ValidationConfig', 'ValidationError', 'ValidationResult', 'validate_boxes_frame']
\ No newline at end of file
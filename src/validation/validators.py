@@ -3,6 +3,7 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 import numpy as np
+import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +24,8 @@ class ValidationError:
     field: str
     value: Any
     suggestion: Optional[str] = None
+    # Номер строки (коробки) с 0 для ошибок списка коробок
+    row: Optional[int] = None
 
 class ValidationResult:
     def __init__(self):
@@ -39,6 +42,18 @@ class ValidationResult:
         self.warnings.append(warning)
         logger.warning(f"Validation warning: {warning}")
 
+    def extend_errors(self, errors: List[ValidationError]):
+        """Добавить ошибки пакетом (одна запись в журнал вместо записи на ошибку)"""
+        if errors:
+            self.is_valid = False
+            self.errors.extend(errors)
+            logger.error(f"Validation errors: {len(errors)}, first: {errors[0].message}")
+
+    def extend_warnings(self, warnings: List[str]):
+        if warnings:
+            self.warnings.extend(warnings)
+            logger.warning(f"Validation warnings: {len(warnings)}, first: {warnings[0]}")
+
 class ValidationConfig:
     MIN_DIMENSION = 0.1
     MAX_DIMENSION = 500.0
@@ -342,55 +357,13 @@ class DataValidator:
             )
 
     def validate_boxes_list(self, boxes: List[Dict[str, Any]]) -> ValidationResult:
-        result = ValidationResult()
-        
-        if len(boxes) == 0:
-            result.add_error(ValidationError(
-                ValidationErrorType.QUANTITY_ERROR,
-                "Список коробок не может быть пустым",
-                'boxes_count',
-                0,
-                "Добавьте хотя бы одну коробку"
-            ))
-            return result
-
-        if len(boxes) > self.config.MAX_BOXES_COUNT:
-            result.add_warning(
-                f"Очень много коробок ({len(boxes)}). Это может замедлить расчет или привести к частичной упаковке."
-            )
-
-        total_weight = 0
-        total_volume = 0
-        valid_boxes_count = 0
-        
-        for i, box in enumerate(boxes):
-            box_result = self.validate_box_data(box)
-            
-            for error in box_result.errors:
-                error.field = f"box_{i+1}.{error.field}"
-                result.add_error(error)
-            
-            for warning in box_result.warnings:
-                result.add_warning(f"Коробка {i+1}: {warning}")
-            
-            if box_result.is_valid:
-                valid_boxes_count += 1
-                total_weight += box.get('weight', 0)
-                volume = (box.get('length', 0) * box.get('width', 0) * box.get('height', 0)) / 1000000
-                total_volume += volume
-
-        if total_weight > 10000:
-            result.add_warning(f"Очень большой общий вес коробок: {total_weight:.1f} кг")
-        
-        if total_volume > 100:
-            result.add_warning(f"Очень большой общий объем коробок: {total_volume:.1f} м³")
-        
-        if valid_boxes_count < len(boxes):
-            result.add_warning(
-                f"Из {len(boxes)} коробок валидны только {valid_boxes_count}. Исправьте ошибки в остальных коробках."
-            )
+        from .vectorized import frame_from_boxes
+        return self.validate_boxes_frame(frame_from_boxes(boxes))[1]
 
-        return result
+    def validate_boxes_frame(self, df: pd.DataFrame):
+        """Векторизованная проверка таблицы коробок; возвращает (нормализованные данные, результат)"""
+        from .vectorized import validate_boxes_frame
+        return validate_boxes_frame(df, self.config)
 
     def validate_packing_feasibility(self, boxes: List[Dict[str, Any]], pallet: Dict[str, Any]) -> ValidationResult:
         result = ValidationResult()
@@ -512,22 +485,8 @@ class DataValidator:
             )
 
 def validate_csv_data(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    validator = DataValidator()
-    validated_boxes = []
-    errors = []
-
-    for i, row in enumerate(data):
-        try:
-            result = validator.validate_box_data(row)
-            if result.is_valid:
-                validated_boxes.append(row)
-            else:
-                error_messages = [error.message for error in result.errors]
-                errors.append(f"Строка {i+1}: {'; '.join(error_messages)}")
-        except Exception as e:
-            errors.append(f"Строка {i+1}: Неожиданная ошибка - {str(e)}")
-
-    if errors:
-        raise ValueError(f"Обнаружены ошибки в данных:\n" + "\n".join(errors[:10]))
-
-    return validated_boxes
\ No newline at end of file
+    from .vectorized import frame_from_boxes, summarize_errors
+    frame, result = DataValidator().validate_boxes_frame(frame_from_boxes(data))
+    if not result.is_valid:
+        raise ValueError(f"Обнаружены ошибки в данных:\n" + summarize_errors(result))
+    return frame.to_dict('records')
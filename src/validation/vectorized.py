@@ -0,0 +1,283 @@
+# src/validation/vectorized.py
+"""Векторизованная проверка списка коробок за один проход по столбцам.
+
+Правила те же, что у DataValidator.validate_box_data и validate_boxes_list (пороги из
+ValidationConfig), но каждое правило - одна операция над столбцом NumPy, а объекты
+ValidationError создаются только для строк с ошибками. Ошибки и предупреждения идут
+в порядке строк, как при покоробочной проверке; у ошибки заполнен row (номер строки с 0),
+поле - box_{row+1}.{поле}.
+
+BoxTableValidation проверяет таблицу частями (потоковое чтение файлов): номера строк
+сквозные, итоговые предупреждения (число коробок, суммарные вес и объем) - по всем частям.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .validators import ValidationConfig, ValidationError, ValidationErrorType, ValidationResult
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('length', 'width', 'height', 'weight')
+DIMENSION_FIELDS = ('length', 'width', 'height')
+# Предупреждение о большом количестве коробок одного типа
+LARGE_QUANTITY = 100
+MAX_DESCRIPTION_LENGTH = 100
+# Пороги суммарного веса (кг) и объема (м³) валидных коробок для предупреждений
+TOTAL_WEIGHT_WARNING = 10000
+TOTAL_VOLUME_WARNING = 100
+
+
+def _absent(column):
+    """Пустые значения (None): у словарей коробок это отсутствующее поле, а NaN - нечисловое
+    значение, как в validate_box_data; в числовых столбцах None не бывает"""
+    if not pd.api.types.is_object_dtype(column):
+        return np.zeros(len(column), dtype=bool)
+    return np.fromiter((value is None for value in column.to_numpy()), dtype=bool, count=len(column))
+
+
+def frame_from_boxes(boxes):
+    """Таблица из словарей коробок: отсутствующие поля - None, а не NaN (см. _absent)"""
+    columns = list(dict.fromkeys(key for box in boxes for key in box))
+    return pd.DataFrame({column: [box.get(column) for box in boxes] for column in columns}, dtype=object)
+
+
+def _numeric(column):
+    """Столбец как float64: NaN для пустых и нечисловых значений, +-inf сохраняется"""
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        return column.to_numpy(dtype=float, na_value=np.nan)
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+class _Collector:
+    """Ошибки и предупреждения по строкам части; порядок - (строка, порядок правила)"""
+
+    def __init__(self, offset=0):
+        self.offset = offset
+        self.errors = []
+        self.warnings = []
+
+    def error(self, rows, values, error_type, message, field, suggestion):
+        for row, value in zip((rows + self.offset).tolist(), values.tolist()):
+            text = message(value) if callable(message) else message
+            self.errors.append((row, len(self.errors), ValidationError(
+                error_type, text, f"box_{row + 1}.{field}", value, suggestion, row
+            )))
+
+    def warning(self, rows, values, message):
+        for row, value in zip((rows + self.offset).tolist(), values.tolist()):
+            self.warnings.append((row, len(self.warnings), f"Коробка {row + 1}: {message(value)}"))
+
+    def apply(self, result, room=None):
+        """Перенести в result (не больше room ошибок); возвращает число перенесенных ошибок"""
+        self.errors.sort(key=lambda entry: entry[:2])
+        errors = [error for _, _, error in self.errors[:room]]
+        if self.errors:
+            # Ошибки сверх лимита не хранятся, но результат все равно невалиден
+            result.is_valid = False
+            result.extend_errors(errors)
+        if self.warnings:
+            self.warnings.sort(key=lambda entry: entry[:2])
+            result.extend_warnings([warning for _, _, warning in self.warnings])
+        return len(errors)
+
+
+def _check_range(collector, values, rows_mask, field, error_type, minimum, maximum, unit, labels):
+    """Ошибки "не положительно / меньше минимума / больше максимума" (первое сработавшее);
+    возвращает маску строк с ошибкой"""
+    positive, too_small, too_large = labels
+    nonpositive = rows_mask & (values <= 0)
+    small = rows_mask & ~nonpositive & (values < minimum)
+    large = rows_mask & ~nonpositive & (values > maximum)
+    collector.error(np.flatnonzero(nonpositive), values[nonpositive], error_type, positive, field,
+                    "Введите значение больше 0")
+    collector.error(np.flatnonzero(small), values[small], error_type, too_small, field,
+                    f"Увеличьте до {minimum} {unit} или больше")
+    collector.error(np.flatnonzero(large), values[large], error_type, too_large, field,
+                    f"Уменьшите до {maximum} {unit} или меньше")
+    return nonpositive | small | large
+
+
+class BoxTableValidation:
+    """Проверка таблицы коробок по частям (например, при потоковом чтении файла).
+
+    add() проверяет строки очередной части и возвращает ее с числовыми столбцами,
+    finish() добавляет итоговые предупреждения по всем частям. error_limit ограничивает
+    число хранимых ошибок (остальные только учитываются в is_valid).
+    """
+
+    def __init__(self, config=None, error_limit=None):
+        self.config = config or ValidationConfig()
+        self.error_limit = error_limit
+        self.result = ValidationResult()
+        self.count = 0
+        self.valid_count = 0
+        self.total_weight = 0.0
+        self.total_volume = 0.0
+        self.hidden_errors = 0
+
+    def add(self, df):
+        """Проверить строки части; номера строк продолжают предыдущие части"""
+        config = self.config
+        frame = df.copy()
+        count = len(frame)
+        collector = _Collector(self.count)
+        self.count += count
+        if count == 0:
+            return frame
+
+        values = {}
+        type_error = np.zeros(count, dtype=bool)
+        for field in REQUIRED_FIELDS:
+            if field not in frame.columns:
+                collector.error(np.arange(count), np.full(count, None), ValidationErrorType.DATA_TYPE_ERROR,
+                                f"Отсутствует обязательное поле: {field}", field,
+                                f"Добавьте поле {field} с числовым значением")
+                type_error[:] = True
+                continue
+            column = frame[field]
+            missing = _absent(column)
+            numbers = _numeric(column)
+            invalid = ~missing & ~np.isfinite(numbers)
+            collector.error(np.flatnonzero(missing), np.full(missing.sum(), None), ValidationErrorType.DATA_TYPE_ERROR,
+                            f"Отсутствует обязательное поле: {field}", field,
+                            f"Добавьте поле {field} с числовым значением")
+            collector.error(np.flatnonzero(invalid), column.to_numpy(dtype=object)[invalid],
+                            ValidationErrorType.DATA_TYPE_ERROR, f"Поле {field} должно быть числом", field,
+                            "Введите числовое значение (например: 30.5)")
+            type_error |= missing | invalid
+            values[field] = numbers
+            frame[field] = numbers
+
+        # Строки с ошибками типов дальше не проверяются (как в validate_box_data)
+        checked = ~type_error
+        value_error = np.zeros(count, dtype=bool)
+        if checked.any():
+            for field in DIMENSION_FIELDS:
+                name = field.capitalize()
+                value_error |= _check_range(
+                    collector, values[field], checked, field, ValidationErrorType.DIMENSION_ERROR,
+                    config.MIN_DIMENSION, config.MAX_DIMENSION, 'см', (
+                        f"{name} должна быть положительной",
+                        f"{name} слишком мала (минимум {config.MIN_DIMENSION} см)",
+                        f"{name} слишком велика (максимум {config.MAX_DIMENSION} см)"
+                    )
+                )
+            value_error |= _check_range(
+                collector, values['weight'], checked, 'weight', ValidationErrorType.WEIGHT_ERROR,
+                config.MIN_WEIGHT, config.MAX_WEIGHT, 'кг', (
+                    "Вес должен быть положительным",
+                    f"Вес слишком мал (минимум {config.MIN_WEIGHT} кг)",
+                    f"Вес слишком велик (максимум {config.MAX_WEIGHT} кг)"
+                )
+            )
+
+            # Плотность (кг/дм³) - только для строк без ошибок
+            dense_rows = checked & ~value_error
+            with np.errstate(divide='ignore', invalid='ignore'):
+                volume_dm3 = values['length'] * values['width'] * values['height'] / 1000
+                density = values['weight'] / volume_dm3
+            light = dense_rows & (density < config.MIN_DENSITY)
+            heavy = dense_rows & (density > config.MAX_DENSITY)
+            collector.warning(np.flatnonzero(light), density[light], lambda value: (
+                f"Очень низкая плотность материала ({value:.3f} кг/дм³). Проверьте правильность размеров и веса."
+            ))
+            collector.error(np.flatnonzero(heavy), density[heavy], ValidationErrorType.DENSITY_ERROR,
+                            lambda value: f"Слишком высокая плотность материала ({value:.3f} кг/дм³)", 'density',
+                            "Проверьте правильность размеров и веса. Возможно, ошибка в единицах измерения.")
+            value_error |= heavy
+
+        quantity_error = np.zeros(count, dtype=bool)
+        if 'quantity' in frame.columns:
+            column = frame['quantity']
+            absent = _absent(column)
+            present = checked & ~absent
+            numbers = _numeric(column)
+            finite = np.isfinite(numbers)
+            not_integer = present & (~finite | (np.where(finite, numbers, 0) % 1 != 0))
+            nonpositive = present & ~not_integer & (numbers <= 0)
+            large = present & ~not_integer & (numbers > LARGE_QUANTITY)
+            raw = column.to_numpy(dtype=object)
+            collector.error(np.flatnonzero(not_integer), raw[not_integer], ValidationErrorType.QUANTITY_ERROR,
+                            "Количество должно быть целым числом", 'quantity', "Введите целое число (например: 5)")
+            collector.error(np.flatnonzero(nonpositive), raw[nonpositive], ValidationErrorType.QUANTITY_ERROR,
+                            "Количество должно быть положительным целым числом", 'quantity',
+                            "Введите целое число больше 0")
+            collector.warning(np.flatnonzero(large), numbers[large].astype(int), lambda value: (
+                f"Большое количество коробок одного типа ({value}). Убедитесь, что это корректно."
+            ))
+            quantity_error = not_integer | nonpositive
+            # Целый тип - только если проверены все строки (в остальных может быть что угодно)
+            if checked.all() and not quantity_error.any() and not absent.any():
+                frame['quantity'] = numbers.astype(np.int64)
+
+        if 'description' in frame.columns:
+            descriptions = frame['description']
+            filled = checked & descriptions.notna().to_numpy() & (descriptions.astype(str) != '').to_numpy()
+            long = filled & (descriptions.astype(str).str.strip().str.len() > MAX_DESCRIPTION_LENGTH).to_numpy()
+            collector.warning(np.flatnonzero(long), np.zeros(long.sum()),
+                              lambda _: f"Описание слишком длинное (более {MAX_DESCRIPTION_LENGTH} символов)")
+
+        room = None if self.error_limit is None else max(0, self.error_limit - len(self.result.errors))
+        self.hidden_errors += len(collector.errors) - collector.apply(self.result, room)
+
+        valid = ~(type_error | value_error | quantity_error)
+        self.valid_count += int(valid.sum())
+        if valid.any():
+            self.total_weight += float(values['weight'][valid].sum())
+            self.total_volume += float((
+                values['length'][valid] * values['width'][valid] * values['height'][valid]
+            ).sum()) / 1000000
+        return frame
+
+    def finish(self):
+        """Итоговые предупреждения по всем строкам; возвращает ValidationResult"""
+        result, config, count = self.result, self.config, self.count
+        if count == 0:
+            result.add_error(ValidationError(
+                ValidationErrorType.QUANTITY_ERROR,
+                "Список коробок не может быть пустым",
+                'boxes_count',
+                0,
+                "Добавьте хотя бы одну коробку"
+            ))
+            return result
+        if self.hidden_errors:
+            result.add_warning(f"Показаны первые {len(result.errors)} ошибок, еще {self.hidden_errors} не показано")
+
+        if count > config.MAX_BOXES_COUNT:
+            result.add_warning(
+                f"Очень много коробок ({count}). Это может замедлить расчет или привести к частичной упаковке."
+            )
+        if self.total_weight > TOTAL_WEIGHT_WARNING:
+            result.add_warning(f"Очень большой общий вес коробок: {self.total_weight:.1f} кг")
+        if self.total_volume > TOTAL_VOLUME_WARNING:
+            result.add_warning(f"Очень большой общий объем коробок: {self.total_volume:.1f} м³")
+        if self.valid_count < count:
+            result.add_warning(
+                f"Из {count} коробок валидны только {self.valid_count}. Исправьте ошибки в остальных коробках."
+            )
+        return result
+
+
+def validate_boxes_frame(df, config=None):
+    """Проверить коробки (строки df); возвращает (данные с числовыми столбцами, ValidationResult)"""
+    validation = BoxTableValidation(config)
+    frame = validation.add(df)
+    return frame, validation.finish()
+
+
+def summarize_errors(result, limit=10):
+    """Ошибки по строкам для сообщения исключения: "Строка N: ошибка; ошибка" (первые limit строк)"""
+    rows = {}
+    for error in result.errors:
+        rows.setdefault(error.row, []).append(error.message)
+    lines = [
+        f"Строка {row + 1}: {'; '.join(messages)}" if row is not None else '; '.join(messages)
+        for row, messages in list(rows.items())[:limit]
+    ]
+    if len(rows) > limit:
+        lines.append(f"... и еще {len(rows) - limit} строк с ошибками")
+    return "\n".join(lines)
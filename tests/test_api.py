@@ -0,0 +1,191 @@
+# tests/test_api.py
+
+import json
+import struct
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+from src.api.main import app, tasks_storage, profile_store, layer_plans_storage
+from src.utils.constants import PackingMethod
+
+@pytest.fixture
+def client():
+    tasks_storage.clear()
+    return TestClient(app)
+
+@pytest.fixture
+def packing_request():
+    return {
+        "pallet": {"length": 120, "width": 80, "height": 160, "max_weight": 1000},
+        "boxes": [
+            {"name": "Коробка", "length": 30, "width": 20, "height": 15, "weight": 2.5, "quantity": 4}
+        ],
+        "method": PackingMethod.LAFF.value
+    }
+
+def test_pack_and_result(client, packing_request):
+    response = client.post("/pack", json=packing_request)
+    assert response.status_code == 200
+    task_id = response.json()["task_id"]
+
+    result = client.get(f"/result/{task_id}").json()
+    assert result["summary"]["total_items"] == 4
+    assert result["summary"]["packed_items"] == 4
+
+def test_fractional_dimensions_returned_in_cm(client, packing_request):
+    packing_request["pallet"]["length"] = 120.5
+    packing_request["boxes"][0]["length"] = 30.5
+    task_id = client.post("/pack", json=packing_request).json()["task_id"]
+
+    result = client.get(f"/result/{task_id}").json()
+    assert result["summary"]["packed_items"] == 4
+    dimensions = [sorted(item["dimensions"].values()) for item in result["packed_items"]]
+    assert all(values == [15.0, 20.0, 30.5] for values in dimensions)
+
+def test_submillimetre_dimensions_not_rounded(client, packing_request):
+    # 3 x 40.04 см не помещаются в 120 см: размеры не округляются до миллиметров
+    packing_request["pallet"].update(length=120, width=80, height=100)
+    packing_request["boxes"] = [
+        {"name": "Коробка", "length": 40.04, "width": 80, "height": 100, "weight": 10, "quantity": 3}
+    ]
+    for method in (PackingMethod.EXTREME_POINTS.value, PackingMethod.LAFF.value):
+        packing_request["method"] = method
+        task_id = client.post("/pack", json=packing_request).json()["task_id"]
+        result = client.get(f"/result/{task_id}").json()
+
+        assert 1 <= result["summary"]["packed_items"] <= 2
+        for item in result["packed_items"]:
+            dimensions, position = item["dimensions"], item["position"]
+            assert sorted(dimensions.values()) == [40.04, 80, 100]
+            assert position["x"] + dimensions["width"] <= 120 + 1e-9
+            assert position["y"] + dimensions["height"] <= 80 + 1e-9
+            assert position["z"] + dimensions["depth"] <= 100 + 1e-9
+    assert result["summary"]["packed_items"] == 2
+
+def test_pack_upload(client):
+    pallet = {"pallet_length": 120, "pallet_width": 80, "pallet_height": 160, "pallet_max_weight": 1000}
+    csv = "name,length,width,height,weight,quantity\nКоробка,30,20,15,2.5,3\nBox,40,30,20,5,1\nКоробка,30,20,15,2.5,1\n"
+    response = client.post(
+        "/pack/upload", data={**pallet, "method": PackingMethod.LAFF.value},
+        files={"file": ("boxes.csv", csv.encode("cp1251"), "text/csv")}
+    )
+    assert response.status_code == 200
+    result = client.get(f"/result/{response.json()['task_id']}").json()
+    assert result["summary"]["total_items"] == 5
+    assert result["summary"]["packed_items"] == 5
+
+    bad = "name,length,width,height,weight,quantity\nКоробка,-30,20,15,2.5,3\n"
+    response = client.post("/pack/upload", data=pallet, files={"file": ("boxes.csv", bad.encode(), "text/csv")})
+    assert response.status_code == 400 and "box_1.length" in response.json()["detail"]
+
+def test_result_export(client, packing_request):
+    task_id = client.post("/pack", json=packing_request).json()["task_id"]
+
+    response = client.get(f"/result/{task_id}/export", params={"format": "csv"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].startswith("status,name") and len(lines) == 5
+    assert client.get(f"/result/{task_id}/export", params={"format": "csv"}).content == response.content
+
+    jsonl = client.get(f"/result/{task_id}/export", params={"format": "jsonl"}).text.splitlines()
+    assert '"type": "statistics"' in jsonl[0] and len(jsonl) == 5
+    xlsx = client.get(f"/result/{task_id}/export", params={"format": "xlsx"})
+    assert xlsx.content[:2] == b"PK"
+    glb = client.get(f"/result/{task_id}/export", params={"format": "glb"}).content
+    assert glb[:4] == b"glTF" and struct.unpack_from("<I", glb, 8)[0] == len(glb)
+    document = json.loads(glb[20:20 + struct.unpack_from("<I", glb, 12)[0]])
+    nodes = [node for node in document["nodes"] if "extensions" in node]
+    assert sum(document["accessors"][node["extensions"]["EXT_mesh_gpu_instancing"]["attributes"]["TRANSLATION"]]["count"]
+               for node in nodes) == 4
+    assert client.get(f"/result/{task_id}/export", params={"format": "pdf"}).status_code == 400
+    assert 'packing_cache_hits_total{cache="export"} 1' in client.get("/metrics").text
+
+def test_result_layer_plans(client, packing_request):
+    task_id = client.post("/pack", json=packing_request).json()["task_id"]
+
+    html = client.get(f"/result/{task_id}/layers")
+    assert html.status_code == 200 and html.headers["content-type"].startswith("text/html")
+    assert html.text.count("<section>") == html.text.count("<svg") >= 1
+    svg = client.get(f"/result/{task_id}/layers", params={"format": "svg", "layer": 1})
+    assert svg.headers["content-type"].startswith("image/svg+xml") and svg.text in html.text
+    assert client.get(f"/result/{task_id}/layers", params={"format": "svg", "layer": 99}).status_code == 400
+    # Слои задачи строятся один раз: SVG слоя берется из того же LayerPlans, что и HTML
+    assert layer_plans_storage[task_id].svg(0) == svg.text
+    client.delete(f"/task/{task_id}")
+    assert task_id not in layer_plans_storage
+
+def test_preflight(client, packing_request):
+    packing_request["boxes"][0]["quantity"] = 300
+    response = client.post("/preflight", json=packing_request)
+    assert response.status_code == 200
+
+    report = response.json()
+    assert report["total_boxes"] == 300
+    assert report["min_pallets"] == 2
+    assert report["min_unpacked"] == 300 - report["max_boxes_single_pallet"]
+    assert report["single_pallet"] == "infeasible"
+
+def test_preflight_rotation_aware_l2(client, packing_request):
+    # Рядом с коробкой 70x100x70 коробка 100x100x50 не встанет ни в какой ориентации
+    packing_request["pallet"].update(length=100, width=100, height=100)
+    packing_request["boxes"] = [
+        {"name": "Куб", "length": 70, "width": 100, "height": 70, "weight": 10, "quantity": 2},
+        {"name": "Плита", "length": 100, "width": 100, "height": 50, "weight": 10, "quantity": 2},
+    ]
+    report = client.post("/preflight", json=packing_request).json()
+    bounds = report["lower_bounds"]
+    assert bounds["l2"] == 3 > max(bounds["l1"], bounds["volume"])
+    assert report["min_pallets"] == 3
+
+def test_metrics_endpoint(client, packing_request):
+    client.post("/pack", json=packing_request)
+    client.get("/health")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert '# TYPE packing_task_duration_seconds histogram' in body
+    assert 'packing_task_duration_seconds_count{packing_method="LAFF",status="completed"}' in body
+    assert 'packing_api_requests_total{method="POST",endpoint="/pack",status="200"}' in body
+    assert 'packing_task_store_size 1' in body
+    assert 'packing_queue_depth 0' in body
+
+def test_health_reports_task_counts(client, packing_request):
+    client.post("/pack", json=packing_request)
+    health = client.get("/health").json()
+    assert health["status"] == "healthy"
+    assert health["task_store_size"] == 1
+    assert health["queue_depth"] == 0
+
+def test_debug_profile(client, packing_request):
+    response = client.post("/debug/profile", json=packing_request, params={"limit": 5, "sort": "tottime"})
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["packing_summary"]["packed_items"] == 4
+    assert 0 < len(profile["functions"]) <= 5
+    assert all(entry["function"].startswith(("src/packers", "src/validation", "src/api"))
+               for entry in profile["functions"])
+
+    listed = client.get("/debug/profiles").json()["profiles"]
+    assert listed[0]["profile_id"] == profile["profile_id"]
+    assert client.get(f"/debug/profiles/{profile['profile_id']}").json()["reason"] == "manual"
+
+    # Ошибка в ключе сортировки - до упаковки
+    assert client.post("/debug/profile", json=packing_request, params={"sort": "time"}).status_code == 400
+    assert client.get("/debug/profiles").json()["profiles"] == listed
+    assert client.get("/debug/profiles/missing").status_code == 404
+
+def test_slow_task_profile_captured(client, packing_request, monkeypatch):
+    profile_store.clear()
+    monkeypatch.setattr(profile_store, "slow_task_threshold", 1e-9)
+    task_id = client.post("/pack", json=packing_request).json()["task_id"]
+
+    profiles = client.get("/debug/profiles").json()["profiles"]
+    assert profiles[0]["reason"] == "slow_task"
+    assert profiles[0]["task_id"] == task_id
@@ -6,6 +6,16 @@ from src.packers.extreme_points import ExtremePointPacker
 from src.packers.laff import LAFFPacker
 from src.packers.corner_points import CornerPointPacker
 from src.packers.sfc import SFCPacker
+from src.packers.beam_search import BeamSearchPacker
+from src.packers.item_types import BoxTypeTable
+from src.packers.ems import EmptySpaces
+from src.packers.collision import VoxelCollision
+from src.packers.units import CoordinateScale
+from src.packers.bounds import martello_l1, martello_l2, preflight
+from src.packers.preselection import select_counts
+from src.packers.lns import improve_packing
+from src.packers.state import PackingState
+from src.packers.raster_points import normal_patterns, axis_candidates, CandidateLattice
 
 # Фикстуры
 @pytest.fixture
@@ -143,3 +153,276 @@ def test_edge_cases(standard_bin):
     assert len(packer.bins[0].items) == 0
     assert len(packer.unpacked_items) == 1
     assert packer.unpacked_items[0].name == 'huge_box'
+
+# Тесты памяти отказов
+@pytest.mark.parametrize('packer_class', [WeightAwarePacker, ExtremePointPacker, SFCPacker])
+def test_failure_memo_keeps_plan(packer_class):
+    def run(use_memo):
+        packer = packer_class()
+        packer.use_failure_memo = use_memo
+        if packer_class is ExtremePointPacker:
+            packer.seed = 0
+        packer.add_bin(Bin('test_pallet', 120, 80, 160, 1000))
+        for i in range(30):
+            packer.add_item(Item(f'Средняя_{i}', 40, 30, 50, 5))
+        packer.pack()
+        return packer
+
+    with_memo, without_memo = run(True), run(False)
+    assert [(item.name, item.position) for item in with_memo.bins[0].items] == \
+        [(item.name, item.position) for item in without_memo.bins[0].items]
+    assert len(with_memo.unpacked_items) == len(without_memo.unpacked_items) > 1
+    assert with_memo.analytics['failure_memo_hits'] > 0
+
+def test_failure_memo_survives_unrelated_placement():
+    packer = WeightAwarePacker(weight_check_enabled=False)
+    packer.add_bin(Bin('test_pallet', 100, 100, 100, 1000))
+    packer.add_item(Item('Плита_пол', 100, 100, 30, 50))
+    packer.add_item(Item('Столб', 10, 10, 60, 40))
+    plate = Item('Плита', 100, 100, 50, 30)
+    packer.add_item(plate)
+    # Малая коробка ставится после отказа плиты: ее верхняя грань плиту не удержит
+    packer.add_item(Item('Малая', 10, 10, 5, 1))
+    packer.pack()
+
+    assert [item.name for item in packer.unpacked_items] == ['Плита']
+    assert packer.bins[0].items[-1].name == 'Малая'
+    assert packer._failure_memo[packer._item_type_key(plate)] == packer._placement_version
+
+# Тесты таблицы типов коробок
+def test_box_type_table_shares_types(standard_bin):
+    table = BoxTypeTable((120, 80, 160))
+    packer = ExtremePointPacker(seed=0)
+    packer.add_bin(standard_bin)
+    medium = table.add_boxes(packer, 'Средняя', 30, 20, 15, 5, 10)
+    assert table.add_boxes(packer, 'Средняя_2', 30, 20, 15, 5, 5) is medium
+    cube = table.add_boxes(packer, 'Куб', 20, 20, 20, 3, 2)
+    tall = table.add_boxes(packer, 'Высокая', 130, 150, 170, 10, 2)
+
+    assert len(table) == 3
+    assert len(medium.orientations) == 6 and len(cube.orientations) == 1
+    assert medium.footprints[medium.orientations.index((30, 20, 15))] == 600
+    assert not any(tall.fits_pallet)
+
+    packer.pack()
+    assert len(packer.bins[0].items) == 17
+    assert sorted(item.name for item in packer.unpacked_items) == ['Высокая_0', 'Высокая_1']
+    assert packer.analytics['rejection_reasons']['does_not_fit_pallet'] == 2
+
+# Тесты растровых точек
+def test_normal_patterns_and_raster_points():
+    assert normal_patterns([30, 20], 100) == [0, 20, 30, 40, 50, 60, 70, 80, 90, 100]
+    # Позиции 0..80 (коробка 40 должна поместиться), сокращение оставляет 0, 40, 80
+    assert axis_candidates([40], 120, reduced=False) == [0, 40, 80]
+    assert axis_candidates([40, 50], 120) == [0, 40, 50, 80]
+
+@pytest.mark.parametrize('packer_class', [WeightAwarePacker, SFCPacker])
+def test_raster_point_packing(standard_bin, packer_class):
+    packer = packer_class(use_raster_points=True)
+    packer.add_bin(standard_bin)
+    for i in range(12):
+        packer.add_item(Item(f'box_{i}', 40, 40, 30, 5))
+    lattice = CandidateLattice.from_items(packer.items, 120, 80)
+    assert lattice.xs == [0, 30, 40, 60, 80, 90] and lattice.ys == [0, 40]
+    packer.pack()
+
+    assert len(packer.bins[0].items) == 12
+    assert all(item.position[0] in lattice.xs for item in packer.bins[0].items if item.position[2] == 0)
+
+# Тесты пустых максимальных пространств
+def test_empty_spaces_tracking():
+    spaces = EmptySpaces(120, 80, 160)
+    spaces.place(0, 0, 0, 120, 80, 100)
+    assert spaces.spaces == [(0, 0, 100, 120, 80, 160)]
+    assert spaces.fits(60, 80, 120)
+    assert not spaces.fits(70, 80, 120, allow_rotation=False)
+
+    spaces.place(0, 0, 100, 60, 80, 60)
+    assert spaces.spaces == [(60, 0, 100, 120, 80, 160)]
+    assert spaces.corner_points(60, 60, 60) == [(60, 0, 100)]
+    assert spaces.fits(10, 61, 10) and not spaces.fits(61, 61, 10)
+
+def test_hopeless_items_skipped(standard_bin):
+    packer = ExtremePointPacker(seed=0)
+    # Иначе второй предмет отклоняется раньше - по свободному объему
+    packer.use_bounds = False
+    packer.add_bin(standard_bin)
+    for i in range(2):
+        packer.add_item(Item(f'Поддон_{i}', 120, 80, 100, 50))
+    packer.pack()
+
+    assert len(packer.bins[0].items) == 1
+    assert packer.analytics['rejection_reasons']['no_empty_space'] == 1
+
+# Тесты воксельной проверки пересечений
+def test_voxel_collision_matches_geometry():
+    grid = VoxelCollision(120, 80, 160)
+    grid.add(0, 0, 0, 40, 40, 100)
+    assert grid.collides(39, 39, 99, 10, 10, 10)
+    assert not grid.collides(40, 0, 0, 10, 10, 10)
+    assert not grid.collides(0, 0, 100, 40, 40, 60)
+    # Нецелые координаты округляются в сторону пересечения
+    assert grid.collides(39.5, 0, 0, 10, 10, 10)
+
+    plans = []
+    for backend in ('geometric', 'voxel'):
+        packer = ExtremePointPacker(seed=0)
+        packer.collision_backend = backend
+        packer.add_bin(Bin('test_pallet', 120, 80, 160, 1000))
+        for i in range(10):
+            packer.add_item(Item(f'box_{i}', 40, 30, 25, 5))
+        packer.pack()
+        plans.append([(item.name, item.position) for item in packer.bins[0].items])
+    assert plans[0] == plans[1]
+
+# Тесты целочисленных координат
+def test_coordinate_scale_roundtrip():
+    assert CoordinateScale.for_values([120, 80, 30.0]).units_per_cm == 1
+    scale = CoordinateScale.for_values([120, 80, 10.5])
+    assert scale.units_per_cm == 10 and scale.to_internal(10.5) == 105
+    assert CoordinateScale.for_values([120, 40.04]).units_per_cm == 100
+    # Сверх MAX_DECIMALS знаков: коробки округляются вверх, поддон вниз
+    fine = CoordinateScale.for_values([1.000001])
+    assert fine.to_internal(1.000001) == 10001 and fine.to_internal(1.000001, round_up=False) == 10000
+
+    packer = ExtremePointPacker(seed=0)
+    packer.scale = scale
+    packer.add_bin(Bin('test_pallet', scale.to_internal(120), scale.to_internal(80), scale.to_internal(100), 1000))
+    table = BoxTypeTable()
+    table.add_boxes(packer, 'box', scale.to_internal(10.5), scale.to_internal(20.1), scale.to_internal(30.3), 1, 4)
+    packer.pack()
+    scale.restore(packer)
+
+    assert len(packer.bins[0].items) == 4
+    assert packer.bins[0].width == 120
+    assert all(sorted((item.width, item.height, item.depth)) == [10.5, 20.1, 30.3] for item in packer.bins[0].items)
+    assert any(value % 1 for item in packer.bins[0].items for value in item.position)
+    # Повторный вызов не меняет размеры
+    packer.scale.restore(packer)
+    assert packer.bins[0].depth == 100
+
+    # Округленные размеры восстанавливаются исходными
+    scale = CoordinateScale.for_values([120.000001, 10.000001])
+    packer = ExtremePointPacker(seed=0)
+    packer.scale = scale
+    packer.add_bin(Bin('test_pallet', scale.to_internal(120.000001, round_up=False), 800000, 1000000, 1000))
+    BoxTypeTable().add_boxes(packer, 'box', scale.to_internal(10.000001), 100000, 100000, 1, 2)
+    packer.pack()
+    scale.restore(packer)
+    assert packer.bins[0].width == 120.000001
+    assert all(10.000001 in (item.width, item.height, item.depth) for item in packer.bins[0].items)
+
+# Тесты нижних оценок
+def test_lower_bounds():
+    pallet = (10, 10, 10)
+    # Коробки шире половины поддона по всем осям - только по одной на поддон
+    assert martello_l1([('a', 6, 6, 6, 1, 5)], pallet) == 5
+    assert martello_l2([('a', 5, 5, 5, 1, 8)], pallet) == 1
+
+    report = preflight([('a', 60, 40, 30, 10, 30), ('big', 130, 10, 10, 1, 1)], (120, 80, 100), 500)
+    assert report['oversized_types'] == ['big']
+    assert report['min_pallets'] == 3
+    assert report['max_boxes_single_pallet'] == 13
+    assert report['min_unpacked'] == 18
+    assert report['single_pallet'] == 'infeasible'
+
+def test_weight_limit_stops_search():
+    packer = WeightAwarePacker()
+    packer.add_bin(Bin('test_pallet', 120, 80, 160, 30))
+    for i in range(5):
+        packer.add_item(Item(f'box_{i}', 30, 20, 15, 10))
+    packer.pack()
+
+    assert len(packer.bins[0].items) == 3
+    assert packer.analytics['rejection_reasons']['exceeds_weight_limit'] == 1
+
+# Тесты предварительного выбора коробок
+def test_preselection_respects_weight():
+    # Рюкзак: (вес, объем, ценность, количество)
+    assert select_counts([(4, 16, 13, 3), (3, 1, 9, 2)], 60, 17) == [1, 1]
+
+    packer = ExtremePointPacker(seed=0)
+    packer.preselect = 'volume'
+    packer.add_bin(Bin('test_pallet', 120, 80, 160, 100))
+    table = BoxTypeTable()
+    table.add_boxes(packer, 'heavy', 20, 20, 20, 40, 4)
+    table.add_boxes(packer, 'light', 40, 40, 40, 10, 4)
+    packer.pack()
+
+    assert sum(item.weight for item in packer.bins[0].items) <= 100
+    assert sorted(item.name for item in packer.bins[0].items) == ['heavy_0', 'light_0', 'light_1', 'light_2', 'light_3']
+    assert packer.analytics['rejection_reasons']['not_selected'] == 3
+
+
+def test_packing_state_fork_and_rollback():
+    state = PackingState(60, 40, 40)
+    state.place('a', 0, 0, 0, 30, 40, 20, 5)
+    points, key = state.points(), state.key
+
+    branch = state.fork()
+    branch.place('b', 30, 0, 0, 30, 40, 20, 5)
+    assert state.count == 1 and branch.count == 2 and branch.volume == 2 * 30 * 40 * 20
+    assert branch.probe(10, 10, 0, 10, 10, 10) is None
+    support, _, supporters = branch.probe(0, 0, 20, 60, 40, 20)
+    assert support == 1 and len(supporters) == 2
+
+    mark = state.mark()
+    placement = state.place('c', 0, 0, 20, 30, 40, 20, 5)
+    state.remove(state.placements()[0])
+    assert [p.item for p in state.placements()] == ['c'] and state.count == 1
+    state.rollback(mark)
+    assert [p.item for p in state.placements()] == ['a'] and state.top == 20
+    assert state.points() == points and state.key == key and state.weight == 5
+    assert state.probe(*placement.position, 30, 40, 20) is not None
+    assert [p.item for p in branch.placements()] == ['a', 'b']
+
+    # Принятое удаление вырезается из списка; верхняя отметка - по оставшимся
+    top = branch.place('c', 0, 0, 20, 30, 40, 20, 5)
+    branch.remove(top)
+    assert branch.top == 20
+    branch.commit()
+    assert branch._all[1][1] is None and not branch._removed
+    assert [p.item for p in branch.placements()] == ['a', 'b'] and branch.mark() == 0
+
+
+def test_lns_repacks_unpacked_items():
+    # Спираль SFC ставит коробки от центра поддона: четвертая не помещается
+    packer = SFCPacker()
+    packer.seed = 0
+    packer.add_bin(Bin('test_pallet', 60, 40, 40, 1000))
+    BoxTypeTable().add_boxes(packer, 'big', 30, 40, 20, 5, 4)
+    packer.pack()
+    assert len(packer.bins[0].items) == 3
+
+    stats = improve_packing(packer, time_budget=5, max_iterations=20, seed=0)
+
+    items = packer.bins[0].items
+    assert len(items) == 4 and not packer.unpacked_items and not packer.packing_issues
+    assert stats['volume_after'] == 60 * 40 * 40 > stats['volume_before']
+    for i, first in enumerate(items):
+        for second in items[i + 1:]:
+            assert not packer._check_intersection_orientation(
+                *first.position, first.width, first.height, first.depth,
+                *second.position, second.width, second.height, second.depth
+            )
+
+
+def test_beam_search_packs_within_limits():
+    for beam_width in (1, 4):
+        packer = BeamSearchPacker(beam_width=beam_width)
+        packer.add_bin(Bin('test_pallet', 60, 40, 40, 100))
+        table = BoxTypeTable()
+        table.add_boxes(packer, 'big', 30, 40, 20, 30, 4)
+        table.add_boxes(packer, 'small', 10, 10, 10, 1, 10)
+        packer.pack()
+
+        # Четвертая большая коробка превысила бы грузоподъемность, ее место занимают малые
+        items = packer.bins[0].items
+        assert [item.name for item in packer.unpacked_items] == ['big_3']
+        assert sum(item.weight for item in items) == 100
+        for i, first in enumerate(items):
+            for second in items[i + 1:]:
+                assert not packer._check_intersection_orientation(
+                    *first.position, first.width, first.height, first.depth,
+                    *second.position, second.width, second.height, second.depth
+                )
@@ -6,7 +6,7 @@ import os
 import json
 from datetime import datetime
 from py3dbp import Bin, Item  # Добавляем импорт базовых классов
-from src.utils.file_handlers import load_boxes_from_file, save_packing_result  # Добавляем импорт функций для работы с файлами
+from src.utils.file_handlers import load_boxes_from_file, load_boxes_with_validation, save_packing_result  # Добавляем импорт функций для работы с файлами
 
 class TestFileOperations:
     @pytest.fixture
@@ -100,4 +100,65 @@ Box2,40,30,20,10,1"""
             pd.DataFrame([{'test': 'data'}]).to_excel(writer, sheet_name='Упакованные')
             pd.DataFrame([{'test': 'data'}]).to_excel(writer, sheet_name='Неупакованные')
             pd.DataFrame([{'test': 'data'}]).to_excel(writer, sheet_name='Статистика')
-        assert os.path.exists(filename)
\ No newline at end of file
+        assert os.path.exists(filename)
+
+
+def test_load_reports_invalid_rows(tmp_path):
+    # Ошибки строк собираются за один проход с номерами строк
+    csv_path = tmp_path / "rows.csv"
+    csv_path.write_text("name,length,width,height,weight,quantity\n"
+                        "Box1,30,20,15,5,2\nBox2,-4,30,20,10,1\nBox3,40,abc,20,10,1\nBox4,40,30,20,10,2.5\n")
+    df, result = load_boxes_with_validation(csv_path)
+    assert len(df) == 4 and not result.is_valid
+    assert [(error.row, error.field) for error in result.errors] == [
+        (1, 'box_2.length'), (2, 'box_3.width'), (3, 'box_4.quantity')
+    ]
+    with pytest.raises(ValueError, match="Строка 2"):
+        load_boxes_from_file(csv_path)
+
+
+def test_boxes_list_messages_match_box_checks():
+    # Как в validate_box_data: None - поле отсутствует, NaN - не число; дробное количество - ошибка
+    import warnings
+    from src.validation import DataValidator
+    box = {'name': 'Box', 'length': 30, 'width': 20, 'height': 15, 'weight': 5}
+    boxes = [{**box, 'length': None}, {**box, 'length': float('nan'), 'quantity': float('nan')},
+             {**box, 'quantity': 2.5}, {**box, 'width': float('inf')}, box]
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = DataValidator().validate_boxes_list(boxes)
+    assert [(error.row, error.message) for error in result.errors] == [
+        (0, "Отсутствует обязательное поле: length"),
+        (1, "Поле length должно быть числом"),
+        (2, "Количество должно быть целым числом"),
+        (3, "Поле width должно быть числом"),
+    ]
+
+
+def test_streaming_load_aggregates_rows(tmp_path):
+    # Одинаковые строки из разных частей складываются в количество
+    df = pd.DataFrame({
+        'name': ['Коробка', 'Box2', 'Коробка', 'Box3'],
+        'length': [30, 40, 30, 10], 'width': [20, 30, 20, 10], 'height': [15, 20, 15, 10],
+        'weight': [5, 10, 5, 1], 'quantity': [2, 1, 3, 4]
+    })
+    csv_path = tmp_path / "cp1251.csv"
+    df.to_csv(csv_path, index=False, encoding='cp1251')
+    boxes, result = load_boxes_with_validation(csv_path, chunk_rows=2)
+    assert result.is_valid
+    assert boxes[['name', 'quantity']].values.tolist() == [['Коробка', 5], ['Box2', 1], ['Box3', 4]]
+
+
+def test_streaming_load_parquet(tmp_path):
+    # Parquet читается пакетами по chunk_rows строк, одинаковые строки тоже складываются
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({
+        'name': ['Коробка', 'Box2', 'Коробка', 'Box3'],
+        'length': [30, 40, 30, 10], 'width': [20, 30, 20, 10], 'height': [15, 20, 15, 10],
+        'weight': [5, 10, 5, 1], 'quantity': [2, 1, 3, 4]
+    })
+    parquet_path = tmp_path / "boxes.parquet"
+    df.to_parquet(parquet_path, row_group_size=2)
+    boxes, result = load_boxes_with_validation(parquet_path, chunk_rows=2)
+    assert result.is_valid
+    assert boxes[['name', 'quantity']].values.tolist() == [['Коробка', 5], ['Box2', 1], ['Box3', 4]]
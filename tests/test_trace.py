@@ -0,0 +1,44 @@
+# tests/test_trace.py
+import pytest
+from py3dbp import Bin, Item
+from src.packers.extreme_points import ExtremePointPacker
+from src.packers.laff import LAFFPacker
+from src.packers.trace import PackingTrace, replay_trace
+
+def build(packer):
+    packer.add_bin(Bin('test_pallet', 120, 80, 160, 1000))
+    for i in range(6):
+        packer.add_item(Item(f'box_{i}', 40, 30, 20 + i, 5 + i))
+    packer.add_item(Item('huge_box', 130, 90, 170, 50))
+    return packer
+
+def placements(packer):
+    return [(item.name, list(item.position), (item.width, item.height, item.depth))
+            for item in packer.bins[0].items]
+
+@pytest.mark.parametrize('packer_class', [ExtremePointPacker, LAFFPacker])
+def test_trace_replay_matches_pack(tmp_path, packer_class):
+    path = tmp_path / 'plan.pptr'
+    packer = build(packer_class())
+    packer.enable_trace(str(path))
+    packer.pack()
+
+    plan = replay_trace(str(path))
+    assert placements(plan) == placements(packer)
+    assert [item.name for item in plan.unpacked_items] == ['huge_box']
+    assert len(plan.steps) == len(packer.items)
+    assert plan.steps[-1]['packed_items'] == len(packer.bins[0].items)
+
+def test_seed_reproduces_extreme_points(tmp_path):
+    path = tmp_path / 'plan.pptr'
+    packer = build(ExtremePointPacker())
+    packer.enable_trace(str(path))
+    packer.pack()
+
+    trace = PackingTrace.read(str(path))
+    assert trace.method == 'ExtremePointPacker'
+    assert len(trace.order) == len(packer.items)
+
+    rerun = build(ExtremePointPacker(seed=trace.seed))
+    rerun.pack()
+    assert placements(rerun) == placements(packer)
@@ -0,0 +1,67 @@
+# tests/test_visualization.py
+from py3dbp import Bin, Item
+from src.packers.extreme_points import ExtremePointPacker
+import numpy as np
+from src.utils.layer_plans import LayerPlans
+from src.utils.visualization import VisibilityIndex, create_3d_visualization
+
+def build():
+    packer = ExtremePointPacker()
+    packer.add_bin(Bin('test_pallet', 120, 80, 160, 1000))
+    for i in range(6):
+        packer.add_item(Item(f'Маленькая_{i}', 20, 15, 10, 2))
+        packer.add_item(Item(f'Своя_{i}', 40, 30, 20, 5))
+    packer.pack()
+    return packer
+
+def test_merged_mode_builds_single_mesh():
+    packer = build()
+    count = len(packer.bins[0].items)
+    boxes = create_3d_visualization(packer, mode='boxes')
+    merged = create_3d_visualization(packer, mode='merged')
+    assert len(boxes.data) == 1 + 2 * count
+
+    # Поддон, все коробки, ребра и по trace легенды на тип
+    pallet, mesh, edges, *legend = merged.data
+    assert len(mesh.x) == 8 * count and len(mesh.i) == 12 * count
+    assert sorted(set(mesh.intensity)) == [0.5, 1.5]
+    assert not mesh.showlegend and not edges.showlegend
+    assert {trace.name: trace.marker.color for trace in legend} == {'Маленькая': 'red', 'Своя': 'red'}
+
+def test_visibility_index_culls_interior_boxes():
+    # Куб 3x3x3 из коробок 10x10x10: закрыты центральная и центральная нижняя (пол)
+    positions = np.array([(x, y, z) for z in (0, 10, 20) for y in (0, 10, 20) for x in (0, 10, 20)])
+    dims = np.full_like(positions, 10)
+    index = VisibilityIndex(positions, dims, (30, 30, 30))
+    center = 13
+    assert list(np.flatnonzero(~index.visible)) == [4, center]
+
+    # Срез под верхним слоем открывает центральную коробку, возврат снова ее закрывает
+    assert index.update(positions[:, 2] < 20)[center]
+    assert index.visible.sum() == 17
+    assert not index.update(np.ones(27, dtype=bool))[center]
+
+    # В разнесенном виде слои не закрывают друг друга
+    exploded = VisibilityIndex(positions, dims, (30, 30, 30), separate_layers=True)
+    assert list(np.unique(exploded.layers)) == [0, 1, 2] and exploded.visible.all()
+
+def test_culled_mode_draws_visible_boxes():
+    packer = build()
+    fig = create_3d_visualization(packer, mode='culled', cutaway_z=10)
+    shown = sum(1 for item in packer.bins[0].items if item.position[2] < 10)
+    assert len(fig.data[1].x) == 8 * shown
+
+def test_layer_plans_split_by_height_breaks():
+    # Два слоя по 10 см и коробка 20 см во втором слое
+    positions = [(0, 0, 0), (40, 0, 0), (0, 0, 10), (40, 0, 10), (80, 0, 10)]
+    dims = [(40, 30, 10), (40, 30, 10), (40, 30, 10), (40, 30, 20), (40, 30, 10)]
+    plans = LayerPlans([f'Своя_{i}' for i in range(5)], positions, dims, (120, 80))
+    assert [list(layer) for layer in plans.layers] == [[0, 1], [2, 3, 4]]
+    assert plans.describe(1) == "Слой 2 из 2: высота 10-30, коробок: 3"
+
+    svg = plans.svg(1)
+    # Три коробки слоя и пунктирные контуры двух коробок нижнего
+    assert svg.count('<title>') == 3 and svg.count('<rect') == 1 + 2 + 3
+    assert '3. Своя_4' in svg
+    html = plans.to_html()
+    assert html.count('<section>') == 2 and svg in html